@@ -17,6 +17,32 @@ import pickle
 import json
 from datetime import datetime
 import os
+import sys
+
+# Módulos compartidos del pipeline (scripts/)
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_PATH, 'scripts'))
+
+from processed_io import PROCESSED_DIR, SPLITS, USER_SUMMARY, load_user_summary, split_mtime
+from dashboard_materialization import (AGGREGATES_PATH, GROWTH_LABELS, GROWTH_SEGMENTS, IMPORTANCE_PATH,
+                                       RAW_DATA_PATH, REPORT_PATH, TABLE_ROWS, box_stats, frame_from_table,
+                                       load_aggregates, materialize, model_metrics)
+from affinity_aggregation import AFFINITY_PATH, load_affinities
+from segment_filter import VALUE_COLS, SegmentIndex
+from score_table import SCORE_CACHE_DIR, load_score_table, model_fingerprint
+from scoring import MODEL_PATH, PRIORITY_TIERS
+from campaign_list import (EXPORT_FORMATS, PAGE_ROWS, campaign_bytes, campaign_candidates, campaign_frame,
+                           campaign_summary, score_positions, select_campaign)
+from split_store import open_store
+
+# Segmentos de hasta este tamaño se dibujan punto a punto; los mayores, como grilla de densidad
+MAX_SCATTER_POINTS = 5000
+
+# Items con porción propia en los pies de Afinidades (el resto va en "Otras")
+AFFINITY_PIE_SLICES = 6
+
+# Presupuesto inicial de la Lista de Campaña (usuarios a contactar)
+DEFAULT_BUDGET = 1000
 
 # ============================================================================
 # CONFIGURACIÓN DE PÁGINA
@@ -367,19 +393,19 @@ st.markdown("""
 # FUNCIONES DE CARGA DE DATOS
 # ============================================================================
 
-@st.cache_data
-def load_data():
-    """Carga los datasets procesados"""
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-    train_df = pd.read_csv(os.path.join(base_path, 'data/processed/train.csv'))
-    val_df = pd.read_csv(os.path.join(base_path, 'data/processed/val.csv'))
-    test_df = pd.read_csv(os.path.join(base_path, 'data/processed/test.csv'))
+def splits_mtime():
+    """Última modificación de los splits procesados"""
+    return max(split_mtime(name, os.path.join(BASE_PATH, PROCESSED_DIR)) or 0 for name in SPLITS)
 
-    # Combinar para visualizaciones
-    all_data = pd.concat([train_df, val_df, test_df], ignore_index=True)
+@st.cache_resource(max_entries=1)
+def load_split_store(mtime):
+    """Splits procesados en un archivo Arrow mapeado en memoria, compartido entre sesiones
 
-    return train_df, val_df, test_df, all_data
+    Solo lo usa el cálculo de agregados cuando falta dashboard_aggregates.json
+    (store.union(): train + val + test sin copia ni concatenación). Se construye
+    una vez (data/processed/splits.arrow) y se reconstruye si cambian los splits.
+    """
+    return open_store(os.path.join(BASE_PATH, PROCESSED_DIR))
 
 @st.cache_resource
 def load_model():
@@ -392,19 +418,150 @@ def load_model():
 
     return model_data
 
+def aggregates_mtime():
+    """Fecha de modificación del artefacto de agregados (None si no existe)"""
+    path = os.path.join(BASE_PATH, AGGREGATES_PATH)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_resource(max_entries=1)
+def load_dashboard_aggregates(mtime):
+    """Carga los agregados precalculados por scripts/dashboard_materialization.py
+
+    Args:
+        mtime: Fecha de modificación del artefacto (al regenerarlo se invalida la caché).
+            Si es None, los agregados se calculan aquí una vez por proceso sobre la
+            unión sin copia del almacén Arrow compartido (en lugar de concatenar los splits).
+    """
+    if mtime is None:
+        return materialize(os.path.join(BASE_PATH, PROCESSED_DIR),
+                           os.path.join(BASE_PATH, RAW_DATA_PATH),
+                           os.path.join(BASE_PATH, IMPORTANCE_PATH),
+                           os.path.join(BASE_PATH, REPORT_PATH),
+                           all_data=load_split_store(splits_mtime()).union())
+    return load_aggregates(os.path.join(BASE_PATH, AGGREGATES_PATH))
+
+def report_mtime():
+    """Fecha de modificación de classification_report.json (None si no existe)"""
+    path = os.path.join(BASE_PATH, REPORT_PATH)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
 @st.cache_data
-def load_original_data():
-    """Carga el dataset original para análisis adicional"""
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    df = pd.read_csv(os.path.join(base_path, 'dataset_protegido (1).csv'))
-    return df
+def load_model_metrics(mtime):
+    """AUC-ROC y Precision@20% en test por modelo, y el modelo activo (None sin reporte)"""
+    return model_metrics(os.path.join(BASE_PATH, REPORT_PATH))
+
+def affinities_mtime():
+    """Fecha de modificación del artefacto de afinidades (None si no existe)"""
+    path = os.path.join(BASE_PATH, AFFINITY_PATH)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+@st.cache_resource(max_entries=1)
+def load_affinity_aggregates(mtime):
+    """Afinidades precalculadas por scripts/affinity_aggregation.py
+
+    Args:
+        mtime: Fecha de modificación del artefacto. Si es None no hay afinidades:
+            el dashboard no lee el CSV crudo (el job se corre offline).
+    """
+    if mtime is None:
+        return None
+    return load_affinities(os.path.join(BASE_PATH, AFFINITY_PATH))
 
 @st.cache_data
-def load_feature_importance():
-    """Carga la importancia de features"""
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    importance_path = os.path.join(base_path, 'models/feature_importance.csv')
-    return pd.read_csv(importance_path)
+def current_model_fingerprint(mtime):
+    """Huella de best_classifier.pkl (se recalcula solo si cambia su fecha de modificación)"""
+    return model_fingerprint(os.path.join(BASE_PATH, MODEL_PATH))
+
+@st.cache_resource(max_entries=1)
+def load_scores(fingerprint):
+    """Tabla uid → probabilidad de una versión del modelo, compartida entre sesiones
+
+    Se lee de models/score_cache/ o, si esa versión aún no está scoreada, se
+    calcula una vez para todos los usuarios de train/val/test.
+    """
+    return load_score_table(os.path.join(BASE_PATH, MODEL_PATH),
+                            os.path.join(BASE_PATH, PROCESSED_DIR),
+                            os.path.join(BASE_PATH, SCORE_CACHE_DIR),
+                            fingerprint=fingerprint, model_data=load_model())
+
+def model_version():
+    """Huella de la versión actual de best_classifier.pkl"""
+    return current_model_fingerprint(os.path.getmtime(os.path.join(BASE_PATH, MODEL_PATH)))
+
+@st.cache_data
+def example_uids(fingerprint, n=100):
+    """Muestra fija de usuarios del test set para el selector"""
+    scores = load_scores(fingerprint)
+    test_uids = scores.index[scores['split'] == 'test']
+    return pd.Series(test_uids).sample(min(n, len(test_uids)), random_state=42).tolist()
+
+def user_summary_mtime():
+    """Fecha de modificación del resumen por usuario (None si no existe)"""
+    return split_mtime(USER_SUMMARY, os.path.join(BASE_PATH, PROCESSED_DIR))
+
+@st.cache_resource(max_entries=1)
+def load_segment_index(mtime):
+    """Índice de bitmaps del Explorador de Segmentos, compartido entre sesiones
+
+    Args:
+        mtime: Fecha de modificación del resumen por usuario (None si no existe:
+            preparación anterior al resumen, sin filtros por categoría)
+    """
+    if mtime is None:
+        return None
+    return SegmentIndex(load_user_summary(os.path.join(BASE_PATH, PROCESSED_DIR)))
+
+@st.cache_resource(max_entries=1)
+def load_campaign_positions(fingerprint, mtime):
+    """Posición en la tabla de probabilidades de cada fila del resumen por usuario (une segmentos y scores por uid)"""
+    return score_positions(load_scores(fingerprint), load_segment_index(mtime).uids)
+
+# Artefactos del dashboard: cada uno se carga al primer uso y queda en
+# st.cache_resource (una sola copia por proceso, compartida entre sesiones;
+# solo se reemplaza cuando cambia la fecha de modificación o la huella del archivo)
+ARTIFACT_LOADERS = {
+    'agregados': lambda: load_dashboard_aggregates(aggregates_mtime()),
+    'afinidades': lambda: load_affinity_aggregates(affinities_mtime()),
+    'indice_segmentos': lambda: load_segment_index(user_summary_mtime()),
+    'probabilidades': lambda: load_scores(model_version()),
+}
+
+# Artefactos que necesita cada página (las demás páginas no los cargan)
+PAGE_ARTIFACTS = {
+    "🏠 Dashboard Principal": ['agregados'],
+    "🔍 Explorador de Segmentos": ['agregados', 'indice_segmentos'],
+    "🎯 Predicciones": ['probabilidades'],
+    "📋 Lista de Campaña": ['probabilidades', 'indice_segmentos'],
+    "💎 Análisis de Afinidades": ['agregados', 'afinidades'],
+}
+
+def load_page_artifacts(page):
+    """Carga (o toma de la caché compartida) los artefactos declarados por una página"""
+    return {name: ARTIFACT_LOADERS[name]() for name in PAGE_ARTIFACTS.get(page, [])}
+
+def category_filter(segment_index, label, group, placeholder, key):
+    """Multiselect de categorías de un grupo del índice de segmentos (vacío = sin filtro)"""
+    return st.multiselect(
+        label,
+        options=segment_index.categories(group) if segment_index is not None else [],
+        placeholder=placeholder,
+        disabled=segment_index is None,
+        key=key
+    )
+
+def growth_means(aggregates, feature):
+    """Medias precalculadas de un feature por grupo de crecimiento"""
+    means = aggregates['medias_por_crecimiento'][feature]
+    return pd.DataFrame({'Grupo': ['Standard', 'High Growth'], feature: [means.get('0'), means.get('1')]})
+
+def affinity_shares(section, slices=AFFINITY_PIE_SLICES):
+    """Órdenes de los items principales de una sección de afinidades y del resto ("Otras")"""
+    top = frame_from_table(section['top'])
+    shares = top.head(slices)[['item', 'ordenes']]
+    others = section['ordenes_totales'] - shares['ordenes'].sum()
+    if others > 0:
+        shares = pd.concat([shares, pd.DataFrame({'item': ['Otras'], 'ordenes': [others]})], ignore_index=True)
+    return shares
 
 # ============================================================================
 # FUNCIONES DE VISUALIZACIÓN
@@ -526,6 +683,53 @@ def create_scatter_plot(df, x, y, color, title):
 
     return fig
 
+def create_segment_scatter(x, y, title, points=None, density=None):
+    """Crea un scatter WebGL del segmento: puntos individuales o grilla de densidad
+
+    Args:
+        x, y: Columnas de los ejes
+        title: Título del gráfico
+        points: DataFrame con x, y y high_growth (un marcador por usuario)
+        density: Celdas de SegmentIndex.density (un marcador por celda, tamaño
+            según usuarios y color según % high growth)
+    """
+    fig = go.Figure()
+
+    if density is not None:
+        sizes = 4 + 16 * np.sqrt(density['usuarios'] / density['usuarios'].max())
+        fig.add_trace(go.Scattergl(
+            x=density['x'], y=density['y'],
+            mode='markers',
+            customdata=density['usuarios'],
+            marker=dict(size=sizes, color=density['high_growth_pct'], cmin=0, cmax=100,
+                        colorscale=[[0, '#6366f1'], [1, '#ec4899']], opacity=0.8,
+                        colorbar=dict(title='% High Growth')),
+            hovertemplate='Usuarios: %{customdata:,}<br>% High Growth: %{marker.color:.1f}%<extra></extra>',
+            showlegend=False
+        ))
+    else:
+        for group, color in ((0, '#6366f1'), (1, '#ec4899')):
+            group_points = points[points['high_growth'] == group]
+            fig.add_trace(go.Scattergl(
+                x=group_points[x], y=group_points[y],
+                mode='markers',
+                name=GROWTH_LABELS[group],
+                marker=dict(color=color, size=6, opacity=0.6)
+            ))
+
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=18, color='white')),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='rgba(255,255,255,0.8)'),
+        xaxis=dict(title=x, gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(title=y, gridcolor='rgba(255,255,255,0.1)'),
+        legend=dict(font=dict(color='white')),
+        margin=dict(l=40, r=40, t=60, b=40)
+    )
+
+    return fig
+
 def create_line_chart(df, x, y, title):
     """Crea un line chart con área"""
     fig = go.Figure()
@@ -568,19 +772,28 @@ with st.sidebar:
     # Navegación
     page = st.radio(
         "📍 Navegación",
-        ["🏠 Dashboard Principal", "🔍 Explorador de Segmentos", "🎯 Predicciones", "💎 Análisis de Afinidades"],
+        ["🏠 Dashboard Principal", "🔍 Explorador de Segmentos", "🎯 Predicciones", "📋 Lista de Campaña",
+         "💎 Análisis de Afinidades"],
         label_visibility="collapsed"
     )
 
     st.markdown("---")
 
-    # Info del modelo
-    st.markdown("""
+    # Info del modelo (métricas de test del reporte de entrenamiento)
+    model_info = load_model_metrics(report_mtime())
+    if model_info and model_info['activo'] in model_info['modelos']:
+        active_metrics = model_info['modelos'][model_info['activo']]
+        model_name = model_info['activo']
+        auc_text = f"{active_metrics.get('auc_roc', float('nan')):.2f}"
+        precision_text = f"{active_metrics.get('precision_at_20', float('nan')):.2f}"
+    else:
+        model_name, auc_text, precision_text = 'N/D', 'N/D', 'N/D'
+    st.markdown(f"""
     <div style="background: rgba(99, 102, 241, 0.1); border-radius: 12px; padding: 15px; margin-top: 20px;">
         <h4 style="color: #a78bfa; margin: 0 0 10px 0; font-size: 0.9rem;">📊 Modelo Activo</h4>
-        <p style="color: white; font-size: 0.85rem; margin: 5px 0;"><strong>XGBoost</strong></p>
-        <p style="color: rgba(255,255,255,0.6); font-size: 0.75rem; margin: 5px 0;">AUC-ROC: ~0.80</p>
-        <p style="color: rgba(255,255,255,0.6); font-size: 0.75rem; margin: 5px 0;">Precision@20%: ~0.74</p>
+        <p style="color: white; font-size: 0.85rem; margin: 5px 0;"><strong>{model_name}</strong></p>
+        <p style="color: rgba(255,255,255,0.6); font-size: 0.75rem; margin: 5px 0;">AUC-ROC: {auc_text}</p>
+        <p style="color: rgba(255,255,255,0.6); font-size: 0.75rem; margin: 5px 0;">Precision@20%: {precision_text}</p>
     </div>
     """, unsafe_allow_html=True)
 
@@ -598,10 +811,9 @@ with st.sidebar:
 # ============================================================================
 
 try:
-    train_df, val_df, test_df, all_data = load_data()
-    model_data = load_model()
-    original_df = load_original_data()
-    feature_importance = load_feature_importance()
+    # Solo lo que necesita la página seleccionada
+    artifacts = load_page_artifacts(page)
+    aggregates = artifacts.get('agregados')
     data_loaded = True
 except Exception as e:
     data_loaded = False
@@ -624,10 +836,11 @@ if page == "🏠 Dashboard Principal" and data_loaded:
     # KPIs principales
     col1, col2, col3, col4 = st.columns(4)
 
-    total_users = len(all_data)
-    high_growth_pct = all_data['high_growth'].mean() * 100
-    avg_delta = original_df['delta_orders'].mean()
-    active_pct = 29.7  # Dato del análisis original
+    kpis = aggregates['kpis']
+    total_users = kpis['total_usuarios']
+    high_growth_pct = kpis['high_growth_pct']
+    avg_delta = kpis['delta_promedio']
+    active_pct = kpis.get('activos_pct')
 
     with col1:
         st.metric(
@@ -653,7 +866,7 @@ if page == "🏠 Dashboard Principal" and data_loaded:
     with col4:
         st.metric(
             label="Usuarios Activos",
-            value=f"{active_pct}%",
+            value=f"{active_pct:.1f}%" if active_pct is not None else "N/D",
             delta="≤7 días recencia"
         )
 
@@ -666,10 +879,10 @@ if page == "🏠 Dashboard Principal" and data_loaded:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
         # Distribución de high_growth
-        growth_dist = all_data['high_growth'].value_counts()
+        growth_dist = aggregates['distribucion_crecimiento']
         fig = create_modern_pie_chart(
             labels=['Standard Growth', 'High Growth'],
-            values=[growth_dist[0], growth_dist[1]],
+            values=[growth_dist['Standard'], growth_dist['High Growth']],
             title="📊 Distribución de Crecimiento"
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -680,7 +893,7 @@ if page == "🏠 Dashboard Principal" and data_loaded:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
         # Feature importance top 10
-        top_features = feature_importance.head(10)
+        top_features = frame_from_table(aggregates['top_features'])
         fig = create_modern_bar_chart(
             top_features,
             x='importance',
@@ -698,11 +911,13 @@ if page == "🏠 Dashboard Principal" and data_loaded:
     with col1:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-        # Histograma de delta_orders
+        # Histograma de delta_orders (conteos pre-agrupados)
+        hist = aggregates['histograma_delta_orders']
+        edges = np.array(hist['edges'])
         fig = go.Figure()
-        fig.add_trace(go.Histogram(
-            x=original_df['delta_orders'],
-            nbinsx=30,
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=hist['counts'],
             marker_color='#6366f1',
             marker_line_color='#8b5cf6',
             marker_line_width=1,
@@ -725,12 +940,16 @@ if page == "🏠 Dashboard Principal" and data_loaded:
     with col2:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-        # Performance por conjunto (métricas realistas con features normalizados)
+        # Métricas de test de cada modelo (classification_report.json)
+        models = (aggregates.get('modelos') or {}).get('modelos', {})
         model_comparison = pd.DataFrame({
-            'Modelo': ['Random Forest', 'XGBoost'],
-            'AUC-ROC': [0.78, 0.80],
-            'Precision@20%': [0.72, 0.74]
+            'Modelo': list(models),
+            'AUC-ROC': [metrics.get('auc_roc') for metrics in models.values()],
+            'Precision@20%': [metrics.get('precision_at_20') for metrics in models.values()]
         })
+        if model_comparison.empty:
+            st.info("Sin métricas de modelos: entrena con scripts/train_models.py y vuelve a correr "
+                    "scripts/dashboard_materialization.py")
 
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -773,42 +992,63 @@ elif page == "🔍 Explorador de Segmentos" and data_loaded:
     </div>
     """, unsafe_allow_html=True)
 
-    # Filtros
+    # Bitmaps por categoría sobre el resumen por usuario (un índice por proceso)
+    segment_index = artifacts['indice_segmentos']
+    if segment_index is None:
+        st.info("Los filtros por categoría requieren data/processed/user_summary "
+                "(re-ejecutar run_data_preparation.py): se muestran solo los segmentos por crecimiento.")
+
+    # Filtros: OR dentro de cada grupo, AND entre grupos
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        # Obtener categorías de recencia únicas
-        recencia_cols = [col for col in all_data.columns if 'categoria_recencia' in col]
-        st.multiselect(
-            "📅 Categoría de Recencia",
-            options=['Todas'] + recencia_cols[:5],
-            default=['Todas'],
-            key="recencia_filter"
-        )
+        recencia = category_filter(segment_index, "📅 Categoría de Recencia", 'categoria_recencia', "Todas", "recencia_filter")
 
     with col2:
-        # R Segment
-        r_segment_cols = [col for col in all_data.columns if 'r_segment' in col]
-        st.multiselect(
-            "👥 R Segment",
-            options=['Todos'] + r_segment_cols[:5],
-            default=['Todos'],
-            key="rsegment_filter"
-        )
+        r_segment = category_filter(segment_index, "👥 R Segment", 'r_segment', "Todos", "rsegment_filter")
 
     with col3:
         growth_filter = st.selectbox(
             "📈 Tipo de Crecimiento",
-            options=['Todos', 'High Growth', 'Standard Growth']
+            options=list(GROWTH_SEGMENTS)
         )
 
-    # Aplicar filtros
-    filtered_data = all_data.copy()
+    col1, col2 = st.columns(2)
 
-    if growth_filter == 'High Growth':
-        filtered_data = filtered_data[filtered_data['high_growth'] == 1]
-    elif growth_filter == 'Standard Growth':
-        filtered_data = filtered_data[filtered_data['high_growth'] == 0]
+    with col1:
+        cities = category_filter(segment_index, "🏙️ Ciudad", 'city_token', "Todas", "city_filter")
+
+    with col2:
+        dominant = category_filter(segment_index, "🛒 Categoría Dominante", 'dominant_category', "Todas", "dominant_filter")
+
+    if segment_index is not None:
+        growth_value = GROWTH_SEGMENTS[growth_filter]
+        filters = {
+            'categoria_recencia': recencia,
+            'r_segment': r_segment,
+            'city_token': cities,
+            'dominant_category': dominant,
+            'high_growth': [] if growth_value is None else [growth_value],
+        }
+        bitmap = segment_index.mask(filters)
+        segment = segment_index.summary(filters)
+        safe_cols = [col for col in VALUE_COLS if col != 'high_growth']
+        # Scatter: todos los usuarios si el segmento es pequeño, si no la grilla de densidad del segmento completo
+        if segment['usuarios'] <= MAX_SCATTER_POINTS:
+            sample_data, density = segment_index.frame(segment_index.rows(bitmap), ['high_growth'] + safe_cols[:2]), None
+        else:
+            sample_data, density = None, segment_index.density(bitmap, safe_cols[0], safe_cols[1])
+        boxes = {GROWTH_LABELS[group]: box_stats(segment_index.column(bitmap & growth_bitmap, 'category_diversity'))
+                 for group, growth_bitmap in segment_index.bitmaps['high_growth'].items()}
+        boxes = {label: stats for label, stats in boxes.items() if stats is not None}
+        table = segment_index.frame(segment_index.rows(bitmap)[:TABLE_ROWS], ['high_growth'] + safe_cols[:5])
+    else:
+        # Segmento precalculado para el filtro de crecimiento
+        segment = aggregates['segmentos'][growth_filter]
+        safe_cols = aggregates['columnas_segmento']
+        sample_data, density = frame_from_table(segment['muestra_scatter']), None
+        boxes = segment.get('caja_category_diversity', {})
+        table = frame_from_table(segment['tabla'])
 
     # Métricas del segmento filtrado
     st.markdown("<br>", unsafe_allow_html=True)
@@ -816,17 +1056,16 @@ elif page == "🔍 Explorador de Segmentos" and data_loaded:
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Usuarios en Segmento", f"{len(filtered_data):,}")
+        st.metric("Usuarios en Segmento", f"{segment['usuarios']:,}")
 
     with col2:
-        st.metric("% del Total", f"{len(filtered_data)/len(all_data)*100:.1f}%")
+        st.metric("% del Total", f"{segment['pct_total']:.1f}%")
 
     with col3:
-        st.metric("% High Growth", f"{filtered_data['high_growth'].mean()*100:.1f}%")
+        st.metric("% High Growth", f"{segment['high_growth_pct']:.1f}%")
 
     with col4:
-        avg_features = filtered_data.select_dtypes(include=[np.number]).mean()
-        st.metric("Avg Category Diversity", f"{avg_features.get('category_diversity', 0):.2f}")
+        st.metric("Avg Category Diversity", f"{segment['category_diversity_promedio']:.2f}")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -836,28 +1075,10 @@ elif page == "🔍 Explorador de Segmentos" and data_loaded:
     with col1:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-        # Scatter plot de features
-        numeric_cols = filtered_data.select_dtypes(include=[np.number]).columns.tolist()
-        safe_cols = [c for c in numeric_cols if c not in ['high_growth', 'delta_orders', 'uid']]
-
+        # Scatter WebGL de features (puntos o densidad del segmento completo)
         if len(safe_cols) >= 2:
-            sample_data = filtered_data.sample(min(1000, len(filtered_data)))
-            fig = px.scatter(
-                sample_data,
-                x=safe_cols[0],
-                y=safe_cols[1],
-                color='high_growth',
-                color_continuous_scale=['#6366f1', '#ec4899'],
-                opacity=0.6,
-                title="📊 Distribución de Features"
-            )
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='rgba(255,255,255,0.8)'),
-                xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
-            )
+            title = "📊 Distribución de Features" + (" (densidad)" if density is not None else "")
+            fig = create_segment_scatter(safe_cols[0], safe_cols[1], title, points=sample_data, density=density)
             st.plotly_chart(fig, use_container_width=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
@@ -865,14 +1086,26 @@ elif page == "🔍 Explorador de Segmentos" and data_loaded:
     with col2:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-        # Box plot de feature importante
-        if 'category_diversity' in filtered_data.columns:
+        # Box plot de feature importante (cuartiles y outliers sin enviar los datos)
+        if boxes:
+            groups = list(boxes)
             fig = go.Figure()
             fig.add_trace(go.Box(
-                x=filtered_data['high_growth'].map({0: 'Standard', 1: 'High Growth'}),
-                y=filtered_data['category_diversity'],
+                x=groups,
+                q1=[boxes[g]['q1'] for g in groups],
+                median=[boxes[g]['median'] for g in groups],
+                q3=[boxes[g]['q3'] for g in groups],
+                lowerfence=[boxes[g]['lowerfence'] for g in groups],
+                upperfence=[boxes[g]['upperfence'] for g in groups],
                 marker_color='#6366f1',
-                boxpoints='outliers'
+                boxpoints=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=[g for g in groups for _ in boxes[g]['outliers']],
+                y=[v for g in groups for v in boxes[g]['outliers']],
+                mode='markers',
+                marker=dict(color='#6366f1', size=4),
+                showlegend=False
             ))
 
             fig.update_layout(
@@ -891,11 +1124,8 @@ elif page == "🔍 Explorador de Segmentos" and data_loaded:
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.markdown("### 📋 Muestra de Usuarios del Segmento")
 
-    display_cols = ['uid', 'high_growth'] + safe_cols[:5]
-    display_cols = [c for c in display_cols if c in filtered_data.columns]
-
     st.dataframe(
-        filtered_data[display_cols].head(100).style.background_gradient(cmap='Blues'),
+        table.style.background_gradient(cmap='Blues'),
         use_container_width=True,
         height=300
     )
@@ -920,15 +1150,20 @@ elif page == "🎯 Predicciones" and data_loaded:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.markdown("### 🎲 Seleccionar Usuario")
 
-        # Seleccionar usuario del test set
-        test_sample = test_df.sample(min(100, len(test_df)), random_state=42)
-        user_ids = test_sample['uid'].tolist()
+        # Probabilidades precalculadas de todos los usuarios (versión actual del modelo)
+        scores = artifacts['probabilidades']
 
         selected_uid = st.selectbox(
             "Selecciona un usuario:",
-            options=user_ids,
+            options=example_uids(model_version()),
             format_func=lambda x: f"Usuario {x}"
         )
+        search = st.text_input("O busca cualquier uid:", placeholder="uid (train, val o test)").strip()
+        if search:
+            selected_uid = int(search) if search.isdigit() else None
+            if selected_uid not in scores.index:
+                st.warning(f"No se encontró el usuario {search}")
+                selected_uid = None
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -941,28 +1176,29 @@ elif page == "🎯 Predicciones" and data_loaded:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         st.markdown("### 📊 Información del Usuario")
 
-        user_data = test_df[test_df['uid'] == selected_uid].iloc[0]
-        feature_cols = model_data['feature_cols']
+        if selected_uid is not None:
+            # Búsqueda O(1) en el índice por uid
+            user_data = scores.loc[selected_uid]
 
-        # Mostrar algunas características
-        st.markdown(f"""
-        <p><strong>Category Diversity:</strong> {user_data.get('category_diversity', 'N/A'):.2f}</p>
-        <p><strong>High Growth Real:</strong> {'Sí ✅' if user_data['high_growth'] == 1 else 'No ❌'}</p>
-        """, unsafe_allow_html=True)
+            # Mostrar algunas características
+            st.markdown(f"""
+            <p><strong>Category Diversity:</strong> {user_data['category_diversity']:.2f}</p>
+            <p><strong>High Growth Real:</strong> {'Sí ✅' if user_data['high_growth'] == 1 else 'No ❌'}</p>
+            <p><strong>Conjunto:</strong> {user_data['split']}</p>
+            """, unsafe_allow_html=True)
 
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col2:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-        if st.session_state.get('predict', False):
-            # Realizar predicción
-            model = model_data['model']
-            X_user = test_df[test_df['uid'] == selected_uid][feature_cols]
-
-            prob = model.predict_proba(X_user)[0][1]
-            prediction = model.predict(X_user)[0]
-            actual = test_df[test_df['uid'] == selected_uid]['high_growth'].values[0]
+        if st.session_state.get('predict', False) and selected_uid is not None:
+            # Predicción precalculada (tabla de probabilidades por versión del modelo)
+            prob = float(user_data['probability'])
+            prediction = user_data['prediction']
+            actual = user_data['high_growth']
+            # Nivel por cuantiles de probabilidad (score_table, el mismo de la Lista de Campaña)
+            tier = user_data['priority_tier']
 
             # Gauge de probabilidad
             st.markdown("### 🎯 Probabilidad de High Growth")
@@ -974,14 +1210,14 @@ elif page == "🎯 Predicciones" and data_loaded:
             col_a, col_b, col_c = st.columns(3)
 
             with col_a:
-                if prob > 0.7:
+                if tier == 'alta':
                     st.markdown("""
                     <div style="background: linear-gradient(135deg, #10b981, #059669); padding: 20px; border-radius: 16px; text-align: center;">
                         <h3 style="color: white; margin: 0;">ALTA PRIORIDAD</h3>
                         <p style="color: rgba(255,255,255,0.8); margin: 5px 0;">Invertir en retención</p>
                     </div>
                     """, unsafe_allow_html=True)
-                elif prob > 0.4:
+                elif tier == 'media':
                     st.markdown("""
                     <div style="background: linear-gradient(135deg, #f59e0b, #d97706); padding: 20px; border-radius: 16px; text-align: center;">
                         <h3 style="color: white; margin: 0;">PRIORIDAD MEDIA</h3>
@@ -1006,13 +1242,13 @@ elif page == "🎯 Predicciones" and data_loaded:
             st.markdown("<br>", unsafe_allow_html=True)
             st.markdown("### 💡 Recomendación")
 
-            if prob > 0.7:
+            if tier == 'alta':
                 st.success("""
                 **Acción Sugerida:** Este usuario tiene alto potencial de crecimiento.
                 Se recomienda enviar ofertas personalizadas en sus categorías favoritas
                 y considerar para programa de fidelización premium.
                 """)
-            elif prob > 0.4:
+            elif tier == 'media':
                 st.warning("""
                 **Acción Sugerida:** Usuario con potencial moderado.
                 Incluir en campañas de reactivación y monitorear comportamiento
@@ -1034,6 +1270,132 @@ elif page == "🎯 Predicciones" and data_loaded:
 
         st.markdown('</div>', unsafe_allow_html=True)
 
+# ============================================================================
+# PÁGINA: LISTA DE CAMPAÑA
+# ============================================================================
+
+elif page == "📋 Lista de Campaña" and data_loaded:
+
+    st.markdown("""
+    <div style="text-align: center; padding: 40px 0 30px 0;">
+        <h1 style="font-size: 3rem; margin-bottom: 10px;">Lista de Campaña</h1>
+        <p style="color: rgba(255,255,255,0.6); font-size: 1.1rem;">Top usuarios por probabilidad de high growth para contactar</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Todos los usuarios scoreados con la versión actual del modelo
+    scores = artifacts['probabilidades']
+    segment_index = artifacts['indice_segmentos']
+    if segment_index is None:
+        st.info("Los filtros por segmento requieren data/processed/user_summary "
+                "(re-ejecutar run_data_preparation.py): la lista se arma sobre todos los usuarios.")
+
+    # Filtros: OR dentro de cada grupo, AND entre grupos
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        recencia = category_filter(segment_index, "📅 Categoría de Recencia", 'categoria_recencia', "Todas", "campaign_recencia")
+
+    with col2:
+        r_segment = category_filter(segment_index, "👥 R Segment", 'r_segment', "Todos", "campaign_rsegment")
+
+    with col3:
+        tiers = st.multiselect(
+            "🎯 Nivel de Prioridad",
+            options=[name for name, _ in PRIORITY_TIERS],
+            placeholder="Todos",
+            key="campaign_tiers"
+        )
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        cities = category_filter(segment_index, "🏙️ Ciudad", 'city_token', "Todas", "campaign_city")
+
+    with col2:
+        dominant = category_filter(segment_index, "🛒 Categoría Dominante", 'dominant_category', "Todas", "campaign_dominant")
+
+    filters = {
+        'categoria_recencia': recencia,
+        'r_segment': r_segment,
+        'city_token': cities,
+        'dominant_category': dominant,
+    }
+    positions_by_row = (load_campaign_positions(model_version(), user_summary_mtime())
+                        if segment_index is not None else None)
+    candidates = campaign_candidates(scores, segment_index, filters, tiers, positions_by_row)
+    eligible = len(scores) if candidates is None else len(candidates)
+
+    budget = st.number_input(
+        "💰 Presupuesto (usuarios a contactar)",
+        min_value=1,
+        max_value=max(eligible, 1),
+        value=min(DEFAULT_BUDGET, max(eligible, 1)),
+        step=100
+    )
+
+    # Top-k por partición (sin ordenar a todos los candidatos)
+    positions = select_campaign(scores, budget, candidates)
+    campaign = campaign_summary(scores, positions)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Candidatos", f"{eligible:,}")
+
+    with col2:
+        st.metric("Usuarios en la Lista", f"{campaign['usuarios']:,}")
+
+    with col3:
+        st.metric("Probabilidad Media", f"{campaign['probabilidad_media']:.1%}")
+
+    with col4:
+        st.metric("High Growth Esperados", f"{campaign['high_growth_esperados']:,.0f}")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # Tabla paginada: el navegador solo recibe la página visible
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### 📋 Usuarios Seleccionados")
+
+    n_pages = max(1, -(-len(positions) // PAGE_ROWS))
+    page_number = st.number_input("Página", min_value=1, max_value=n_pages, value=1, key="campaign_page")
+    start = (page_number - 1) * PAGE_ROWS
+    page_positions = positions[start:start + PAGE_ROWS]
+
+    st.dataframe(
+        campaign_frame(scores, page_positions, start + 1),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"Usuarios {start + 1:,}–{start + len(page_positions):,} de {len(positions):,} "
+               f"(página {page_number} de {n_pages}) | Niveles: "
+               + ", ".join(f"{name} {count:,}" for name, count in campaign['por_nivel'].items()))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Exportación: el archivo se genera (por lotes) solo al pedirlo
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### 📦 Exportar Lista")
+
+    fmt = st.radio("Formato", EXPORT_FORMATS, horizontal=True, key="campaign_format")
+    selection = (model_version(), repr(filters), tuple(tiers), budget, fmt)
+
+    if st.button("📦 Preparar archivo", use_container_width=True):
+        st.session_state['campaign_file'] = (selection, campaign_bytes(scores, positions, fmt))
+
+    prepared = st.session_state.get('campaign_file')
+    if prepared is not None and prepared[0] == selection:
+        st.download_button(
+            "⬇️ Descargar lista",
+            data=prepared[1],
+            file_name=f"lista_campana_top{budget}.{fmt}",
+            mime='text/csv' if fmt == 'csv' else 'application/octet-stream',
+            use_container_width=True
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+
 # ============================================================================
 # PÁGINA: ANÁLISIS DE AFINIDADES
 # ============================================================================
@@ -1047,8 +1409,13 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
     </div>
     """, unsafe_allow_html=True)
 
+    affinities = artifacts.get('afinidades')
+    if affinities is None:
+        st.info("Sin afinidades precalculadas: corre scripts/affinity_aggregation.py para ver la distribución "
+                "de categorías, marcas, tiendas y tipos de tienda")
+
     # Tabs para diferentes análisis
-    tab1, tab2, tab3 = st.tabs(["📦 Categorías", "🏷️ Marcas", "🏪 Tiendas"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📦 Categorías", "🏷️ Marcas", "🏪 Tiendas", "🏬 Tipos de Tienda"])
 
     with tab1:
         col1, col2 = st.columns(2)
@@ -1056,18 +1423,16 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
         with col1:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
-            # Categorías dominantes (simulado basado en datos del EDA)
-            categories_data = pd.DataFrame({
-                'Categoría': ['Groceries', 'Restaurants', 'Pharmacy', 'Convenience', 'Pet Supplies', 'Liquor'],
-                'Porcentaje': [35, 25, 15, 12, 8, 5]
-            })
+            # Órdenes por categoría principal
+            if affinities is not None:
+                categories_data = affinity_shares(affinities['categorias'])
 
-            fig = create_modern_pie_chart(
-                labels=categories_data['Categoría'].tolist(),
-                values=categories_data['Porcentaje'].tolist(),
-                title="📊 Distribución por Categoría Principal"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+                fig = create_modern_pie_chart(
+                    labels=categories_data['item'].tolist(),
+                    values=categories_data['ordenes'].tolist(),
+                    title="📊 Distribución por Categoría Principal"
+                )
+                st.plotly_chart(fig, use_container_width=True)
 
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1075,9 +1440,8 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
             # Category diversity por growth
-            if 'category_diversity' in all_data.columns:
-                diversity_by_growth = all_data.groupby('high_growth')['category_diversity'].mean().reset_index()
-                diversity_by_growth['Grupo'] = diversity_by_growth['high_growth'].map({0: 'Standard', 1: 'High Growth'})
+            if 'category_diversity' in aggregates['medias_por_crecimiento']:
+                diversity_by_growth = growth_means(aggregates, 'category_diversity')
 
                 fig = go.Figure()
                 fig.add_trace(go.Bar(
@@ -1108,29 +1472,31 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
             # Concentración de marca (brand001)
-            brand_data = pd.DataFrame({
-                'Marca': ['Brand001 (Dominante)', 'Otras Marcas'],
-                'Porcentaje': [40.6, 59.4]
-            })
-
-            fig = go.Figure(go.Pie(
-                labels=brand_data['Marca'],
-                values=brand_data['Porcentaje'],
-                hole=0.6,
-                marker=dict(colors=['#ec4899', '#6366f1']),
-                textinfo='percent+label',
-                textfont=dict(color='white')
-            ))
+            if affinities is not None and 'marca_lider' in affinities:
+                leader_pct = affinities['marca_lider']['pct_ordenes']
+                brand_data = pd.DataFrame({
+                    'Marca': [f"{affinities['marca_lider']['marca'].capitalize()} (Líder)", 'Otras Marcas'],
+                    'Porcentaje': [leader_pct, 100 - leader_pct]
+                })
+
+                fig = go.Figure(go.Pie(
+                    labels=brand_data['Marca'],
+                    values=brand_data['Porcentaje'],
+                    hole=0.6,
+                    marker=dict(colors=['#ec4899', '#6366f1']),
+                    textinfo='percent+label',
+                    textfont=dict(color='white')
+                ))
 
-            fig.update_layout(
-                title=dict(text="🏷️ Concentración de Marca Dominante", font=dict(size=18, color='white')),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                showlegend=True,
-                legend=dict(font=dict(color='white'))
-            )
-            st.plotly_chart(fig, use_container_width=True)
+                fig.update_layout(
+                    title=dict(text="🏷️ Concentración de Marca Dominante", font=dict(size=18, color='white')),
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color='white'),
+                    showlegend=True,
+                    legend=dict(font=dict(color='white'))
+                )
+                st.plotly_chart(fig, use_container_width=True)
 
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1138,9 +1504,8 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
             # Brand001 ratio por growth
-            if 'brand001_ratio' in all_data.columns:
-                brand_by_growth = all_data.groupby('high_growth')['brand001_ratio'].mean().reset_index()
-                brand_by_growth['Grupo'] = brand_by_growth['high_growth'].map({0: 'Standard', 1: 'High Growth'})
+            if 'brand001_ratio' in aggregates['medias_por_crecimiento']:
+                brand_by_growth = growth_means(aggregates, 'brand001_ratio')
 
                 fig = go.Figure()
                 fig.add_trace(go.Bar(
@@ -1171,9 +1536,8 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
             st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
             # Número de tiendas
-            if 'num_shops' in all_data.columns:
-                shops_by_growth = all_data.groupby('high_growth')['num_shops'].mean().reset_index()
-                shops_by_growth['Grupo'] = shops_by_growth['high_growth'].map({0: 'Standard', 1: 'High Growth'})
+            if 'num_shops' in aggregates['medias_por_crecimiento']:
+                shops_by_growth = growth_means(aggregates, 'num_shops')
 
                 fig = go.Figure()
                 fig.add_trace(go.Bar(
@@ -1222,6 +1586,64 @@ elif page == "💎 Análisis de Afinidades" and data_loaded:
 
             st.markdown('</div>', unsafe_allow_html=True)
 
+        # Concentración de órdenes en tiendas
+        if affinities is not None:
+            shops = affinities['tiendas']
+            shops_per_user = shops['items_por_usuario']
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Tiendas distintas", f"{shops['items_unicos']:,}")
+            with col2:
+                st.metric(f"Tiendas con el {shops['pct_concentracion']:.0f}% de las órdenes",
+                          f"{shops['items_concentracion']:,}")
+            with col3:
+                st.metric("Tiendas por usuario (High Growth)", f"{shops_per_user['1']:.1f}",
+                          delta=f"{shops_per_user['1'] - shops_per_user['0']:+.1f} vs Standard")
+
+    with tab4:
+        if affinities is not None:
+            col1, col2 = st.columns(2)
+            ka_types = frame_from_table(affinities['tipos_ka']['top'])
+
+            with col1:
+                st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+
+                # Órdenes por tipo de tienda (KA)
+                fig = create_modern_pie_chart(
+                    labels=ka_types['item'].tolist(),
+                    values=ka_types['ordenes'].tolist(),
+                    title="🏬 Órdenes por Tipo de Tienda"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.markdown('</div>', unsafe_allow_html=True)
+
+            with col2:
+                st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+
+                # Participación high growth en las órdenes de cada tipo
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=ka_types['item'],
+                    y=ka_types['pct_ordenes_high_growth'],
+                    marker_color='#ec4899',
+                    text=ka_types['pct_ordenes_high_growth'].round(1).astype(str) + '%',
+                    textposition='auto'
+                ))
+
+                fig.update_layout(
+                    title=dict(text="📈 % de Órdenes de Usuarios High Growth", font=dict(size=18, color='white')),
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color='rgba(255,255,255,0.8)'),
+                    xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+                    yaxis=dict(gridcolor='rgba(255,255,255,0.1)', title='% órdenes'),
+                    showlegend=False
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.markdown('</div>', unsafe_allow_html=True)
+
 # ============================================================================
 # FOOTER
 # ============================================================================
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Agregación offline de afinidades para el dashboard
+==================================================
+
+La página de Afinidades del dashboard mostraba porcentajes escritos a mano
+(categorías Groceries 35%, Restaurants 25%, ...; Brand001 40,6%). Este paso
+los calcula sobre las columnas diccionario del CSV crudo
+(`main_category_counts`, `ka_type_counts`, `shop_name_counts`,
+`brand_name_counts`) y guarda un artefacto JSON pequeño
+(`models/affinity_aggregates.json`) que el dashboard solo lee.
+
+El CSV se recorre por bloques (solo esas columnas y delta_orders); cada
+columna diccionario de un bloque se explota a la tabla larga (row, key,
+count) de `dict_parser` (kernels de texto de Arrow con `pyarrow.csv`, sin
+objetos de Python por registro) y `item_aggregates` reduce esa tabla con
+`np.bincount`:
+
+- órdenes y usuarios por item, en total y de usuarios high growth
+  (delta_orders > HIGH_GROWTH_THRESHOLD)
+- items distintos por usuario (histograma por grupo de crecimiento)
+
+Los totales por item de cada bloque se suman por nombre de item, así que la
+memoria depende del tamaño del bloque y del número de items, no del número
+de usuarios. Para cada columna se guardan el top `TOP_ITEMS` de items (con
+% de órdenes y % high growth), el resto agrupado, cuántos items concentran
+el 80% de las órdenes y los items por usuario; además, la participación de
+la marca líder (`feature_engine.LEADING_BRAND`) por grupo de crecimiento.
+
+Uso (desde la raíz del proyecto):
+    python scripts/affinity_aggregation.py
+    python scripts/affinity_aggregation.py --raw "dataset_protegido (1).csv" --output models/affinity_aggregates.json
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard_materialization import RAW_DATA_PATH, _table
+from dict_parser import parse_dict_array_flat, parse_dict_column_flat
+from feature_engine import LEADING_BRAND
+
+AFFINITY_PATH = 'models/affinity_aggregates.json'
+
+HIGH_GROWTH_THRESHOLD = 8
+
+# Columna diccionario → nombre de la sección en el artefacto
+AFFINITY_COLUMNS = {
+    'main_category_counts': 'categorias',
+    'ka_type_counts': 'tipos_ka',
+    'shop_name_counts': 'tiendas',
+    'brand_name_counts': 'marcas',
+}
+
+TOP_ITEMS = 20
+# Fracción de las órdenes para el indicador de concentración
+CONCENTRATION_SHARE = 0.80
+# Bytes de CSV por bloque (pyarrow.csv) y filas por bloque (pandas, sin pyarrow)
+BLOCK_BYTES = 64 << 20
+CHUNK_ROWS = 500_000
+
+ITEM_COLUMNS = ['ordenes', 'usuarios', 'ordenes_high_growth', 'usuarios_high_growth']
+
+
+# =============================================================================
+# NÚCLEO VECTORIZADO
+# =============================================================================
+
+def item_aggregates(long_df, high_growth=None):
+    """
+    Totales por item de una tabla larga (row, key, count).
+
+    Parameters:
+    -----------
+    long_df : pd.DataFrame
+        Tabla de `dict_parser` / `feature_engine.explode_dict_column`
+    high_growth : np.ndarray, optional
+        Etiqueta (0/1) de cada usuario, indexada por `row`
+
+    Returns:
+    --------
+    pd.DataFrame indexado por item con ordenes y usuarios (y, con
+    `high_growth`, ordenes_high_growth y usuarios_high_growth)
+    """
+    codes = long_df['key'].cat.codes.to_numpy()
+    counts = long_df['count'].to_numpy()
+    n_items = len(long_df['key'].cat.categories)
+
+    # Cada item aparece una sola vez por usuario: los registros son usuarios
+    totals = {
+        'ordenes': np.bincount(codes, weights=counts, minlength=n_items),
+        'usuarios': np.bincount(codes, minlength=n_items),
+    }
+    if high_growth is not None:
+        is_high = np.asarray(high_growth)[long_df['row'].to_numpy()] == 1
+        totals['ordenes_high_growth'] = np.bincount(codes, weights=counts * is_high, minlength=n_items)
+        totals['usuarios_high_growth'] = np.bincount(codes[is_high], minlength=n_items)
+    frame = pd.DataFrame(totals, index=pd.Index(long_df['key'].cat.categories, name='item'))
+    return frame.astype(np.int64)
+
+
+def items_per_user(long_df, n_rows):
+    """Items distintos de cada usuario (0 para usuarios sin registros)."""
+    return np.bincount(long_df['row'].to_numpy(), minlength=n_rows)
+
+
+def top_items(items, n=TOP_ITEMS):
+    """Los `n` items con más órdenes, de mayor a menor."""
+    return items.nlargest(n, 'ordenes')
+
+
+def items_for_share(items, share=CONCENTRATION_SHARE):
+    """Cuántos items (de mayor a menor) hacen falta para cubrir `share` de las órdenes."""
+    orders = np.sort(items['ordenes'].to_numpy())[::-1]
+    if orders.sum() == 0:
+        return 0
+    return int(np.searchsorted(np.cumsum(orders), share * orders.sum()) + 1)
+
+
+# =============================================================================
+# LECTURA POR BLOQUES
+# =============================================================================
+
+def iter_raw_blocks(raw_path, columns, block_bytes=BLOCK_BYTES, chunk_rows=CHUNK_ROWS):
+    """
+    Recorre el CSV crudo por bloques.
+
+    Yields:
+    -------
+    (delta_orders como np.ndarray, {columna diccionario: tabla larga})
+    """
+    if importlib.util.find_spec('pyarrow') is not None:
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+
+        # Los tipos se infieren del primer bloque: una columna diccionario
+        # vacía en todo ese bloque quedaría como null en vez de texto
+        reader = pcsv.open_csv(
+            raw_path,
+            read_options=pcsv.ReadOptions(block_size=block_bytes),
+            convert_options=pcsv.ConvertOptions(include_columns=['delta_orders'] + columns,
+                                                column_types={col: pa.string() for col in columns})
+        )
+        for batch in reader:
+            delta = batch.column('delta_orders').to_numpy(zero_copy_only=False)
+            yield delta, {col: parse_dict_array_flat(batch.column(col)) for col in columns}
+        return
+
+    for chunk in pd.read_csv(raw_path, usecols=['delta_orders'] + columns, chunksize=chunk_rows):
+        yield chunk['delta_orders'].to_numpy(), {col: parse_dict_column_flat(chunk[col]) for col in columns}
+
+
+# =============================================================================
+# AGREGACIÓN
+# =============================================================================
+
+def _column_summary(items, histograms, n_users):
+    """Sección del artefacto de una columna diccionario."""
+    total_orders = int(items['ordenes'].sum())
+    top = top_items(items)
+    table = top.reset_index()
+    table['pct_ordenes'] = table['ordenes'] / total_orders * 100 if total_orders else 0.0
+    table['pct_usuarios'] = table['usuarios'] / n_users * 100 if n_users else 0.0
+    # Participación de los usuarios high growth en las órdenes de cada item
+    table['pct_ordenes_high_growth'] = (table['ordenes_high_growth'] / table['ordenes'].where(table['ordenes'] > 0)
+                                        * 100).fillna(0.0)
+
+    users_by_count = histograms[0] + histograms[1]
+    distinct = np.arange(len(users_by_count))
+    means = {str(group): float((distinct * hist).sum() / hist.sum()) if hist.sum() else 0.0
+             for group, hist in histograms.items()}
+    means['todos'] = float((distinct * users_by_count).sum() / n_users) if n_users else 0.0
+
+    return {
+        'items_unicos': int((items['ordenes'] > 0).sum()),
+        'ordenes_totales': total_orders,
+        'top': _table(table),
+        'otros_ordenes': int(total_orders - top['ordenes'].sum()),
+        'pct_concentracion': CONCENTRATION_SHARE * 100,
+        'items_concentracion': items_for_share(items),
+        'items_por_usuario': means,
+        'usuarios_por_num_items': {str(k): int(v) for k, v in enumerate(users_by_count) if v},
+    }
+
+
+def aggregate_affinities(raw_path=RAW_DATA_PATH, threshold=HIGH_GROWTH_THRESHOLD, block_bytes=BLOCK_BYTES):
+    """
+    Calcula las afinidades del CSV crudo.
+
+    Parameters:
+    -----------
+    raw_path : str
+        CSV crudo con las columnas diccionario y delta_orders
+    threshold : int
+        high_growth = delta_orders > threshold
+    block_bytes : int
+        Bytes de CSV por bloque
+
+    Returns:
+    --------
+    dict serializable a JSON
+    """
+    columns = list(AFFINITY_COLUMNS)
+    items = {col: None for col in columns}
+    histograms = {col: {0: np.zeros(0, dtype=np.int64), 1: np.zeros(0, dtype=np.int64)} for col in columns}
+    growth_users = np.zeros(2, dtype=np.int64)
+
+    for delta, exploded in iter_raw_blocks(raw_path, columns, block_bytes):
+        high_growth = (delta > threshold).astype(np.int8)
+        growth_users += np.bincount(high_growth, minlength=2)
+        for col, long_df in exploded.items():
+            block_items = item_aggregates(long_df, high_growth)
+            items[col] = block_items if items[col] is None else items[col].add(block_items, fill_value=0)
+            per_user = items_per_user(long_df, len(delta))
+            for group in (0, 1):
+                hist = np.bincount(per_user[high_growth == group])
+                acc = histograms[col][group]
+                size = max(len(acc), len(hist))
+                histograms[col][group] = np.pad(acc, (0, size - len(acc))) + np.pad(hist, (0, size - len(hist)))
+
+    n_users = int(growth_users.sum())
+    result = {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'usuarios': n_users,
+        'high_growth_threshold': threshold,
+        'usuarios_por_crecimiento': {str(group): int(count) for group, count in enumerate(growth_users)},
+    }
+    for col, name in AFFINITY_COLUMNS.items():
+        column_items = items[col] if items[col] is not None else pd.DataFrame(columns=ITEM_COLUMNS)
+        result[name] = _column_summary(column_items.astype(np.int64), histograms[col], n_users)
+
+    # Marca líder: participación en las órdenes con marca, en total y por grupo de crecimiento
+    brands = items['brand_name_counts']
+    if brands is not None and LEADING_BRAND in brands.index:
+        leader = brands.loc[LEADING_BRAND]
+        high_orders = brands['ordenes_high_growth'].sum()
+        standard_orders = brands['ordenes'].sum() - high_orders
+        result['marca_lider'] = {
+            'marca': LEADING_BRAND,
+            'pct_ordenes': float(leader['ordenes'] / brands['ordenes'].sum() * 100),
+            'pct_ordenes_por_crecimiento': {
+                '0': float((leader['ordenes'] - leader['ordenes_high_growth']) / standard_orders * 100)
+                if standard_orders else 0.0,
+                '1': float(leader['ordenes_high_growth'] / high_orders * 100) if high_orders else 0.0,
+            },
+        }
+    return result
+
+
+def save_affinities(affinities, path=AFFINITY_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(affinities, f, ensure_ascii=False)
+
+
+def load_affinities(path=AFFINITY_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--raw', default=RAW_DATA_PATH, help='CSV crudo con las columnas diccionario')
+    parser.add_argument('--threshold', type=int, default=HIGH_GROWTH_THRESHOLD,
+                        help='high_growth = delta_orders > threshold')
+    parser.add_argument('--block-mb', type=int, default=BLOCK_BYTES >> 20, help='MB de CSV por bloque')
+    parser.add_argument('--output', default=AFFINITY_PATH, help='Artefacto JSON de salida')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("AGREGACIÓN DE AFINIDADES (CATEGORÍAS, TIPOS DE TIENDA, TIENDAS, MARCAS)")
+    print("="*80)
+    start = time.perf_counter()
+    affinities = aggregate_affinities(args.raw, args.threshold, args.block_mb << 20)
+    save_affinities(affinities, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"  ✓ {affinities['usuarios']:,} usuarios agregados en {elapsed:.1f} s "
+          f"({affinities['usuarios'] / elapsed:,.0f} usuarios/s)")
+    for name in AFFINITY_COLUMNS.values():
+        section = affinities[name]
+        print(f"  ✓ {name}: {section['items_unicos']:,} items, {section['ordenes_totales']:,} órdenes, "
+              f"{section['items_por_usuario']['todos']:.2f} por usuario")
+    if 'marca_lider' in affinities:
+        print(f"  ✓ {LEADING_BRAND}: {affinities['marca_lider']['pct_ordenes']:.1f}% de las órdenes con marca")
+    print(f"💾 Afinidades guardadas en {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
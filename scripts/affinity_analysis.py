@@ -9,18 +9,32 @@ Este script analiza las variables tipo diccionario que contienen:
 - shop_name_counts: Afinidades por tienda específica
 - brand_name_counts: Afinidades por marca
 
+Cada columna diccionario se explota una sola vez a la tabla larga
+(row, key, count) de `dict_parser` y queda guardada en el analizador; los
+totales por item, los items distintos por usuario, el top-N, los items
+dominantes y la concentración por usuario salen de esa tabla con
+`np.bincount` (núcleo compartido con `affinity_aggregation.py`), sin
+recorrer el DataFrame fila por fila.
+
 Autor: Proyecto Final - Ciencia de Datos Aplicada
 Fecha: 2025-10-19
 """
 
+import importlib.util
 import pandas as pd
 import numpy as np
 import json
-import ast
 from collections import Counter, defaultdict
 import warnings
 warnings.filterwarnings('ignore')
 
+from affinity_aggregation import item_aggregates, items_per_user
+from dict_parser import parse_dict_array_flat, parse_dict_column_flat
+from feature_engine import DICT_COLUMNS, row_dominant_key, row_max
+
+# Filas de los rankings de items más populares
+TOP_N = 20
+
 
 class AffinityAnalyzer:
     """Clase para análisis de afinidades de consumo"""
@@ -41,40 +55,94 @@ class AffinityAnalyzer:
         self.df = pd.read_csv(filepath)
         print(f"[OK] Dataset cargado: {self.df.shape[0]:,} filas x {self.df.shape[1]} columnas\n")
 
-        # Convertir las columnas de diccionarios de string a dict
+        # Tablas largas (row, key, count) y totales por item de cada columna diccionario
+        self.exploded = {}
+        self._item_totals = {}
         self._parse_dict_columns()
 
     def _parse_dict_columns(self):
-        """Convierte las columnas que son strings de diccionarios a diccionarios reales"""
-        dict_columns = ['main_category_counts', 'ka_type_counts', 'shop_name_counts', 'brand_name_counts']
-
+        """Explota una vez cada columna de diccionarios serializados a su tabla larga"""
         print("[INFO] Parseando columnas de diccionarios...")
-        for col in dict_columns:
+        for col in DICT_COLUMNS:
             if col in self.df.columns:
                 try:
-                    self.df[col] = self.df[col].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+                    self.exploded[col] = self._explode(self.df[col])
                     print(f"  ✓ {col} parseado correctamente")
                 except Exception as e:
                     print(f"  ✗ Error parseando {col}: {str(e)}")
 
         print("[OK] Parseo completado\n")
 
+    @staticmethod
+    def _explode(values):
+        """Tabla larga de una columna de texto: kernels de Arrow si pyarrow está instalado"""
+        if importlib.util.find_spec('pyarrow') is None:
+            return parse_dict_column_flat(values)
+        import pyarrow as pa
+
+        return parse_dict_array_flat(pa.array(values, from_pandas=True, type=pa.string()))
+
+    # =========================================================================
+    # NÚCLEO DE AGREGACIÓN (sobre las tablas largas)
+    # =========================================================================
+
+    def item_totals(self, col):
+        """
+        Órdenes y usuarios por item de una columna diccionario, de mayor a
+        menor número de órdenes (empates en orden de primera aparición,
+        como `Counter.most_common`).
+        """
+        if col not in self._item_totals:
+            totals = item_aggregates(self.exploded[col])
+            self._item_totals[col] = totals.sort_values('ordenes', ascending=False, kind='stable')
+        return self._item_totals[col]
+
+    def item_counter(self, col):
+        """Counter {item: órdenes} de una columna diccionario"""
+        return Counter(self.item_totals(col)['ordenes'].to_dict())
+
+    def items_per_user(self, col):
+        """Items distintos de cada usuario (= len(dict); 0 sin registros)"""
+        return pd.Series(items_per_user(self.exploded[col], len(self.df)), index=self.df.index)
+
+    def top_items(self, col, label, n=TOP_N):
+        """Top-n items con total de órdenes, porcentaje y porcentaje acumulado"""
+        totals = self.item_totals(col)
+        total_orders = totals['ordenes'].sum()
+        top = totals.head(n) if n is not None else totals
+        top = pd.DataFrame({label: top.index.astype(object), 'Total_Órdenes': top['ordenes'].to_numpy()})
+        top['Porcentaje'] = (top['Total_Órdenes'] / total_orders * 100).round(2)
+        top['Porcentaje_Acumulado'] = top['Porcentaje'].cumsum().round(2)
+        return top
+
+    def dominant_item(self, col):
+        """Item con más órdenes de cada usuario (el primero si hay empate; None sin registros)"""
+        long_df = self.exploded[col]
+        n_rows = len(self.df)
+        max_counts = row_max(long_df['row'].to_numpy(), long_df['count'].to_numpy(), n_rows)
+        dominant = row_dominant_key(long_df, max_counts, n_rows, missing=None)
+        return pd.Series(dominant, index=self.df.index)
+
+    def herfindahl(self, col):
+        """Índice de Herfindahl-Hirschman por usuario: suma de (conteo / total)² (0 sin órdenes)"""
+        long_df = self.exploded[col]
+        rows = long_df['row'].to_numpy()
+        counts = long_df['count'].to_numpy().astype(np.float64)
+        n_rows = len(self.df)
+        total = np.bincount(rows, weights=counts, minlength=n_rows)
+        squares = np.bincount(rows, weights=counts ** 2, minlength=n_rows)
+        index = np.divide(squares, total ** 2, out=np.zeros(n_rows, dtype=np.float64), where=total != 0)
+        return pd.Series(index, index=self.df.index)
+
     def analyze_category_affinity(self):
         """Análisis de afinidad por categoría principal"""
         print("\n" + "="*80)
         print("1. ANÁLISIS DE AFINIDAD POR CATEGORÍA PRINCIPAL")
         print("="*80)
 
-        # Extraer todas las categorías
-        all_categories = Counter()
-        total_category_orders = 0
-
-        for idx, row in self.df.iterrows():
-            categories = row['main_category_counts']
-            if isinstance(categories, dict):
-                for cat, count in categories.items():
-                    all_categories[cat] += count
-                    total_category_orders += count
+        # Totales por categoría
+        all_categories = self.item_counter('main_category_counts')
+        total_category_orders = int(self.item_totals('main_category_counts')['ordenes'].sum())
 
         print(f"\n📊 Resumen General:")
         print(f"   Total de categorías únicas: {len(all_categories)}")
@@ -82,14 +150,12 @@ class AffinityAnalyzer:
 
         # Top 20 categorías más populares
         print(f"\n🔝 Top 20 Categorías Más Populares:")
-        top_categories = pd.DataFrame(all_categories.most_common(20), columns=['Categoría', 'Total_Órdenes'])
-        top_categories['Porcentaje'] = (top_categories['Total_Órdenes'] / total_category_orders * 100).round(2)
-        top_categories['Porcentaje_Acumulado'] = top_categories['Porcentaje'].cumsum().round(2)
+        top_categories = self.top_items('main_category_counts', 'Categoría')
         print(top_categories.to_string(index=False))
 
         # Análisis de diversidad de categorías por usuario
         print(f"\n📈 Diversidad de Categorías por Usuario:")
-        category_diversity = self.df['main_category_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
+        category_diversity = self.items_per_user('main_category_counts')
         print(f"   Promedio de categorías por usuario: {category_diversity.mean():.2f}")
         print(f"   Mediana de categorías por usuario: {category_diversity.median():.0f}")
         print(f"   Rango: [{category_diversity.min()}, {category_diversity.max()}]")
@@ -117,16 +183,9 @@ class AffinityAnalyzer:
         print("2. ANÁLISIS DE AFINIDAD POR TIPO DE TIENDA (KA TYPE)")
         print("="*80)
 
-        # Extraer todos los tipos de KA
-        all_ka_types = Counter()
-        total_ka_orders = 0
-
-        for idx, row in self.df.iterrows():
-            ka_types = row['ka_type_counts']
-            if isinstance(ka_types, dict):
-                for ka, count in ka_types.items():
-                    all_ka_types[ka] += count
-                    total_ka_orders += count
+        # Totales por tipo de KA
+        all_ka_types = self.item_counter('ka_type_counts')
+        total_ka_orders = int(self.item_totals('ka_type_counts')['ordenes'].sum())
 
         print(f"\n📊 Resumen General:")
         print(f"   Total de tipos de KA únicos: {len(all_ka_types)}")
@@ -134,13 +193,12 @@ class AffinityAnalyzer:
 
         # Distribución de tipos de KA
         print(f"\n🏪 Distribución de Tipos de Tienda:")
-        ka_df = pd.DataFrame(all_ka_types.most_common(), columns=['Tipo_KA', 'Total_Órdenes'])
-        ka_df['Porcentaje'] = (ka_df['Total_Órdenes'] / total_ka_orders * 100).round(2)
+        ka_df = self.top_items('ka_type_counts', 'Tipo_KA', n=None).drop(columns='Porcentaje_Acumulado')
         print(ka_df.to_string(index=False))
 
         # Análisis de diversidad de KA types por usuario
         print(f"\n📈 Diversidad de Tipos de Tienda por Usuario:")
-        ka_diversity = self.df['ka_type_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
+        ka_diversity = self.items_per_user('ka_type_counts')
         print(f"   Promedio de tipos de KA por usuario: {ka_diversity.mean():.2f}")
         print(f"   Mediana de tipos de KA por usuario: {ka_diversity.median():.0f}")
 
@@ -162,16 +220,9 @@ class AffinityAnalyzer:
         print("3. ANÁLISIS DE AFINIDAD POR TIENDA ESPECÍFICA")
         print("="*80)
 
-        # Extraer todas las tiendas
-        all_shops = Counter()
-        total_shop_orders = 0
-
-        for idx, row in self.df.iterrows():
-            shops = row['shop_name_counts']
-            if isinstance(shops, dict):
-                for shop, count in shops.items():
-                    all_shops[shop] += count
-                    total_shop_orders += count
+        # Totales por tienda
+        all_shops = self.item_counter('shop_name_counts')
+        total_shop_orders = int(self.item_totals('shop_name_counts')['ordenes'].sum())
 
         print(f"\n📊 Resumen General:")
         print(f"   Total de tiendas únicas: {len(all_shops)}")
@@ -179,14 +230,12 @@ class AffinityAnalyzer:
 
         # Top 20 tiendas más populares
         print(f"\n🔝 Top 20 Tiendas Más Populares:")
-        top_shops = pd.DataFrame(all_shops.most_common(20), columns=['Tienda', 'Total_Órdenes'])
-        top_shops['Porcentaje'] = (top_shops['Total_Órdenes'] / total_shop_orders * 100).round(2)
-        top_shops['Porcentaje_Acumulado'] = top_shops['Porcentaje'].cumsum().round(2)
+        top_shops = self.top_items('shop_name_counts', 'Tienda')
         print(top_shops.to_string(index=False))
 
         # Análisis de lealtad a tiendas
         print(f"\n🎯 Análisis de Lealtad a Tiendas:")
-        shop_diversity = self.df['shop_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
+        shop_diversity = self.items_per_user('shop_name_counts')
         print(f"   Promedio de tiendas visitadas por usuario: {shop_diversity.mean():.2f}")
         print(f"   Mediana de tiendas visitadas por usuario: {shop_diversity.median():.0f}")
 
@@ -213,16 +262,9 @@ class AffinityAnalyzer:
         print("4. ANÁLISIS DE AFINIDAD POR MARCA")
         print("="*80)
 
-        # Extraer todas las marcas
-        all_brands = Counter()
-        total_brand_orders = 0
-
-        for idx, row in self.df.iterrows():
-            brands = row['brand_name_counts']
-            if isinstance(brands, dict):
-                for brand, count in brands.items():
-                    all_brands[brand] += count
-                    total_brand_orders += count
+        # Totales por marca
+        all_brands = self.item_counter('brand_name_counts')
+        total_brand_orders = int(self.item_totals('brand_name_counts')['ordenes'].sum())
 
         print(f"\n📊 Resumen General:")
         print(f"   Total de marcas únicas: {len(all_brands)}")
@@ -230,14 +272,12 @@ class AffinityAnalyzer:
 
         # Top 20 marcas más populares
         print(f"\n🔝 Top 20 Marcas Más Populares:")
-        top_brands = pd.DataFrame(all_brands.most_common(20), columns=['Marca', 'Total_Órdenes'])
-        top_brands['Porcentaje'] = (top_brands['Total_Órdenes'] / total_brand_orders * 100).round(2)
-        top_brands['Porcentaje_Acumulado'] = top_brands['Porcentaje'].cumsum().round(2)
+        top_brands = self.top_items('brand_name_counts', 'Marca')
         print(top_brands.to_string(index=False))
 
         # Análisis de lealtad a marcas
         print(f"\n🎯 Análisis de Lealtad a Marcas:")
-        brand_diversity = self.df['brand_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
+        brand_diversity = self.items_per_user('brand_name_counts')
         print(f"   Promedio de marcas compradas por usuario: {brand_diversity.mean():.2f}")
         print(f"   Mediana de marcas compradas por usuario: {brand_diversity.median():.0f}")
 
@@ -260,9 +300,7 @@ class AffinityAnalyzer:
 
         # Crear una categoría dominante para cada usuario
         print("\n📊 Categoría Dominante por Usuario:")
-        self.df['dominant_category'] = self.df['main_category_counts'].apply(
-            lambda x: max(x.items(), key=lambda i: i[1])[0] if isinstance(x, dict) and len(x) > 0 else None
-        )
+        self.df['dominant_category'] = self.dominant_item('main_category_counts')
 
         dominant_cat_dist = self.df['dominant_category'].value_counts().head(10)
         print("\n  Top 10 categorías dominantes:")
@@ -272,9 +310,7 @@ class AffinityAnalyzer:
 
         # Tipo de KA dominante
         print("\n\n🏪 Tipo de Tienda Dominante por Usuario:")
-        self.df['dominant_ka_type'] = self.df['ka_type_counts'].apply(
-            lambda x: max(x.items(), key=lambda i: i[1])[0] if isinstance(x, dict) and len(x) > 0 else None
-        )
+        self.df['dominant_ka_type'] = self.dominant_item('ka_type_counts')
 
         dominant_ka_dist = self.df['dominant_ka_type'].value_counts()
         print("\n  Distribución de tipos de tienda dominantes:")
@@ -286,16 +322,7 @@ class AffinityAnalyzer:
         print("\n\n🎯 Índice de Especialización vs. Diversificación:")
 
         # Calcular índice de concentración (Herfindahl) para categorías
-        def herfindahl_index(counts_dict):
-            """Calcula el índice de Herfindahl-Hirschman (concentración)"""
-            if not isinstance(counts_dict, dict) or len(counts_dict) == 0:
-                return 0
-            total = sum(counts_dict.values())
-            if total == 0:
-                return 0
-            return sum((count / total) ** 2 for count in counts_dict.values())
-
-        self.df['category_concentration'] = self.df['main_category_counts'].apply(herfindahl_index)
+        self.df['category_concentration'] = self.herfindahl('main_category_counts')
 
         print(f"   Concentración en categorías (índice Herfindahl):")
         print(f"     Promedio: {self.df['category_concentration'].mean():.3f}")
@@ -330,10 +357,10 @@ class AffinityAnalyzer:
         print("="*80)
 
         # Calcular métricas clave
-        category_diversity = self.df['main_category_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-        shop_diversity = self.df['shop_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-        brand_diversity = self.df['brand_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-        ka_diversity = self.df['ka_type_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
+        category_diversity = self.items_per_user('main_category_counts')
+        shop_diversity = self.items_per_user('shop_name_counts')
+        brand_diversity = self.items_per_user('brand_name_counts')
+        ka_diversity = self.items_per_user('ka_type_counts')
 
         print(f"""
 🎯 Diversidad Promedio por Usuario:
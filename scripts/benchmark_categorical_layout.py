@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: categóricas nativas de XGBoost vs one-hot
+====================================================
+
+Los splits procesados codifican `categoria_recencia`, `r_segment`,
+`city_token` y `dominant_category` como ~40 dummies int8. XGBoost (`hist`)
+puede usar las variables categóricas directamente (`enable_categorical=True`):
+una columna `category` por variable y splits por particiones de categorías.
+
+Para cada layout se entrena el mismo XGBoost (hiperparámetros del centro del
+grid de `train_models.py`, early stopping sobre validación) y se reporta:
+
+- ancho (columnas) y memoria de X_train
+- tiempo de entrenamiento, árboles y tiempo por árbol
+- tiempo de predicción sobre test
+- AUC-ROC en validación y test
+
+El layout categórico se obtiene de los splits procesados colapsando los
+bloques one-hot con los vocabularios de `feature_engineering_pipeline.pkl`
+(`user_features.onehot_to_categorical`), así ambos layouts ven exactamente
+los mismos usuarios. Si falta alguno de los tres splits o el pipeline es
+del formato antiguo (diccionario, sin vocabularios), se generan usuarios
+sintéticos y se transforman con `FeaturePipeline` en ambos layouts.
+
+Uso:
+    python scripts/benchmark_categorical_layout.py
+    python scripts/benchmark_categorical_layout.py --repeats 3 --output models/categorical_benchmark.json
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+
+from feature_pipeline import FeaturePipeline
+from model_search import EARLY_STOPPING_MAX_ESTIMATORS, EARLY_STOPPING_ROUNDS, XGB_GRID_CENTER
+from processed_io import NON_FEATURE_COLS, load_splits, splits_available
+from scoring import PIPELINE_PATH
+from synthetic_data import make_raw_users
+from user_features import onehot_to_categorical
+
+RANDOM_SEED = 42
+
+
+def load_layouts(data_dir, pipeline_path, synthetic_rows, seed=RANDOM_SEED):
+    """
+    Train/val/test en ambos layouts.
+
+    Returns:
+    --------
+    dict {layout: {split: X}} y dict {split: y}
+    """
+    pipeline = None
+    if splits_available(data_dir) and os.path.exists(pipeline_path):
+        with open(pipeline_path, 'rb') as f:
+            pipeline = pickle.load(f)
+    # Pipelines antiguos (diccionario) no tienen vocabularios
+    if isinstance(pipeline, FeaturePipeline):
+        splits = dict(zip(['train', 'val', 'test'], load_splits(data_dir)))
+        print(f"📂 Splits procesados desde {data_dir} (vocabularios de {pipeline_path})")
+        onehot = {name: df.drop(columns=[col for col in NON_FEATURE_COLS if col in df.columns])
+                  for name, df in splits.items()}
+        categorical = {name: onehot_to_categorical(X, pipeline.vocabularies, pipeline.categorical_features)
+                       for name, X in onehot.items()}
+        labels = {name: df['high_growth'].to_numpy() for name, df in splits.items()}
+        return {'onehot': onehot, 'categorical': categorical}, labels
+
+    print(f"🔧 Sin splits procesados completos o sin FeaturePipeline con vocabularios: generando {synthetic_rows:,} usuarios sintéticos...")
+    raw = make_raw_users(synthetic_rows, seed=seed)
+    pipeline = FeaturePipeline()
+    layouts = {'onehot': pipeline.fit_transform(raw)}
+    layouts['categorical'] = pipeline.transform(raw, layout='categorical')
+    y = pipeline.target(raw).to_numpy()
+    bounds = {'train': (0, int(len(raw) * 0.6)), 'val': (int(len(raw) * 0.6), int(len(raw) * 0.8)),
+              'test': (int(len(raw) * 0.8), len(raw))}
+    return ({layout: {name: X.iloc[a:b] for name, (a, b) in bounds.items()} for layout, X in layouts.items()},
+            {name: y[a:b] for name, (a, b) in bounds.items()})
+
+
+def run_layout(layout, X, y, repeats):
+    """
+    Entrena el XGBoost del benchmark en un layout (mejor tiempo de `repeats`).
+
+    Returns:
+    --------
+    dict con ancho, memoria, tiempos, árboles y AUC
+    """
+    scale_pos_weight = (y['train'] == 0).sum() / max((y['train'] == 1).sum(), 1)
+    best_time, model = np.inf, None
+    for _ in range(repeats):
+        model = xgb.XGBClassifier(
+            **XGB_GRID_CENTER, n_estimators=EARLY_STOPPING_MAX_ESTIMATORS, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            scale_pos_weight=scale_pos_weight, tree_method='hist', enable_categorical=(layout == 'categorical'),
+            eval_metric='auc', random_state=RANDOM_SEED, n_jobs=-1
+        )
+        start = time.perf_counter()
+        model.fit(X['train'], y['train'], eval_set=[(X['val'], y['val'])], verbose=False)
+        best_time = min(best_time, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    proba_test = model.predict_proba(X['test'])[:, 1]
+    predict_time = time.perf_counter() - start
+    n_trees = model.best_iteration + 1
+    return {
+        'columnas': X['train'].shape[1],
+        'memoria_train_mb': round(X['train'].memory_usage(deep=True).sum() / 1024**2, 2),
+        'entrenamiento_s': round(best_time, 2),
+        'arboles': n_trees,
+        # Tiempo por árbol con todas las rondas ajustadas (incluye las de paciencia)
+        'ms_por_arbol': round(best_time / (n_trees + EARLY_STOPPING_ROUNDS) * 1000, 2),
+        'prediccion_test_ms': round(predict_time * 1000, 1),
+        'auc_val': float(roc_auc_score(y['val'], model.predict_proba(X['val'])[:, 1])),
+        'auc_test': float(roc_auc_score(y['test'], proba_test)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/processed', help='Directorio de splits procesados')
+    parser.add_argument('--pipeline', default=PIPELINE_PATH, help='FeaturePipeline con los vocabularios')
+    parser.add_argument('--synthetic-rows', type=int, default=50_000,
+                        help='Usuarios sintéticos si no hay splits procesados')
+    parser.add_argument('--repeats', type=int, default=1, help='Entrenamientos por layout (mejor tiempo)')
+    parser.add_argument('--output', default=None, help='JSON opcional con los resultados')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK - CATEGÓRICAS NATIVAS vs ONE-HOT (XGBoost hist)")
+    print("="*80)
+    layouts, y = load_layouts(args.data, args.pipeline, args.synthetic_rows)
+    print(f"  ✓ Train: {len(y['train']):,} | Val: {len(y['val']):,} | Test: {len(y['test']):,}")
+
+    results = {}
+    for layout, X in layouts.items():
+        print(f"\n⏳ Layout {layout}...")
+        results[layout] = run_layout(layout, X, y, args.repeats)
+        print(f"  ✓ {results[layout]['arboles']} árboles en {results[layout]['entrenamiento_s']:.1f} s")
+
+    print(f"\n📊 RESULTADO:")
+    print(f"   {'Layout':<12} {'Columnas':>9} {'Memoria MB':>11} {'Entrena (s)':>12} {'Árboles':>8} "
+          f"{'ms/árbol':>9} {'Predice ms':>11} {'AUC val':>8} {'AUC test':>9}")
+    for layout, res in results.items():
+        print(f"   {layout:<12} {res['columnas']:>9} {res['memoria_train_mb']:>11.2f} {res['entrenamiento_s']:>12.2f} "
+              f"{res['arboles']:>8} {res['ms_por_arbol']:>9.2f} {res['prediccion_test_ms']:>11.1f} "
+              f"{res['auc_val']:>8.4f} {res['auc_test']:>9.4f}")
+    onehot, categorical = results['onehot'], results['categorical']
+    print(f"\n   Categórico vs one-hot: {onehot['columnas'] / categorical['columnas']:.1f}x menos columnas, "
+          f"{onehot['memoria_train_mb'] / categorical['memoria_train_mb']:.1f}x menos memoria, "
+          f"{onehot['ms_por_arbol'] / categorical['ms_por_arbol']:.2f}x más rápido por árbol, "
+          f"ΔAUC test {categorical['auc_test'] - onehot['auc_test']:+.4f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria del dashboard con N sesiones simuladas
+=========================================================
+
+Compara dos formas de servir train/val/test y su unión a N sesiones
+concurrentes del dashboard, cada modo en un proceso nuevo:
+
+- cache_data: lo que hacía el antiguo `load_data()` del dashboard con
+  `st.cache_data` (ya no existe; se conserva como referencia). La caché
+  guarda (train, val, test, all_data) serializados con pickle y cada
+  sesión recibe `pickle.loads` de esos bytes, es decir su propia copia
+  (all_data es además una cuarta copia, la concatenación).
+- store: `split_store.SplitStore` compartido (`st.cache_resource`). Cada
+  sesión toma vistas de los splits y de la unión sin copiar (lo que usa
+  hoy el cálculo de agregados del dashboard cuando falta el artefacto).
+
+En ambos modos cada sesión conserva sus DataFrames y calcula la media de
+high_growth sobre la unión (toca esa columna). Se reporta el RSS del
+proceso separado en memoria anónima (heap: copias privadas) y en páginas
+de archivo (el archivo Arrow mapeado, compartido con otros procesos y
+recuperable por el sistema operativo). Requiere Linux (/proc/self/status).
+
+Uso:
+    python scripts/benchmark_dashboard_memory.py
+    python scripts/benchmark_dashboard_memory.py --sessions 20 --output models/dashboard_memory_benchmark.json
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import pickle
+import time
+
+import pandas as pd
+
+from processed_io import PROCESSED_DIR, load_splits
+from split_store import SplitStore, build_store, store_is_current
+
+MODES = ['cache_data', 'store']
+
+
+def _rss_mb():
+    """RSS actual del proceso en MB: {'anon': heap y copias privadas, 'file': páginas de archivos mapeados}."""
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('RssAnon:', 'RssFile:')):
+                key, value = line.split()[:2]
+                fields[key[3:-1].lower()] = int(value) / 1024
+    return fields
+
+
+def run_sessions(mode, sessions, data_dir=PROCESSED_DIR):
+    """
+    Simula `sessions` sesiones del dashboard en el proceso actual.
+
+    Returns:
+    --------
+    dict con RSS antes de la primera sesión, por sesión y al final, y
+    tiempo medio de acceso por sesión
+    """
+    if mode == 'cache_data':
+        train_df, val_df, test_df = load_splits(data_dir)
+        all_data = pd.concat([train_df, val_df, test_df], ignore_index=True)
+        cached = pickle.dumps((train_df, val_df, test_df, all_data), protocol=pickle.HIGHEST_PROTOCOL)
+        del train_df, val_df, test_df, all_data
+
+        def session():
+            train_df, val_df, test_df, all_data = pickle.loads(cached)
+            all_data['high_growth'].mean()
+            return train_df, val_df, test_df, all_data
+    else:
+        store = SplitStore(data_dir)
+
+        def session():
+            views = store.split('train'), store.split('val'), store.split('test'), store.union()
+            views[3]['high_growth'].mean()
+            return views
+
+    gc.collect()
+    rss_base = _rss_mb()
+    held, times, rss_sessions = [], [], []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        held.append(session())
+        times.append(time.perf_counter() - start)
+        rss_sessions.append(round(_rss_mb()['anon'], 1))
+    rss_end = _rss_mb()
+
+    return {
+        'modo': mode,
+        'sesiones': sessions,
+        'usuarios': int(len(held[-1][3])) if held else 0,
+        'rss_anon_base_mb': round(rss_base['anon'], 1),
+        'rss_anon_final_mb': round(rss_end['anon'], 1),
+        'rss_archivo_final_mb': round(rss_end['file'], 1),
+        'mb_por_sesion': round((rss_end['anon'] - rss_base['anon']) / max(sessions, 1), 2),
+        'acceso_ms': round(sum(times) / max(len(times), 1) * 1000, 2),
+        'rss_anon_por_sesion_mb': rss_sessions,
+    }
+
+
+def _isolated_worker(mode, sessions, data_dir, queue):
+    queue.put(run_sessions(mode, sessions, data_dir))
+
+
+def run_isolated(mode, sessions, data_dir=PROCESSED_DIR):
+    """`run_sessions` en un proceso nuevo (spawn: no hereda la memoria del padre)."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_isolated_worker, args=(mode, sessions, data_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de splits procesados')
+    parser.add_argument('--sessions', type=int, default=10, help='Sesiones simuladas')
+    parser.add_argument('--output', default=None, help='JSON opcional con los resultados')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK - MEMORIA DEL DASHBOARD CON N SESIONES")
+    print("="*80)
+    if not store_is_current(args.data):
+        print("🔧 Construyendo el almacén Arrow...")
+        build_store(args.data)
+
+    results = {}
+    for mode in MODES:
+        print(f"\n⏳ Modo {mode} ({args.sessions} sesiones)...")
+        results[mode] = run_isolated(mode, args.sessions, args.data)
+        print(f"  ✓ {results[mode]['mb_por_sesion']:.1f} MB por sesión")
+
+    print(f"\n📊 RESULTADO ({results['store']['usuarios']:,} usuarios, {args.sessions} sesiones):")
+    print(f"   {'Modo':<12} {'Heap base MB':>13} {'Heap final MB':>14} {'Archivo MB':>11} "
+          f"{'MB/sesión':>10} {'Acceso ms':>10}")
+    for mode, res in results.items():
+        print(f"   {mode:<12} {res['rss_anon_base_mb']:>13.1f} {res['rss_anon_final_mb']:>14.1f} "
+              f"{res['rss_archivo_final_mb']:>11.1f} {res['mb_por_sesion']:>10.2f} {res['acceso_ms']:>10.2f}")
+    cache_data, store = results['cache_data'], results['store']
+    print(f"\n   Almacén vs cache_data: {cache_data['rss_anon_final_mb'] - store['rss_anon_final_mb']:,.0f} MB "
+          f"menos de heap con {args.sessions} sesiones")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
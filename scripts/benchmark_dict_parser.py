@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser de columnas diccionario vs ast.literal_eval
+================================================================
+
+Genera usuarios sintéticos con las cuatro columnas diccionario serializadas
+como texto y compara, columna por columna:
+
+1. `ast.literal_eval` celda a celda (camino original)
+2. `dict_parser.parse_dict_column` (diccionarios, lote JSON)
+3. `dict_parser.parse_dict_column_flat` (tabla larga, sin diccionarios)
+
+Para el motor de features lo relevante es llegar a la tabla larga
+(row, key, count): se reporta también `parse_dict_column` + explosión.
+
+Antes de reportar tiempos verifica que los tres caminos producen el mismo
+contenido.
+
+Uso:
+    python scripts/benchmark_dict_parser.py --rows 1000000
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import ast
+import time
+
+import numpy as np
+
+from dict_parser import parse_dict_column, parse_dict_column_flat
+from feature_engine import DICT_COLUMNS, explode_dict_column
+from synthetic_data import make_raw_users
+
+
+def timed(func, *args):
+    """Ejecuta `func` y retorna (resultado, segundos)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Usuarios sintéticos a generar')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK - PARSER DE COLUMNAS DICCIONARIO")
+    print("="*80)
+
+    print(f"\n🔧 Generando {args.rows:,} usuarios sintéticos...")
+    df = make_raw_users(args.rows, seed=args.seed)
+    # Celdas nulas para verificar que todos los caminos las tratan igual
+    df.loc[df.index[::997], DICT_COLUMNS] = np.nan
+
+    totals = {'literal_eval': 0.0, 'dict': 0.0, 'dict_explode': 0.0, 'flat': 0.0}
+    print(f"\n{'Columna':<24} {'literal_eval':>14} {'dict (JSON)':>14} {'dict+explode':>14} {'flat':>14}")
+    print("-"*84)
+    for col in DICT_COLUMNS:
+        values = df[col].tolist()
+        expected, literal_time = timed(lambda v: [ast.literal_eval(x) if isinstance(x, str) else x for x in v], values)
+        as_dicts, dict_time = timed(parse_dict_column, values)
+        _, explode_time = timed(explode_dict_column, as_dicts)
+        long_df, flat_time = timed(parse_dict_column_flat, values)
+
+        # Paridad de contenido
+        assert all(a == b or (a != a and b != b) for a, b in zip(expected, as_dicts)), f'{col}: dict difiere'
+        reference = explode_dict_column(expected)
+        assert reference['row'].equals(long_df['row']), f'{col}: row difiere'
+        assert reference['count'].equals(long_df['count']), f'{col}: count difiere'
+        assert (reference['key'].astype(object) == long_df['key'].astype(object)).all(), f'{col}: key difiere'
+
+        totals['literal_eval'] += literal_time
+        totals['dict'] += dict_time
+        totals['dict_explode'] += dict_time + explode_time
+        totals['flat'] += flat_time
+        print(f"{col:<24} {literal_time:>12.2f} s {dict_time:>12.2f} s "
+              f"{dict_time + explode_time:>12.2f} s {flat_time:>12.2f} s")
+        del expected, as_dicts, long_df, reference
+
+    print("-"*84)
+    print(f"{'TOTAL':<24} {totals['literal_eval']:>12.2f} s {totals['dict']:>12.2f} s "
+          f"{totals['dict_explode']:>12.2f} s {totals['flat']:>12.2f} s")
+
+    print(f"\n✅ Paridad verificada en las {len(DICT_COLUMNS)} columnas")
+    print(f"\n📊 SPEEDUP vs literal_eval:")
+    print(f"   - parse_dict_column (dict): {totals['literal_eval'] / totals['dict']:.1f}x")
+    print(f"   - parse_dict_column_flat (tabla larga): {totals['literal_eval'] / totals['flat']:.1f}x "
+          f"(vs dict+explode: {totals['dict_explode'] / totals['flat']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
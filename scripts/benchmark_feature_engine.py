@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Paridad y benchmark del motor vectorizado de features
+=====================================================
+
+Compara `feature_engine.compute_dict_features` contra las funciones fila a
+fila originales (shannon_entropy, get_dominant_item, get_dominant_ratio,
+get_brand001_ratio y los conteos `len(dict)`) sobre usuarios sintéticos:
+
+1. Verifica que ambos caminos producen exactamente los mismos features
+   (incluyendo casos borde: diccionarios vacíos, valores nulos, empates y
+   total_orders = 0).
+2. Reporta el tiempo de cada camino y el speedup.
+
+Uso:
+    python scripts/benchmark_feature_engine.py --rows 1000000
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import ast
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import (
+    DICT_COLUMNS, explode_dict_column, compute_dict_features,
+    shannon_entropy, get_dominant_item, get_dominant_ratio, get_brand001_ratio
+)
+from synthetic_data import make_raw_users
+
+NUMERIC_COLUMNS = ['_num_categories', '_num_shops', '_num_brands', 'category_diversity',
+                   'shop_diversity', 'dominant_category_ratio', 'brand001_ratio']
+LABEL_COLUMNS = ['dominant_category', 'dominant_ka_type']
+
+
+def rowwise_features(df):
+    """Features calculados con las funciones fila a fila (camino original)."""
+    return pd.DataFrame({
+        '_num_categories': df['main_category_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0),
+        '_num_shops': df['shop_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0),
+        '_num_brands': df['brand_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0),
+        'category_diversity': df['main_category_counts'].apply(shannon_entropy),
+        'shop_diversity': df['shop_name_counts'].apply(shannon_entropy),
+        'dominant_category_ratio': df['main_category_counts'].apply(get_dominant_ratio),
+        'brand001_ratio': df.apply(
+            lambda row: get_brand001_ratio(row['brand_name_counts'], row['total_orders']), axis=1
+        ),
+        'dominant_category': df['main_category_counts'].apply(get_dominant_item),
+        'dominant_ka_type': df['ka_type_counts'].apply(get_dominant_item),
+    })
+
+
+def vectorized_features(df):
+    """Features calculados con el motor vectorizado."""
+    exploded = {col: explode_dict_column(df[col]) for col in DICT_COLUMNS}
+    return compute_dict_features(exploded, df['total_orders'].to_numpy())
+
+
+def edge_cases():
+    """Usuarios con casos borde que ambos caminos deben tratar igual."""
+    return pd.DataFrame({
+        'total_orders': [0, 5, 4, 6, 3],
+        'main_category_counts': [{}, np.nan, {'a': 2, 'b': 2}, {'a': 0, 'b': 0}, {'z': 1, 'y': 3, 'x': 3}],
+        'ka_type_counts': [{}, {'k1': 1}, {'k2': 1, 'k1': 1}, np.nan, {'k3': 0}],
+        'shop_name_counts': [{'s1': 1}, {}, {'s1': 3, 's2': 1}, {'s1': 0}, np.nan],
+        'brand_name_counts': [{'brand001': 2}, {'brand001': 5}, np.nan, {'brand002': 1}, {'brand001': 1, 'b9': 2}],
+    })
+
+
+def check_parity(expected, actual, label):
+    """Verifica que los features vectorizados coinciden con los de referencia."""
+    for col in NUMERIC_COLUMNS:
+        np.testing.assert_allclose(actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                                   rtol=1e-12, atol=1e-12, err_msg=f'{label}: {col}')
+    for col in LABEL_COLUMNS:
+        mismatches = (actual[col].to_numpy() != expected[col].to_numpy()).sum()
+        assert mismatches == 0, f'{label}: {col} difiere en {mismatches} usuarios'
+    print(f"  ✓ Paridad verificada ({label}): {len(expected):,} usuarios")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000, help='Usuarios sintéticos a generar')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK - MOTOR VECTORIZADO DE FEATURES")
+    print("="*80)
+
+    print("\n🔍 Verificando casos borde...")
+    edge = edge_cases()
+    check_parity(rowwise_features(edge), vectorized_features(edge), 'casos borde')
+
+    print(f"\n🔧 Generando {args.rows:,} usuarios sintéticos...")
+    df = make_raw_users(args.rows, seed=args.seed)
+    for col in DICT_COLUMNS:
+        df[col] = df[col].apply(ast.literal_eval)
+
+    print("\n⏳ Camino fila a fila (.apply)...")
+    start = time.perf_counter()
+    expected = rowwise_features(df)
+    rowwise_time = time.perf_counter() - start
+    print(f"  ✓ {rowwise_time:.2f} s")
+
+    print("\n⏳ Motor vectorizado (tabla larga + reducciones NumPy)...")
+    start = time.perf_counter()
+    exploded = {col: explode_dict_column(df[col]) for col in DICT_COLUMNS}
+    explode_time = time.perf_counter() - start
+    actual = compute_dict_features(exploded, df['total_orders'].to_numpy())
+    vectorized_time = time.perf_counter() - start
+    print(f"  ✓ {vectorized_time:.2f} s (explosión: {explode_time:.2f} s, "
+          f"reducciones: {vectorized_time - explode_time:.2f} s)")
+
+    print("\n🔍 Verificando paridad...")
+    check_parity(expected, actual, 'sintético')
+
+    print(f"\n📊 RESULTADO:")
+    print(f"   - Fila a fila: {rowwise_time:.2f} s ({args.rows / rowwise_time:,.0f} usuarios/s)")
+    print(f"   - Vectorizado: {vectorized_time:.2f} s ({args.rows / vectorized_time:,.0f} usuarios/s)")
+    print(f"   - Speedup: {rowwise_time / vectorized_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Paridad y benchmark del evaluador compilado de árboles
+======================================================
+
+Entrena las dos ramas de `train_models.py` con hiperparámetros fijos
+representativos (XGBoost de 200 árboles y profundidad 8; RandomForest con
+`class_weight='balanced'`), las compila con `tree_compiler` y:
+
+1. Verifica que `CompiledTreeEnsemble.predict_proba` coincide con el
+   `predict_proba` nativo sobre el split de test (incluyendo filas con
+   valores faltantes).
+2. Reporta la latencia de 1 usuario (mediana) y de 10.000 usuarios
+   (mejor de varias repeticiones) de ambos caminos.
+
+Usa los splits de `data/processed` si están los tres; si no, genera usuarios
+sintéticos y los transforma con `FeaturePipeline`. Con `--model` se agrega
+al benchmark un modelo ya entrenado (p.ej. `models/best_classifier.pkl`).
+
+Uso:
+    python scripts/benchmark_tree_compiler.py
+    python scripts/benchmark_tree_compiler.py --model models/best_classifier.pkl
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import pickle
+import time
+import warnings
+
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import RandomForestClassifier
+
+from feature_pipeline import FeaturePipeline
+from processed_io import load_splits, splits_available
+from synthetic_data import make_raw_users
+from tree_compiler import CompiledTreeEnsemble
+
+RANDOM_SEED = 42
+TARGET_COLUMNS = ['high_growth', 'delta_orders', 'uid']
+
+
+def load_data(data_dir, synthetic_rows, seed=RANDOM_SEED):
+    """
+    Matrices de train/test en el layout del modelo.
+
+    Returns:
+    --------
+    tuple (X_train, y_train, X_test, feature_cols)
+    """
+    if splits_available(data_dir):
+        train_df, _, test_df = load_splits(data_dir)
+        feature_cols = [col for col in train_df.columns if col not in TARGET_COLUMNS]
+        print(f"📂 Splits procesados desde {data_dir}")
+        return (train_df[feature_cols].to_numpy(np.float32), train_df['high_growth'].to_numpy(),
+                test_df[feature_cols].to_numpy(np.float32), feature_cols)
+
+    print(f"🔧 {data_dir} no tiene train/val/test: generando {synthetic_rows:,} usuarios sintéticos...")
+    raw = make_raw_users(synthetic_rows, seed=seed)
+    pipeline = FeaturePipeline()
+    X = pipeline.fit_transform(raw).to_numpy(np.float32)
+    y = pipeline.target(raw).to_numpy()
+    n_train = int(len(X) * 0.8)
+    return X[:n_train], y[:n_train], X[n_train:], pipeline.feature_cols
+
+
+def train_models(X_train, y_train):
+    """Modelos representativos de cada rama de train_models.py."""
+    scale_pos_weight = (y_train == 0).sum() / max((y_train == 1).sum(), 1)
+    models = {
+        'XGBoost (200 árboles, prof. 8)': xgb.XGBClassifier(
+            n_estimators=200, max_depth=8, learning_rate=0.1, subsample=0.8,
+            colsample_bytree=0.8, scale_pos_weight=scale_pos_weight,
+            random_state=RANDOM_SEED, n_jobs=-1, eval_metric='auc'
+        ),
+        'Random Forest (200 árboles, prof. 15)': RandomForestClassifier(
+            n_estimators=200, max_depth=15, min_samples_split=10, min_samples_leaf=5,
+            max_features='sqrt', class_weight='balanced', random_state=RANDOM_SEED, n_jobs=-1
+        ),
+    }
+    for name, model in models.items():
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        print(f"  ✓ {name}: entrenado en {time.perf_counter() - start:.1f} s")
+    return models
+
+
+def check_parity(model, compiled, X, label):
+    """Verifica que el evaluador compilado reproduce predict_proba del modelo."""
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    # XGBoost calcula en float32: se admite 1 ulp por diferencias de expf
+    atol = 1e-6 if expected.dtype == np.float32 else 1e-12
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=atol, err_msg=label)
+    exact = (actual[:, 1] == expected[:, 1]).mean() * 100
+    print(f"  ✓ Paridad ({label}): {len(X):,} usuarios, "
+          f"máx. diferencia {np.abs(actual - expected).max():.1e}, {exact:.2f}% idénticos")
+
+
+def time_single_row(predict, X, repeats):
+    """Mediana (ms) de predecir un usuario por llamada."""
+    times = np.empty(repeats)
+    for i in range(repeats):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        predict(row)
+        times[i] = time.perf_counter() - start
+    return float(np.median(times)) * 1000
+
+
+def time_batch(predict, X, repeats):
+    """Mejor tiempo (ms) de predecir el lote completo."""
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark(name, model, X_test, batch_rows, single_repeats, batch_repeats):
+    """Paridad y latencias nativo vs compilado de un modelo."""
+    print(f"\n⏳ {name}")
+    start = time.perf_counter()
+    compiled = CompiledTreeEnsemble.from_model(model)
+    print(f"  ✓ Compilado en {(time.perf_counter() - start) * 1000:.0f} ms: {compiled}")
+
+    check_parity(model, compiled, X_test, 'test')
+    X_missing = X_test.copy()
+    X_missing[::7, 0] = np.nan
+    X_missing[::5, min(2, X_test.shape[1] - 1)] = np.nan
+    check_parity(model, compiled, X_missing, 'con faltantes')
+
+    X_batch = X_test[np.arange(batch_rows) % len(X_test)]
+    result = {}
+    for label, predict in (('nativo', model.predict_proba), ('compilado', compiled.predict_proba)):
+        result[label] = (time_single_row(predict, X_test, single_repeats),
+                         time_batch(predict, X_batch, batch_repeats))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/processed', help='Directorio de splits procesados')
+    parser.add_argument('--synthetic-rows', type=int, default=50_000,
+                        help='Usuarios sintéticos si no hay splits procesados')
+    parser.add_argument('--model', action='append', default=[],
+                        help='Pickle de train_models.py a incluir (repetible)')
+    parser.add_argument('--batch-rows', type=int, default=10_000)
+    parser.add_argument('--single-repeats', type=int, default=500)
+    parser.add_argument('--batch-repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK - EVALUADOR COMPILADO DE ÁRBOLES")
+    print("="*80)
+
+    X_train, y_train, X_test, feature_cols = load_data(args.data, args.synthetic_rows)
+    print(f"  ✓ Train: {X_train.shape[0]:,} | Test: {X_test.shape[0]:,} | Features: {len(feature_cols)}")
+
+    print("\n🔧 Entrenando modelos representativos...")
+    models = train_models(X_train, y_train)
+    for path in args.model:
+        with open(path, 'rb') as f:
+            model_data = pickle.load(f)
+        models[f"{model_data.get('model_name', 'modelo')} ({path})"] = model_data['model']
+
+    results = {}
+    with warnings.catch_warnings():
+        # Los modelos de --model se entrenaron con DataFrame; aquí se pasan matrices
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        for name, model in models.items():
+            results[name] = benchmark(name, model, X_test, args.batch_rows,
+                                      args.single_repeats, args.batch_repeats)
+
+    print(f"\n📊 RESULTADO (latencia en ms):")
+    print(f"   {'Modelo':<45} {'Camino':<10} {'1 usuario':>10} {f'{args.batch_rows:,} usuarios':>16}")
+    for name, result in results.items():
+        for label, (single, batch) in result.items():
+            print(f"   {name[:45]:<45} {label:<10} {single:>10.3f} {batch:>16.1f}")
+        native, compiled = result['nativo'], result['compilado']
+        print(f"   {'':<45} {'speedup':<10} {native[0] / compiled[0]:>9.1f}x "
+              f"{native[1] / compiled[1]:>15.1f}x")
+
+
+if __name__ == '__main__':
+    main()
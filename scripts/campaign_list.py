@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Lista de campaña: top-k usuarios por probabilidad de high growth
+================================================================
+
+El equipo de Engagement armaba a mano las listas de usuarios a contactar a
+partir de la página de Predicciones (un usuario a la vez). Este módulo
+arma la lista sobre la tabla de probabilidades de la versión actual del
+modelo (`score_table.load_score_table`, todos los usuarios scoreados):
+
+1. Candidatos: todos los usuarios o los de un segmento (`segment_filter`:
+   filtros por recencia, R segment, ciudad y categoría dominante sobre el
+   resumen por usuario, unidos a la tabla por uid) y, opcionalmente, solo
+   ciertos niveles de prioridad (`scoring.PRIORITY_TIERS`)
+2. Presupuesto k: los k candidatos con mayor probabilidad con
+   `ranking_metrics.top_k` (partición O(n) y orden solo de los k
+   seleccionados, nunca un orden completo de la tabla)
+3. Exportación CSV o Parquet por lotes de `EXPORT_CHUNK_ROWS` filas (rank,
+   uid, probabilidad, nivel, split), sin materializar la lista completa
+   como texto
+
+El dashboard muestra la lista paginada (`campaign_frame` sobre una página
+de posiciones) y descarga el archivo completo.
+
+Uso (desde la raíz del proyecto):
+    python scripts/campaign_list.py --k 5000 --output campaign.csv
+    python scripts/campaign_list.py --k 20000 --filter city_token=city001 --tier alta --output campaign.parquet
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+
+from processed_io import PROCESSED_DIR, load_user_summary
+from ranking_metrics import top_k
+from scoring import MODEL_PATH, PRIORITY_TIERS
+from score_table import SCORE_CACHE_DIR, load_score_table
+from segment_filter import FILTER_GROUPS, SegmentIndex
+
+# Columnas de la tabla de probabilidades que se exportan (además de rank y uid)
+CAMPAIGN_COLUMNS = ['probability', 'priority_tier', 'split']
+
+EXPORT_FORMATS = ['csv', 'parquet']
+EXPORT_CHUNK_ROWS = 100_000
+
+# Filas por página en el dashboard
+PAGE_ROWS = 50
+
+
+def score_positions(scores, uids):
+    """
+    Posición en la tabla de probabilidades de cada uid (-1 si no está
+    scoreado). Con los uids de `SegmentIndex` se calcula una vez y une
+    cualquier segmento con la tabla sin buscar uid por uid.
+    """
+    return scores.index.get_indexer(uids)
+
+
+def campaign_candidates(scores, segment_index=None, filters=None, tiers=None, positions_by_row=None):
+    """
+    Posiciones (en la tabla de probabilidades) de los usuarios elegibles.
+
+    Parameters:
+    -----------
+    scores : pd.DataFrame
+        Tabla de probabilidades indexada por uid
+    segment_index : SegmentIndex, optional
+        Índice de bitmaps del resumen por usuario (necesario si hay filtros)
+    filters : dict, optional
+        {grupo: categorías} (ver `SegmentIndex.mask`)
+    tiers : list, optional
+        Niveles de prioridad permitidos (vacío o None = todos)
+    positions_by_row : np.ndarray, optional
+        `score_positions(scores, segment_index.uids)` ya calculado
+
+    Returns:
+    --------
+    np.ndarray int64 con las posiciones, o None si todos son elegibles
+    """
+    candidates = None
+    if segment_index is not None and any(filters.values() if filters else []):
+        if positions_by_row is None:
+            positions_by_row = score_positions(scores, segment_index.uids)
+        candidates = positions_by_row[segment_index.rows(segment_index.mask(filters))]
+        candidates = candidates[candidates >= 0]
+    if tiers:
+        allowed = scores['priority_tier'].isin(tiers).to_numpy()
+        candidates = np.flatnonzero(allowed) if candidates is None else candidates[allowed[candidates]]
+    return None if candidates is None else candidates.astype(np.int64)
+
+
+def select_campaign(scores, k, candidates=None):
+    """
+    Los k candidatos con mayor probabilidad, en orden.
+
+    Returns:
+    --------
+    np.ndarray int64 con las posiciones en la tabla (rank 1 primero)
+    """
+    probabilities = scores['probability'].to_numpy()
+    if candidates is None:
+        return top_k(probabilities, k)
+    return candidates[top_k(probabilities[candidates], k)]
+
+
+def campaign_frame(scores, positions, start_rank=1):
+    """DataFrame de la lista (rank, uid y `CAMPAIGN_COLUMNS`) para unas posiciones."""
+    frame = scores.iloc[positions][CAMPAIGN_COLUMNS].reset_index()
+    frame.insert(0, 'rank', np.arange(start_rank, start_rank + len(positions)))
+    return frame
+
+
+def write_campaign(scores, positions, target, fmt='csv', chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Escribe la lista completa por lotes.
+
+    Parameters:
+    -----------
+    target : str o archivo binario
+        Ruta o buffer (p. ej. `io.BytesIO`) de salida
+    fmt : str
+        'csv' o 'parquet'
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt debe ser uno de {EXPORT_FORMATS}, no '{fmt}'")
+    chunks = (campaign_frame(scores, positions[start:start + chunk_rows], start + 1)
+              for start in range(0, max(len(positions), 1), chunk_rows))
+
+    if fmt == 'csv':
+        own_file = isinstance(target, str)
+        sink = open(target, 'wb') if own_file else target
+        try:
+            for i, chunk in enumerate(chunks):
+                sink.write(chunk.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+        finally:
+            if own_file:
+                sink.close()
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            # Nivel como texto: las categorías de cada lote podrían diferir
+            chunk['priority_tier'] = chunk['priority_tier'].astype(str)
+            chunk['split'] = chunk['split'].astype(str)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def campaign_bytes(scores, positions, fmt='csv'):
+    """Archivo de la lista en memoria (descarga del dashboard)."""
+    buffer = io.BytesIO()
+    write_campaign(scores, positions, buffer, fmt)
+    return buffer.getvalue()
+
+
+def campaign_summary(scores, positions):
+    """Usuarios, probabilidad media, high growth esperados y usuarios por nivel de la lista."""
+    probabilities = scores['probability'].to_numpy()[positions]
+    tiers = scores['priority_tier'].to_numpy()[positions]
+    return {
+        'usuarios': int(len(positions)),
+        'probabilidad_media': float(probabilities.mean()) if len(positions) else 0.0,
+        'high_growth_esperados': float(probabilities.sum(dtype=np.float64)),
+        'por_nivel': {name: int((tiers == name).sum()) for name, _ in PRIORITY_TIERS},
+    }
+
+
+def _parse_filters(values, parser):
+    """['grupo=categoría', ...] → {grupo: [categorías]}; errores de uso con `parser.error`."""
+    filters = {}
+    for value in values or []:
+        group, separator, category = value.partition('=')
+        if not separator or group not in FILTER_GROUPS:
+            parser.error(f"--filter '{value}': se espera GRUPO=CATEGORÍA con GRUPO en {FILTER_GROUPS}")
+        if group == 'high_growth':
+            if category not in ('0', '1'):
+                parser.error(f"--filter '{value}': high_growth debe ser 0 o 1")
+            category = int(category)
+        filters.setdefault(group, []).append(category)
+    return filters
+
+
+def _check_filter_categories(filters, segment_index, parser):
+    """Categorías inexistentes dejarían el segmento vacío sin avisar."""
+    for group, selected in filters.items():
+        known = segment_index.categories(group)
+        unknown = [category for category in selected if category not in known]
+        if unknown:
+            parser.error(f"--filter {group}: categorías desconocidas {unknown}; disponibles: {known}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--k', type=int, required=True, help='Presupuesto: usuarios en la lista')
+    parser.add_argument('--filter', action='append', metavar='GRUPO=CATEGORÍA',
+                        help='Filtro de segmento (repetible; OR dentro del grupo, AND entre grupos)')
+    parser.add_argument('--tier', action='append', choices=[name for name, _ in PRIORITY_TIERS],
+                        help='Nivel de prioridad permitido (repetible)')
+    parser.add_argument('--model', default=MODEL_PATH, help='Modelo de la tabla de probabilidades')
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de splits procesados')
+    parser.add_argument('--cache-dir', default=SCORE_CACHE_DIR, help='Directorio de tablas por versión')
+    parser.add_argument('--output', required=True, help='Archivo de salida (.csv o .parquet)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("LISTA DE CAMPAÑA - TOP-K POR PROBABILIDAD")
+    print("="*80)
+    scores = load_score_table(args.model, args.data, args.cache_dir)
+    print(f"  ✓ {len(scores):,} usuarios scoreados")
+
+    filters = _parse_filters(args.filter, parser)
+    segment_index = SegmentIndex(load_user_summary(args.data)) if filters else None
+    if filters:
+        _check_filter_categories(filters, segment_index, parser)
+
+    start = time.perf_counter()
+    candidates = campaign_candidates(scores, segment_index, filters, args.tier)
+    positions = select_campaign(scores, args.k, candidates)
+    elapsed = time.perf_counter() - start
+    eligible = len(scores) if candidates is None else len(candidates)
+    print(f"  ✓ {eligible:,} candidatos → top {len(positions):,} en {elapsed * 1000:.0f} ms")
+
+    summary = campaign_summary(scores, positions)
+    print(f"  ✓ Probabilidad media: {summary['probabilidad_media']:.3f} | "
+          f"High growth esperados: {summary['high_growth_esperados']:,.0f} | Niveles: {summary['por_nivel']}")
+
+    fmt = 'parquet' if args.output.endswith('.parquet') else 'csv'
+    write_campaign(scores, positions, args.output, fmt)
+    print(f"💾 Lista guardada en {args.output} ({os.path.getsize(args.output) / 1024**2:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Reparto de núcleos entre paralelismo de CV y de estimador
+=========================================================
+
+`GridSearchCV(n_jobs=-1)` lanza un proceso por núcleo y, dentro de cada
+uno, `RandomForestClassifier(n_jobs=-1)` / `XGBClassifier(n_jobs=-1)` vuelven
+a pedir todos los núcleos: en un nodo de 64 núcleos se crean ~64 × 64 hilos
+que compiten entre sí y el tiempo de entrenamiento deja de escalar.
+
+Este módulo reparte un presupuesto fijo de núcleos (`train_models.py
+--cores`) en dos niveles:
+
+- `plan_parallelism`: procesos de la búsqueda (fits de CV en paralelo) ×
+  hilos por estimador ≤ presupuesto, priorizando el nivel externo (los fits
+  de CV son independientes y escalan casi linealmente)
+- `limited_threads`: límite de hilos BLAS/OpenMP en el proceso principal
+  (threadpoolctl) y en los workers de joblib (variables de entorno que loky
+  hereda al crear los procesos)
+- `CpuMeter`: tiempo de CPU consumido durante un bloque, para reportar la
+  utilización efectiva (núcleos ocupados / presupuesto)
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+# Variables que leen OpenMP/BLAS al arrancar; los workers loky de joblib
+# respetan el valor del proceso padre si está definido
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+
+def available_cores():
+    """Núcleos utilizables por este proceso (respeta la afinidad de CPU/cgroups)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def plan_parallelism(cores, n_tasks):
+    """
+    Reparte `cores` entre tareas paralelas de la búsqueda e hilos por estimador.
+
+    Parameters:
+    -----------
+    cores : int
+        Presupuesto de núcleos
+    n_tasks : int
+        Fits independientes que la búsqueda puede ejecutar a la vez
+        (candidatos × folds; 1 si la búsqueda es secuencial)
+
+    Returns:
+    --------
+    dict con cores, cv_jobs (procesos de la búsqueda) y estimator_jobs
+    (hilos de cada estimador), con cv_jobs × estimator_jobs <= cores
+    """
+    cores = max(int(cores), 1)
+    cv_jobs = max(min(cores, int(n_tasks)), 1)
+    estimator_jobs = max(cores // cv_jobs, 1)
+    return {'cores': cores, 'cv_jobs': cv_jobs, 'estimator_jobs': estimator_jobs}
+
+
+@contextmanager
+def limited_threads(n_threads):
+    """
+    Limita a `n_threads` los pools BLAS/OpenMP del proceso principal y de
+    los workers que joblib cree dentro del bloque.
+
+    No se usa `joblib.parallel_config(backend=..., inner_max_num_threads=...)`:
+    fijar el backend obligaría también al RandomForest a construir árboles en
+    procesos en lugar de hilos.
+    """
+    previous = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(n_threads) for var in THREAD_ENV_VARS})
+    try:
+        with threadpool_limits(limits=n_threads):
+            yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _busy_cpu_seconds():
+    """
+    Segundos de CPU ocupados. En Linux se leen de /proc/stat (todo el nodo:
+    incluye los workers de joblib, que no son hijos esperados del proceso);
+    en otros sistemas, tiempo de CPU del proceso y sus hijos.
+    """
+    try:
+        with open('/proc/stat') as f:
+            fields = f.readline().split()[1:]
+        # user nice system idle iowait irq softirq steal ...
+        ticks = [int(v) for v in fields[:8]]
+        busy = sum(ticks) - ticks[3] - ticks[4]
+        return busy / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, AttributeError):
+        t = os.times()
+        return t.user + t.system + t.children_user + t.children_system
+
+
+class CpuMeter:
+    """
+    Mide tiempo de pared y CPU de un bloque `with`.
+
+    Parameters:
+    -----------
+    cores : int
+        Presupuesto de núcleos contra el que se calcula la utilización
+    """
+
+    def __init__(self, cores):
+        self.cores = cores
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = _busy_cpu_seconds()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_s = time.perf_counter() - self._wall
+        self.cpu_s = _busy_cpu_seconds() - self._cpu
+        return False
+
+    @property
+    def effective_cores(self):
+        """Núcleos ocupados en promedio durante el bloque."""
+        return self.cpu_s / self.wall_s if self.wall_s > 0 else 0.0
+
+    @property
+    def utilization(self):
+        """Fracción del presupuesto efectivamente usada."""
+        return self.effective_cores / self.cores if self.cores else 0.0
+
+    def summary(self):
+        return {
+            'wall_s': round(self.wall_s, 2),
+            'cpu_s': round(self.cpu_s, 2),
+            'effective_cores': round(self.effective_cores, 2),
+            'utilization': round(self.utilization, 3),
+        }
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Materialización offline de los agregados del dashboard
+======================================================
+
+Streamlit re-ejecuta `dashboard/app.py` completo en cada interacción, y las
+páginas recalculaban `value_counts`, medias por `high_growth`,
+`select_dtypes().mean()` e histogramas sobre todos los usuarios en cada
+rerun. Este paso calcula una sola vez (después de preparar datos y
+entrenar) todo lo que las páginas muestran y lo guarda en un artefacto JSON
+pequeño (`models/dashboard_aggregates.json`, decenas de KB sin importar el
+número de usuarios):
+
+- KPIs del dashboard principal (usuarios, % high growth, delta promedio,
+  % de usuarios activos) y la distribución de crecimiento
+- AUC-ROC y Precision@20% en test de cada modelo entrenado y el modelo
+  activo (de `classification_report.json`)
+- histograma pre-agrupado de delta_orders (bordes + conteos)
+- top 10 de `feature_importance.csv`
+- por cada opción del filtro de crecimiento del Explorador de Segmentos:
+  métricas del segmento, estadísticas de caja de category_diversity por
+  grupo, muestra fija para el scatter y primeras filas para la tabla
+  (respaldo cuando no hay resumen por usuario; con él, el Explorador filtra
+  con `segment_filter.SegmentIndex`)
+- medias por grupo de crecimiento de los features de diversidad
+  (category_diversity, brand001_ratio, num_shops) para Afinidades
+
+delta_orders y categoria_recencia salen del resumen liviano por usuario
+que escribe la preparación (`data/processed/user_summary.parquet`); el CSV
+crudo solo se lee (esas dos columnas) con artefactos anteriores a ese
+resumen. Las afinidades por categoría, marca y tienda tienen su propio
+artefacto (`affinity_aggregation.py`).
+
+El dashboard solo lee este archivo; si no existe, lo materializa en memoria
+una vez por proceso.
+
+Uso (desde la raíz del proyecto):
+    python scripts/dashboard_materialization.py
+    python scripts/dashboard_materialization.py --data data/processed --output models/dashboard_aggregates.json
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from processed_io import NON_FEATURE_COLS, PROCESSED_DIR, load_splits, load_user_summary
+
+AGGREGATES_PATH = 'models/dashboard_aggregates.json'
+RAW_DATA_PATH = 'dataset_protegido (1).csv'
+IMPORTANCE_PATH = 'models/feature_importance.csv'
+REPORT_PATH = 'models/classification_report.json'
+
+# Opciones del filtro "Tipo de Crecimiento" → valor de high_growth (None = todos)
+GROWTH_SEGMENTS = {'Todos': None, 'High Growth': 1, 'Standard Growth': 0}
+GROWTH_LABELS = {0: 'Standard', 1: 'High Growth'}
+
+HISTOGRAM_BINS = 30
+SCATTER_SAMPLE = 1000
+TABLE_ROWS = 100
+# Outliers de cada caja enviados al navegador (los más extremos de cada lado)
+MAX_BOX_OUTLIERS = 200
+RANDOM_SEED = 42
+
+# Features comparados entre grupos de crecimiento en Análisis de Afinidades
+DIVERSITY_FEATURES = ['category_diversity', 'brand001_ratio', 'num_shops']
+
+# Categorías de recencia que cuentan como usuario activo (≤7 días)
+ACTIVE_RECENCY_PREFIX = 'Activo'
+
+
+# =============================================================================
+# AGREGADOS
+# =============================================================================
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Histograma pre-agrupado: {'edges': n+1 bordes, 'counts': n conteos}."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def box_stats(values, max_outliers=MAX_BOX_OUTLIERS):
+    """
+    Estadísticas de un box plot (regla de 1.5 IQR, la de plotly) para
+    dibujarlo con `go.Box(q1=..., median=..., ...)` sin enviar los datos.
+
+    Returns:
+    --------
+    dict con q1, median, q3, lowerfence, upperfence y outliers (a lo sumo
+    `max_outliers`, los más extremos)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = np.sort(values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)])
+    if len(outliers) > max_outliers:
+        half = max_outliers // 2
+        outliers = np.concatenate([outliers[:half], outliers[-half:]])
+    return {
+        'q1': float(q1), 'median': float(median), 'q3': float(q3),
+        'lowerfence': float(inside.min()), 'upperfence': float(inside.max()),
+        'outliers': outliers.tolist(),
+    }
+
+
+def _table(df):
+    """DataFrame → {'columns', 'data'} serializable (ver `frame_from_table`)."""
+    return json.loads(df.to_json(orient='split', index=False, double_precision=4))
+
+
+def frame_from_table(table):
+    """Reconstruye el DataFrame guardado con `_table`."""
+    return pd.DataFrame(table['data'], columns=table['columns'])
+
+
+def group_means(df, columns):
+    """Media de cada columna presente por grupo de high_growth: {col: {'0': m, '1': m}}."""
+    columns = [col for col in columns if col in df.columns]
+    means = df.groupby('high_growth')[columns].mean()
+    return {col: {str(int(group)): float(value) for group, value in means[col].items()}
+            for col in columns}
+
+
+def segment_summary(all_data, growth_value, display_cols, seed=RANDOM_SEED):
+    """
+    Métricas, caja de category_diversity, muestra del scatter y tabla de un
+    segmento del filtro de crecimiento.
+    """
+    segment = all_data if growth_value is None else all_data[all_data['high_growth'] == growth_value]
+    summary = {
+        'usuarios': int(len(segment)),
+        'pct_total': float(len(segment) / len(all_data) * 100) if len(all_data) else 0.0,
+        'high_growth_pct': float(segment['high_growth'].mean() * 100) if len(segment) else 0.0,
+        'category_diversity_promedio': (float(segment['category_diversity'].mean())
+                                        if 'category_diversity' in segment.columns and len(segment) else 0.0),
+        'muestra_scatter': _table(segment[['high_growth'] + display_cols[:2]].sample(
+            min(SCATTER_SAMPLE, len(segment)), random_state=seed)),
+        'tabla': _table(segment[[col for col in ['uid', 'high_growth'] + display_cols[:5]
+                                 if col in segment.columns]].head(TABLE_ROWS)),
+    }
+    if 'category_diversity' in segment.columns:
+        summary['caja_category_diversity'] = {
+            GROWTH_LABELS[group]: box_stats(segment.loc[segment['high_growth'] == group, 'category_diversity'])
+            for group in (0, 1) if (segment['high_growth'] == group).any()
+        }
+    return summary
+
+
+def read_user_columns(columns, data_dir=PROCESSED_DIR, raw_path=RAW_DATA_PATH):
+    """Columnas de todos los usuarios: resumen por usuario o, si no existe, el CSV crudo proyectado."""
+    try:
+        return load_user_summary(data_dir, columns=columns)
+    except FileNotFoundError:
+        return pd.read_csv(raw_path, usecols=columns, dtype={'delta_orders': np.int32})
+
+
+def model_metrics(report_path=REPORT_PATH):
+    """
+    AUC-ROC y Precision@20% en test por modelo según `classification_report.json`.
+
+    Returns:
+    --------
+    {'activo': nombre, 'modelos': {nombre: {'auc_roc', 'precision_at_20'}}},
+    o None si no hay reporte
+    """
+    if not os.path.exists(report_path):
+        return None
+    with open(report_path) as f:
+        report = json.load(f)
+
+    keys = ['auc_roc', 'precision_at_20']
+    # train_models.py guarda {modelo: {'val', 'test', ...}}; otros entrenamientos solo el mejor modelo
+    models = {name: {key: float(results['test'][key]) for key in keys if key in results['test']}
+              for name, results in report.get('comparacion', {}).items()
+              if isinstance(results, dict) and isinstance(results.get('test'), dict)}
+    # Reportes anteriores usan model_name / metrics_test
+    best = report.get('mejor_modelo', report.get('model_name'))
+    best_test = report.get('metricas_test', report.get('metrics_test'))
+    if best and best not in models and isinstance(best_test, dict):
+        models[best] = {key: float(best_test[key]) for key in keys if key in best_test}
+    return {'activo': best, 'modelos': models}
+
+
+def materialize(data_dir=PROCESSED_DIR, raw_path=RAW_DATA_PATH, importance_path=IMPORTANCE_PATH,
+                report_path=REPORT_PATH, all_data=None):
+    """
+    Calcula todos los agregados del dashboard.
+
+    Parameters:
+    -----------
+    data_dir : str
+        Directorio de los splits procesados
+    raw_path : str
+        CSV crudo (solo delta_orders y categoria_recencia, si no hay resumen por usuario)
+    importance_path : str
+        `feature_importance.csv` de train_models.py
+    report_path : str
+        `classification_report.json` del entrenamiento
+    all_data : pd.DataFrame, optional
+        train + val + test ya disponibles (p. ej. `SplitStore.union()`, sin
+        copia); si es None se leen y concatenan los splits de `data_dir`
+
+    Returns:
+    --------
+    dict serializable a JSON
+    """
+    if all_data is None:
+        all_data = pd.concat(load_splits(data_dir), ignore_index=True)
+    users = read_user_columns(['delta_orders', 'categoria_recencia'], data_dir, raw_path)
+    delta_orders = users['delta_orders']
+    recency = users['categoria_recencia'].astype(str)
+    importance = pd.read_csv(importance_path)
+
+    numeric_cols = all_data.select_dtypes(include=[np.number]).columns
+    display_cols = [col for col in numeric_cols if col not in NON_FEATURE_COLS]
+    growth_counts = all_data['high_growth'].value_counts()
+
+    return {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'kpis': {
+            'total_usuarios': int(len(all_data)),
+            'high_growth_pct': float(all_data['high_growth'].mean() * 100),
+            'delta_promedio': float(delta_orders.mean()),
+            'activos_pct': float(recency.str.startswith(ACTIVE_RECENCY_PREFIX).mean() * 100),
+        },
+        'modelos': model_metrics(report_path),
+        'distribucion_crecimiento': {GROWTH_LABELS[group]: int(growth_counts.get(group, 0)) for group in (0, 1)},
+        'histograma_delta_orders': histogram(delta_orders),
+        'top_features': _table(importance.head(10)),
+        'columnas_segmento': display_cols[:5],
+        'segmentos': {name: segment_summary(all_data, value, display_cols)
+                      for name, value in GROWTH_SEGMENTS.items()},
+        'medias_por_crecimiento': group_means(all_data, DIVERSITY_FEATURES),
+    }
+
+
+def save_aggregates(aggregates, path=AGGREGATES_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(aggregates, f, ensure_ascii=False)
+
+
+def load_aggregates(path=AGGREGATES_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de splits procesados')
+    parser.add_argument('--raw', default=RAW_DATA_PATH,
+                        help='CSV crudo (delta_orders y categoria_recencia) si no hay resumen por usuario')
+    parser.add_argument('--importance', default=IMPORTANCE_PATH, help='feature_importance.csv')
+    parser.add_argument('--report', default=REPORT_PATH, help='classification_report.json')
+    parser.add_argument('--output', default=AGGREGATES_PATH, help='Artefacto JSON de salida')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("MATERIALIZACIÓN DE AGREGADOS DEL DASHBOARD")
+    print("="*80)
+    start = time.perf_counter()
+    aggregates = materialize(args.data, args.raw, args.importance, args.report)
+    save_aggregates(aggregates, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"  ✓ {aggregates['kpis']['total_usuarios']:,} usuarios agregados en {elapsed:.1f} s")
+    print(f"  ✓ Usuarios activos: {aggregates['kpis']['activos_pct']:.1f}%")
+    if aggregates['modelos']:
+        print(f"  ✓ Modelos: {', '.join(aggregates['modelos']['modelos'])} (activo: {aggregates['modelos']['activo']})")
+    print(f"  ✓ Segmentos: {', '.join(aggregates['segmentos'])}")
+    print(f"💾 Agregados guardados en {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Parser rápido para las columnas diccionario serializadas
+========================================================
+
+En el CSV crudo las columnas `main_category_counts`, `ka_type_counts`,
+`shop_name_counts` y `brand_name_counts` vienen como texto con el formato
+fijo de `str(dict)`:
+
+    "{'main_category007': 2, 'main_category021': 1}"
+
+Aplicar `ast.literal_eval` celda a celda construye millones de diccionarios
+pequeños y domina el tiempo de carga. Este módulo parsea la columna completa
+en un solo lote, normalizando el texto a JSON y delegando en el decodificador
+en C de `json`:
+
+- `parse_dict_column`: retorna diccionarios (reemplazo directo de literal_eval)
+- `parse_dict_column_flat`: retorna directamente la tabla larga
+  (row, key, count) que consume `feature_engine.compute_dict_features`,
+  sin crear ningún diccionario intermedio.
+- `parse_dict_array_flat`: la misma tabla larga desde una columna de texto
+  de Arrow (p. ej. leída con `pyarrow.csv`), con los kernels de texto de
+  Arrow: no se crea ningún objeto de Python por celda ni por registro.
+
+Si alguna celda no respeta el formato fijo, se recurre automáticamente a
+`ast.literal_eval` para esa columna, de modo que el resultado siempre es
+equivalente.
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import ast
+import json
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import explode_dict_column
+
+# Separador entre item y conteo en el formato de str(dict): 'item': conteo
+_ENTRY_SEPARATOR = "':"
+# str(dict) usa comillas dobles para los items que contienen un apóstrofe
+# ("o'brien": 1); esos registros no terminan en _ENTRY_SEPARATOR y no se
+# contarían, así que cualquier comilla doble manda la columna a literal_eval
+_DOUBLE_QUOTE = '"'
+
+
+def _needs_literal_eval(cell):
+    """
+    True si la celda no respeta el formato fijo que asume el camino JSON:
+    items entre comillas dobles o llaves dentro de los items (el camino
+    rápido elimina todas las llaves del texto).
+    """
+    if isinstance(cell, dict):
+        return True
+    if not isinstance(cell, str):
+        return False
+    return _DOUBLE_QUOTE in cell or cell.count('{') > 1 or cell.count('}') > 1
+
+
+def _literal_eval_column(values):
+    """Camino lento y tolerante: literal_eval celda a celda."""
+    return [ast.literal_eval(x) if isinstance(x, str) else x for x in values]
+
+
+def parse_dict_column(values):
+    """
+    Parsea una columna de diccionarios serializados en un solo lote.
+
+    Parameters:
+    -----------
+    values : iterable
+        Celdas de la columna; las que no son texto se conservan tal cual
+        (igual que `x if not isinstance(x, str)` en el camino original).
+
+    Returns:
+    --------
+    list con un diccionario por celda de texto.
+    """
+    values = list(values)
+    is_text = [isinstance(x, str) for x in values]
+    cells = [x for x, text in zip(values, is_text) if text]
+
+    try:
+        # Un único arreglo JSON con todos los diccionarios de la columna
+        parsed = json.loads('[' + ','.join(cells).replace("'", '"') + ']')
+    except ValueError:
+        return _literal_eval_column(values)
+    if len(parsed) != len(cells) or not all(isinstance(d, dict) for d in parsed):
+        return _literal_eval_column(values)
+
+    parsed_iter = iter(parsed)
+    return [next(parsed_iter) if text else x for x, text in zip(values, is_text)]
+
+
+def parse_dict_column_flat(values):
+    """
+    Parsea una columna de diccionarios serializados directo a tabla larga.
+
+    Cada celda "{'a': 1, 'b': 2}" aporta los registros (row, 'a', 1) y
+    (row, 'b', 2). El texto de toda la columna se convierte en UN solo
+    arreglo JSON plano ["a", 1, "b", 2, ...], por lo que no se crean
+    diccionarios ni listas por usuario.
+
+    Parameters:
+    -----------
+    values : iterable
+        Celdas de la columna. Los diccionarios ya parseados (p. ej. filas
+        recibidas como JSON) se explotan tal cual; el resto de celdas que
+        no son texto (p. ej. NaN) se tratan como diccionarios vacíos.
+
+    Returns:
+    --------
+    pd.DataFrame con columnas row, key (categórica) y count (int64), con el
+    mismo formato que `feature_engine.explode_dict_column`.
+    """
+    values = list(values)
+    if any(_needs_literal_eval(x) for x in values):
+        return explode_dict_column(_literal_eval_column(values))
+
+    lengths = np.fromiter((x.count(_ENTRY_SEPARATOR) if isinstance(x, str) else 0 for x in values),
+                          dtype=np.int64, count=len(values))
+    n_entries = int(lengths.sum())
+
+    text = ','.join(x for x, n in zip(values, lengths) if n > 0)
+    text = text.replace('{', '').replace('}', '').replace(_ENTRY_SEPARATOR, "',").replace("'", '"')
+    try:
+        flat = json.loads('[' + text + ']')
+        if len(flat) != 2 * n_entries:
+            raise ValueError('número de registros inconsistente con el formato fijo')
+        keys = np.array(flat[0::2], dtype=object)
+        counts = np.array(flat[1::2], dtype=np.int64)
+    except (ValueError, TypeError):
+        return explode_dict_column(_literal_eval_column(values))
+
+    codes, uniques = pd.factorize(keys)
+
+    return pd.DataFrame({
+        'row': np.repeat(np.arange(len(values), dtype=np.int64), lengths),
+        'key': pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object)),
+        'count': counts,
+    })
+
+
+def parse_dict_array_flat(array):
+    """
+    Parsea una columna de texto de Arrow directo a tabla larga.
+
+    El texto de cada celda se recorta ('{', '}'), se divide en registros
+    por ', ' y cada registro en item y conteo por "': " con los kernels de
+    texto de Arrow (C++). Si el número de registros no coincide con el
+    formato fijo (p. ej. un item que contiene ', ' o un apóstrofe) o algún
+    conteo no es un entero, se recurre a `parse_dict_column_flat` para esa columna.
+
+    Parameters:
+    -----------
+    array : pa.Array o pa.ChunkedArray de texto
+        Celdas de la columna (los nulos se tratan como diccionarios vacíos)
+
+    Returns:
+    --------
+    pd.DataFrame con columnas row, key (categórica) y count (int64), con el
+    mismo formato que `parse_dict_column_flat`.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if pa.types.is_null(array.type):
+        array = array.cast(pa.string())
+    entries = pc.split_pattern(pc.utf8_trim(array, '{}'), ', ')
+    rows = pc.list_parent_indices(entries)
+    flat = pc.list_flatten(entries)
+    # '{}' deja un registro vacío
+    non_empty = pc.not_equal(flat, '')
+    rows, flat = pc.filter(rows, non_empty), pc.filter(flat, non_empty)
+
+    try:
+        if pc.any(pc.match_substring(array, _DOUBLE_QUOTE)).as_py():
+            raise ValueError('items entre comillas dobles')
+        if (pc.sum(pc.count_substring(array, _ENTRY_SEPARATOR)).as_py() or 0) != len(flat):
+            raise ValueError('número de registros inconsistente con el formato fijo')
+        parts = pc.split_pattern(flat, _ENTRY_SEPARATOR + ' ', max_splits=1)
+        keys = pc.utf8_ltrim(pc.list_element(parts, 0), "'")
+        counts = pc.cast(pc.list_element(parts, 1), pa.int64())
+    except (ValueError, pa.ArrowInvalid):
+        return parse_dict_column_flat(array.to_pylist())
+
+    encoded = keys.dictionary_encode()
+    return pd.DataFrame({
+        'row': rows.to_numpy().astype(np.int64),
+        'key': pd.Categorical.from_codes(encoded.indices.to_numpy().astype(np.int64),
+                                         categories=pd.Index(encoded.dictionary.to_pylist(), dtype=object)),
+        'count': counts.to_numpy(),
+    })
@@ -0,0 +1,209 @@
+"""
+FeaturePipeline: transformación reutilizable de usuarios crudos
+================================================================
+
+`feature_engineering_pipeline.pkl` guardaba solo un StandardScaler y listas
+de columnas: no permitía transformar un usuario nuevo al layout de
+`feature_cols` sin re-ejecutar todo el script de preparación.
+
+`FeaturePipeline` encapsula todo el camino crudo → features del modelo:
+
+- parseo de las columnas diccionario y features derivados
+  (`user_features.derive_user_features`)
+- fecha de referencia para la antigüedad (aprendida en `fit`)
+- vocabularios one-hot fijos (orden de columnas estable; categorías no
+  vistas en `fit` quedan con todas sus dummies en 0, en lugar de crear
+  columnas nuevas como `pd.get_dummies`)
+- StandardScaler de los features numéricos
+
+Dos layouts de salida (`LAYOUTS`): 'onehot' (dummies int8, el de los
+splits procesados) y 'categorical' (una columna `category` por variable,
+para XGBoost con `enable_categorical=True`).
+
+Transforma lotes completos de forma vectorizada. Uso:
+
+    pipeline = FeaturePipeline().fit(raw_df)
+    X = pipeline.transform(raw_new_users)       # columnas == pipeline.feature_cols
+    X_cat = pipeline.transform(raw_new_users, layout='categorical')
+
+    with open('models/feature_engineering_pipeline.pkl', 'rb') as f:
+        pipeline = pickle.load(f)              # requiere scripts/ en sys.path
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from user_features import (BINARY_FEATURES, CATEGORICAL_FEATURES, NUMERIC_FEATURES, categorical_frame,
+                           derive_user_features, dummy_columns, one_hot_matrix)
+
+LAYOUTS = ['onehot', 'categorical']
+
+
+class FeaturePipeline:
+    """
+    Pipeline de features ajustable (fit) y aplicable a lotes nuevos (transform).
+
+    Parameters:
+    -----------
+    high_growth_threshold : int
+        high_growth = 1 si delta_orders > este umbral (ver `target`)
+    multi_category_threshold : int
+        is_multi_category = 1 si el usuario usa >= este número de categorías
+    multi_shop_threshold : int
+        is_multi_shop = 1 si el usuario usa >= este número de tiendas
+    """
+
+    def __init__(self, high_growth_threshold=8, multi_category_threshold=3, multi_shop_threshold=5):
+        self.high_growth_threshold = high_growth_threshold
+        self.multi_category_threshold = multi_category_threshold
+        self.multi_shop_threshold = multi_shop_threshold
+
+        self.numeric_features = list(NUMERIC_FEATURES)
+        self.binary_features = list(BINARY_FEATURES)
+        self.categorical_features = list(CATEGORICAL_FEATURES)
+
+        # Estado aprendido en fit / partial_fit
+        self.reference_date = None
+        self.vocabularies = {col: [] for col in self.categorical_features}
+        self.scaler = StandardScaler()
+
+    def __repr__(self):
+        status = f'{len(self.feature_cols)} features' if self.is_fitted else 'sin ajustar'
+        return f'FeaturePipeline({status})'
+
+    # ------------------------------------------------------------------
+    # Propiedades
+    # ------------------------------------------------------------------
+
+    @property
+    def all_features(self):
+        """Features pre-encoding (numéricos + binarios + categóricos)."""
+        return self.numeric_features + self.binary_features + self.categorical_features
+
+    @property
+    def encoded_cols(self):
+        """Columnas one-hot, en orden estable."""
+        return dummy_columns(self.vocabularies, self.categorical_features)
+
+    @property
+    def feature_cols(self):
+        """Columnas de entrada del modelo, en el orden de los splits procesados."""
+        return self.numeric_features + self.binary_features + self.encoded_cols
+
+    def layout_cols(self, layout='onehot'):
+        """Columnas de entrada del modelo en el layout indicado."""
+        if layout == 'categorical':
+            return self.numeric_features + self.binary_features + self.categorical_features
+        return self.feature_cols
+
+    @property
+    def is_fitted(self):
+        return self.reference_date is not None and hasattr(self.scaler, 'mean_')
+
+    # ------------------------------------------------------------------
+    # Pasos
+    # ------------------------------------------------------------------
+
+    def derive(self, raw_df):
+        """
+        Calcula los features pre-encoding de un lote de usuarios crudos.
+
+        Parameters:
+        -----------
+        raw_df : pd.DataFrame
+            Filas con el esquema del CSV crudo (columnas diccionario como
+            texto `str(dict)` o como diccionarios)
+
+        Returns:
+        --------
+        pd.DataFrame con `all_features` (mismo índice que `raw_df`)
+        """
+        if self.reference_date is None:
+            raise ValueError("FeaturePipeline sin fecha de referencia: ejecutar fit() primero")
+        derived = derive_user_features(raw_df, self.reference_date,
+                                       self.multi_category_threshold, self.multi_shop_threshold)
+        passthrough = [col for col in self.all_features if col not in derived.columns]
+        return pd.concat([raw_df[passthrough], derived], axis=1)[self.all_features]
+
+    def target(self, raw_df):
+        """Variable objetivo high_growth (delta_orders > high_growth_threshold)."""
+        return (raw_df['delta_orders'] > self.high_growth_threshold).astype(int)
+
+    def fit(self, raw_df):
+        """
+        Ajusta fecha de referencia, vocabularios y scaler sobre un dataset crudo.
+
+        Returns:
+        --------
+        self
+        """
+        self.reference_date = pd.to_datetime(raw_df['first_order_date']).max()
+        return self.fit_features(self.derive(raw_df))
+
+    def fit_features(self, features):
+        """Ajusta vocabularios y scaler desde features ya derivados (`derive`)."""
+        self.vocabularies = {col: [] for col in self.categorical_features}
+        self.scaler = StandardScaler()
+        return self.partial_fit_features(features)
+
+    def partial_fit_features(self, features):
+        """
+        Actualiza vocabularios y estadísticas del scaler con un lote de
+        features derivados (modo streaming). `reference_date` debe fijarse
+        antes con el máximo global de first_order_date.
+
+        Returns:
+        --------
+        self
+        """
+        for col in self.categorical_features:
+            seen = set(self.vocabularies[col])
+            seen.update(features[col].dropna().unique())
+            self.vocabularies[col] = sorted(seen)
+        self.scaler.partial_fit(features[self.numeric_features])
+        return self
+
+    def encode(self, features, layout='onehot'):
+        """
+        Lleva features derivados al layout del modelo: numéricos escalados,
+        binarios y dummies con vocabulario fijo ('onehot') o una columna
+        categórica por variable ('categorical').
+
+        Returns:
+        --------
+        pd.DataFrame con columnas `layout_cols(layout)` (mismo índice que `features`)
+        """
+        if not self.is_fitted:
+            raise ValueError("FeaturePipeline sin ajustar: ejecutar fit() primero")
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout debe ser uno de {LAYOUTS}, no '{layout}'")
+        # Mismas operaciones que StandardScaler.transform, sin su validación por llamada
+        numeric = features[self.numeric_features].to_numpy(dtype=np.float64)
+        numeric = (numeric - self.scaler.mean_) / self.scaler.scale_
+        binary = features[self.binary_features].to_numpy(dtype=np.int8)
+
+        # Un solo DataFrame por columnas (conserva int8 en binarios y dummies)
+        columns = {}
+        for names, block in ((self.numeric_features, numeric), (self.binary_features, binary)):
+            for j, name in enumerate(names):
+                columns[name] = block[:, j]
+        if layout == 'categorical':
+            columns.update(categorical_frame(features, self.vocabularies, self.categorical_features))
+        else:
+            dummies = one_hot_matrix(features, self.vocabularies, self.categorical_features)
+            for j, name in enumerate(self.encoded_cols):
+                columns[name] = dummies[:, j]
+        return pd.DataFrame(columns, index=features.index)
+
+    def transform(self, raw_df, layout='onehot'):
+        """Usuarios crudos → matriz de features del modelo (`layout_cols(layout)`)."""
+        return self.encode(self.derive(raw_df), layout)
+
+    def fit_transform(self, raw_df, layout='onehot'):
+        """`fit` + `transform` sin derivar los features dos veces."""
+        self.reference_date = pd.to_datetime(raw_df['first_order_date']).max()
+        features = self.derive(raw_df)
+        return self.fit_features(features).encode(features, layout)
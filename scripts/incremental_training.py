@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Reentrenamiento incremental con extractos mensuales
+===================================================
+
+Cada mes se re-ejecutaban `run_data_preparation.py` y `train_models.py`
+desde cero sobre toda la historia. El modo incremental parte de los
+artefactos vigentes y solo procesa el extracto nuevo:
+
+- FeaturePipeline: la fecha de referencia avanza al máximo del extracto y
+  las estadísticas del StandardScaler se actualizan con `partial_fit`; los
+  vocabularios one-hot quedan fijos para no cambiar el layout de columnas
+  del modelo (categorías nuevas → dummies en 0; se reportan, y muchas
+  indican que conviene un reentrenamiento completo)
+- XGBoost: continúa el booster vigente (`fit(..., xgb_model=booster)`)
+  agregando árboles ajustados sobre el extracto nuevo
+- RandomForest: agrega árboles con `warm_start`
+- al cambiar el scaler, los umbrales de los árboles existentes sobre
+  features numéricos se re-expresan en la escala nueva
+  (t' = (t·σ_ant + μ_ant − μ_nuevo) / σ_nuevo), de modo que siguen
+  separando a los mismos usuarios (salvo redondeo float32 en el borde)
+
+El extracto se divide en ajuste y holdout (estratificado). Con --history
+(el CSV crudo de la corrida anterior) se ejecuta además el reentrenamiento
+completo: pipeline y modelo desde cero sobre historia + extracto con los
+mismos hiperparámetros (sin búsqueda, por lo que el ahorro reportado es una
+cota inferior). El reporte compara tiempo y AUC en el holdout.
+
+Uso (desde la raíz del proyecto):
+    python scripts/incremental_training.py --new-data extracto_mes.csv
+    python scripts/incremental_training.py --new-data extracto_mes.csv \\
+        --history "dataset_protegido (1).csv" --output-dir models
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from feature_pipeline import FeaturePipeline
+from ranking_metrics import precision_at_k
+from scoring import MODEL_PATH, PIPELINE_PATH, load_artifacts, predict_raw
+
+# Árboles nuevos por extracto mensual
+INCREMENTAL_TREES = 50
+
+# Fracción del extracto reservada para comparar modelos
+HOLDOUT_SIZE = 0.20
+RANDOM_SEED = 42
+
+OUTPUT_DIR = 'models/incremental'
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def read_extract(path):
+    """Extracto crudo completo (CSV o Parquet con el esquema del CSV original)."""
+    return pd.read_parquet(path) if path.lower().endswith('.parquet') else pd.read_csv(path)
+
+
+def unseen_categories(pipeline, features):
+    """Usuarios con categorías fuera del vocabulario, por columna categórica."""
+    counts = {}
+    for col in pipeline.categorical_features:
+        values = features[col]
+        unseen = values.notna() & ~values.isin(pipeline.vocabularies[col])
+        if unseen.any():
+            counts[col] = int(unseen.sum())
+    return counts
+
+
+def update_pipeline(pipeline, raw_df):
+    """
+    Copia del pipeline con la fecha de referencia y el scaler actualizados
+    con un extracto nuevo (vocabularios sin cambios).
+
+    Returns:
+    --------
+    tuple (pipeline actualizado, features derivados del extracto)
+    """
+    updated = copy.deepcopy(pipeline)
+    updated.reference_date = max(pipeline.reference_date, pd.to_datetime(raw_df['first_order_date']).max())
+    features = updated.derive(raw_df)
+    updated.scaler.partial_fit(features[updated.numeric_features])
+    return updated, features
+
+
+def threshold_map(old_pipeline, new_pipeline, feature_cols):
+    """
+    Transformación afín de umbrales por índice de feature: t' = t·a + b.
+
+    Returns:
+    --------
+    dict {índice en feature_cols: (a, b)} para los features numéricos
+    """
+    old, new = old_pipeline.scaler, new_pipeline.scaler
+    mapping = {}
+    for i, name in enumerate(old_pipeline.numeric_features):
+        if name in feature_cols:
+            a = old.scale_[i] / new.scale_[i]
+            b = (old.mean_[i] - new.mean_[i]) / new.scale_[i]
+            mapping[feature_cols.index(name)] = (a, b)
+    return mapping
+
+
+# =============================================================================
+# MODELOS
+# =============================================================================
+
+def _rescaled_booster(model, mapping):
+    """Booster vigente (hasta best_iteration) con los umbrales en la escala nueva."""
+    booster = model.get_booster()
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None and best_iteration + 1 < booster.num_boosted_rounds():
+        booster = booster[:best_iteration + 1]
+
+    raw = json.loads(booster.save_raw('json'))
+    for tree in raw['learner']['gradient_booster']['model']['trees']:
+        feature = np.array(tree['split_indices'])
+        # En las hojas (left_children = -1) split_conditions guarda el valor de la hoja
+        is_split = np.array(tree['left_children']) >= 0
+        conditions = np.array(tree['split_conditions'], dtype=np.float64)
+        for index, (a, b) in mapping.items():
+            nodes = is_split & (feature == index)
+            # Los cortes de XGBoost son valores observados (x >= corte → derecha): se bajan
+            # 2 ulp en float32 para que los usuarios en el corte no cambien de rama por redondeo
+            rescaled = (conditions[nodes] * a + b).astype(np.float32)
+            conditions[nodes] = np.nextafter(np.nextafter(rescaled, -np.inf), -np.inf)
+        tree['split_conditions'] = conditions.tolist()
+
+    rescaled = xgb.Booster()
+    # UTF-8 sin escapes \\uXXXX: el lector JSON de XGBoost no los decodifica (nombres con tildes)
+    rescaled.load_model(bytearray(json.dumps(raw, ensure_ascii=False).encode('utf-8')))
+    # Sin best_iteration: los árboles que se agreguen deben usarse al predecir
+    rescaled.set_attr(best_iteration=None, best_score=None)
+    return rescaled
+
+
+def _rescaled_forest(model, mapping):
+    """Copia del RandomForest con los umbrales en la escala nueva."""
+    forest = copy.deepcopy(model)
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        # tree_.threshold es una vista de los nodos: se modifica en sitio
+        threshold = tree.threshold
+        for feature, (a, b) in mapping.items():
+            nodes = tree.feature == feature
+            threshold[nodes] = threshold[nodes] * a + b
+    return forest
+
+
+def rescale_thresholds(model, mapping):
+    """
+    Modelo vigente con umbrales re-expresados en la escala del scaler nuevo.
+
+    Returns:
+    --------
+    xgb.Booster (XGBoost) o RandomForestClassifier
+    """
+    if hasattr(model, 'get_booster'):
+        return _rescaled_booster(model, mapping)
+    if hasattr(model, 'estimators_'):
+        return _rescaled_forest(model, mapping)
+    raise ValueError(f"Modelo no soportado para reentrenamiento incremental: {type(model).__name__}")
+
+
+def rescaled_proba(rescaled, X):
+    """Probabilidad del modelo re-escalado (sin árboles nuevos)."""
+    if isinstance(rescaled, xgb.Booster):
+        return rescaled.inplace_predict(X).astype(np.float32)
+    return rescaled.predict_proba(X)[:, 1].astype(np.float32)
+
+
+def warm_start(model, rescaled, X, y, n_new_trees=INCREMENTAL_TREES):
+    """
+    Agrega `n_new_trees` árboles ajustados sobre (X, y) al modelo vigente.
+
+    Parameters:
+    -----------
+    model : XGBClassifier | RandomForestClassifier
+        Modelo vigente (hiperparámetros)
+    rescaled : xgb.Booster | RandomForestClassifier
+        Salida de `rescale_thresholds`
+    X, y : datos del extracto nuevo (layout `feature_cols`, escala nueva)
+
+    Returns:
+    --------
+    estimador ajustado con los árboles previos y los nuevos
+    """
+    if isinstance(rescaled, xgb.Booster):
+        updated = clone(model).set_params(n_estimators=n_new_trees, early_stopping_rounds=None)
+        return updated.fit(X, y, xgb_model=rescaled, verbose=False)
+
+    forest = copy.deepcopy(rescaled)
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees)
+    forest.fit(X, y)
+    forest.set_params(warm_start=False)
+    return forest
+
+
+def full_retrain(model, pipeline, raw_df):
+    """
+    Reentrenamiento completo de referencia: pipeline y modelo desde cero con
+    los mismos hiperparámetros.
+
+    Returns:
+    --------
+    tuple (modelo, feature_cols, pipeline)
+    """
+    fresh = FeaturePipeline(pipeline.high_growth_threshold, pipeline.multi_category_threshold,
+                            pipeline.multi_shop_threshold)
+    X = fresh.fit_transform(raw_df)
+    estimator = clone(model)
+    if hasattr(estimator, 'get_booster'):
+        estimator.set_params(early_stopping_rounds=None)
+        estimator.fit(X, fresh.target(raw_df), verbose=False)
+    else:
+        estimator.fit(X, fresh.target(raw_df))
+    return estimator, fresh.feature_cols, fresh
+
+
+def _holdout_metrics(raw_df, model, feature_cols, pipeline):
+    y = pipeline.target(raw_df).to_numpy()
+    proba = predict_raw(raw_df, model, feature_cols, pipeline)
+    return {'auc_roc': float(roc_auc_score(y, proba)), 'precision_at_20': precision_at_k(y, proba)}
+
+
+# =============================================================================
+# FLUJO
+# =============================================================================
+
+def run_incremental(new_data, model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH, history=None,
+                    output_dir=OUTPUT_DIR, n_new_trees=INCREMENTAL_TREES, holdout_size=HOLDOUT_SIZE):
+    """
+    Reentrenamiento incremental y, con `history`, comparación contra el completo.
+
+    Returns:
+    --------
+    dict con el reporte (también guardado en output_dir/incremental_report.json)
+    """
+    print("="*80)
+    print("REENTRENAMIENTO INCREMENTAL")
+    print("="*80)
+    model, feature_cols, pipeline = load_artifacts(model_path, pipeline_path)
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    raw_new = read_extract(new_data)
+    target = pipeline.target(raw_new)
+    fit_raw, holdout_raw = train_test_split(raw_new, test_size=holdout_size, stratify=target,
+                                            random_state=RANDOM_SEED)
+    print(f"✓ Modelo vigente: {model_data.get('model_name', type(model).__name__)} | "
+          f"extracto: {len(raw_new):,} usuarios ({len(fit_raw):,} ajuste / {len(holdout_raw):,} holdout)")
+
+    # ------------------------------------------------------------------
+    # Incremental: scaler partial_fit + árboles nuevos
+    # ------------------------------------------------------------------
+    start = time.perf_counter()
+    new_pipeline, features = update_pipeline(pipeline, fit_raw)
+    X_fit = new_pipeline.encode(features).reindex(columns=feature_cols, fill_value=0)
+    y_fit = new_pipeline.target(fit_raw)
+    mapping = threshold_map(pipeline, new_pipeline, feature_cols)
+    rescaled = rescale_thresholds(model, mapping)
+    updated = warm_start(model, rescaled, X_fit, y_fit, n_new_trees)
+    incremental_time = time.perf_counter() - start
+    unseen = unseen_categories(pipeline, features)
+    print(f"\n⚡ Incremental: {incremental_time:.1f}s (+{n_new_trees} árboles, "
+          f"{len(mapping)} umbrales numéricos re-escalados)")
+    if unseen:
+        print(f"   ⚠️ Categorías fuera del vocabulario (dummies en 0): {unseen}")
+
+    # Los árboles previos con umbrales re-escalados deben reproducir el modelo vigente
+    # (misma fecha de referencia: solo cambia el scaler)
+    same_date = copy.deepcopy(new_pipeline)
+    same_date.reference_date = pipeline.reference_date
+    X_holdout = same_date.transform(holdout_raw).reindex(columns=feature_cols, fill_value=0)
+    previous_proba = predict_raw(holdout_raw, model, feature_cols, pipeline)
+    drift = np.abs(rescaled_proba(rescaled, X_holdout) - previous_proba)
+
+    results = {
+        'vigente': _holdout_metrics(holdout_raw, model, feature_cols, pipeline),
+        'incremental': {**_holdout_metrics(holdout_raw, updated, feature_cols, new_pipeline),
+                        'tiempo_s': round(incremental_time, 2)},
+    }
+
+    # ------------------------------------------------------------------
+    # Completo: pipeline + modelo desde cero sobre historia + extracto
+    # ------------------------------------------------------------------
+    if history is not None:
+        combined = pd.concat([read_extract(history), fit_raw], ignore_index=True)
+        start = time.perf_counter()
+        full_model, full_cols, full_pipeline = full_retrain(model, pipeline, combined)
+        full_time = time.perf_counter() - start
+        print(f"🐢 Completo: {full_time:.1f}s ({len(combined):,} usuarios)")
+        results['completo'] = {**_holdout_metrics(holdout_raw, full_model, full_cols, full_pipeline),
+                               'tiempo_s': round(full_time, 2)}
+
+    print(f"\n{'Modelo':<14} {'AUC holdout':>12} {'P@20%':>8} {'Tiempo (s)':>11}")
+    print("-"*48)
+    for name, res in results.items():
+        elapsed = f"{res['tiempo_s']:.1f}" if 'tiempo_s' in res else '-'
+        print(f"{name:<14} {res['auc_roc']:>12.4f} {res['precision_at_20']:>8.4f} {elapsed:>11}")
+
+    report = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'extracto': new_data,
+        'modelo_base': model_path,
+        'modelo': model_data.get('model_name', type(model).__name__),
+        'arboles_nuevos': n_new_trees,
+        'reference_date': str(new_pipeline.reference_date.date()),
+        'usuarios': {'ajuste': len(fit_raw), 'holdout': len(holdout_raw)},
+        'categorias_no_vistas': unseen,
+        # Diferencia entre el modelo vigente y sus árboles con umbrales re-escalados
+        'consistencia_umbrales': {'max_abs_diff': float(drift.max()), 'mean_abs_diff': float(drift.mean())},
+        'holdout': results,
+    }
+    if 'completo' in results:
+        report['comparacion'] = {
+            'tiempo_ahorrado_s': round(results['completo']['tiempo_s'] - incremental_time, 2),
+            'speedup': round(results['completo']['tiempo_s'] / incremental_time, 2),
+            'delta_auc': results['incremental']['auc_roc'] - results['completo']['auc_roc'],
+        }
+        print(f"\n⏱️ Tiempo ahorrado: {report['comparacion']['tiempo_ahorrado_s']:.1f}s "
+              f"({report['comparacion']['speedup']:.1f}x) | ΔAUC (incremental - completo): "
+              f"{report['comparacion']['delta_auc']:+.4f}")
+
+    # ------------------------------------------------------------------
+    # Artefactos
+    # ------------------------------------------------------------------
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, os.path.basename(MODEL_PATH)), 'wb') as f:
+        pickle.dump({**model_data, 'model': updated, 'feature_cols': feature_cols,
+                     'incremental': {k: report[k] for k in ('fecha', 'extracto', 'modelo_base', 'arboles_nuevos')}},
+                    f)
+    with open(os.path.join(output_dir, os.path.basename(PIPELINE_PATH)), 'wb') as f:
+        pickle.dump(new_pipeline, f)
+    report_path = os.path.join(output_dir, 'incremental_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Modelo, pipeline y reporte guardados en {output_dir}/")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--new-data', required=True, help='Extracto crudo del mes (CSV o Parquet)')
+    parser.add_argument('--model', default=MODEL_PATH, help='Pickle del modelo vigente')
+    parser.add_argument('--pipeline', default=PIPELINE_PATH, help='FeaturePipeline vigente')
+    parser.add_argument('--history', default=None,
+                        help='CSV crudo de la corrida anterior: ejecuta también el reentrenamiento completo')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help='Destino de modelo, pipeline y reporte (models para reemplazar los vigentes)')
+    parser.add_argument('--new-trees', type=int, default=INCREMENTAL_TREES, help='Árboles a agregar')
+    parser.add_argument('--holdout', type=float, default=HOLDOUT_SIZE,
+                        help='Fracción del extracto reservada para evaluar')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    run_incremental(args.new_data, args.model, args.pipeline, args.history, args.output_dir,
+                    args.new_trees, args.holdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para el servicio de scoring
+==============================================
+
+Envía peticiones concurrentes a `scoring_service.py` con usuarios reales del
+CSV crudo (columnas de conteos como objetos JSON) y reporta latencia p50/p99
+y throughput medidos en el cliente, junto con las métricas del servidor
+(`GET /metrics`), incluido el tamaño medio de los micro-lotes.
+
+Uso (con el servicio corriendo):
+    python scripts/load_test_service.py --url http://127.0.0.1:8000 --concurrency 16 --requests 5000
+    python scripts/load_test_service.py --users-per-request 20   # micro-lotes del cliente
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from dict_parser import parse_dict_column
+from feature_engine import DICT_COLUMNS
+from user_features import RAW_INPUT_COLUMNS
+
+DATASET_PATH = 'dataset_protegido (1).csv'
+
+
+def load_payloads(dataset_path, sample_size, seed=42):
+    """
+    Usuarios de muestra como objetos JSON (esquema crudo, conteos como objetos).
+
+    Returns:
+    --------
+    list de diccionarios serializables
+    """
+    df = pd.read_csv(dataset_path, nrows=sample_size * 5)
+    df = df.sample(min(sample_size, len(df)), random_state=seed)
+    df = df[['uid'] + RAW_INPUT_COLUMNS]
+    for col in DICT_COLUMNS:
+        df[col] = parse_dict_column(df[col])
+    records = df.to_dict(orient='records')
+    # Tipos numpy → nativos para json.dumps
+    return [{k: (v.item() if hasattr(v, 'item') else v) for k, v in r.items()} for r in records]
+
+
+def _worker(host, port, bodies, n_requests, latencies, errors, counter, lock):
+    """Hilo cliente: conexión keep-alive propia, toma peticiones del contador compartido."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    while True:
+        with lock:
+            i = counter[0]
+            if i >= n_requests:
+                break
+            counter[0] += 1
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/score', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if not ok:
+            errors.append(i)
+    conn.close()
+
+
+def run_load_test(url, payloads, concurrency, n_requests, users_per_request=1):
+    """
+    Ejecuta la prueba de carga.
+
+    Returns:
+    --------
+    dict con latencias del cliente (ms), throughput y errores
+    """
+    parsed = urlparse(url)
+    bodies = [json.dumps(payloads[i:i + users_per_request] if users_per_request > 1 else payloads[i])
+              for i in range(0, len(payloads) - users_per_request + 1, users_per_request)]
+
+    latencies, errors, counter, lock = [], [], [0], threading.Lock()
+    threads = [threading.Thread(target=_worker,
+                                args=(parsed.hostname, parsed.port or 80, bodies, n_requests,
+                                      latencies, errors, counter, lock))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'users_per_s': len(latencies) * users_per_request / elapsed,
+        'p50_ms': float(p50),
+        'p99_ms': float(p99),
+    }
+
+
+def fetch_metrics(url):
+    """GET /metrics del servidor."""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=10)
+    conn.request('GET', '/metrics')
+    metrics = json.loads(conn.getresponse().read())
+    conn.close()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--data', default=DATASET_PATH, help='CSV crudo de donde tomar usuarios')
+    parser.add_argument('--sample', type=int, default=2000, help='Usuarios distintos a enviar')
+    parser.add_argument('--concurrency', type=int, default=16, help='Clientes concurrentes')
+    parser.add_argument('--requests', type=int, default=5000, help='Total de peticiones')
+    parser.add_argument('--users-per-request', type=int, default=1)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("PRUEBA DE CARGA - SERVICIO DE SCORING")
+    print("="*80)
+    payloads = load_payloads(args.data, args.sample)
+    print(f"📂 {len(payloads):,} usuarios de muestra desde {args.data}")
+    print(f"⚙️ {args.concurrency} clientes | {args.requests:,} peticiones | "
+          f"{args.users_per_request} usuario(s) por petición")
+
+    result = run_load_test(args.url, payloads, args.concurrency, args.requests, args.users_per_request)
+
+    print(f"\n📊 CLIENTE:")
+    print(f"   - Peticiones: {result['requests']:,} ({result['errors']} errores) en {result['elapsed_s']:.1f} s")
+    print(f"   - Throughput: {result['requests_per_s']:,.0f} peticiones/s | {result['users_per_s']:,.0f} usuarios/s")
+    print(f"   - Latencia p50: {result['p50_ms']:.2f} ms | p99: {result['p99_ms']:.2f} ms")
+
+    metrics = fetch_metrics(args.url)
+    print(f"\n📊 SERVIDOR (/metrics):")
+    print(f"   - Latencia p50: {metrics['latency_ms']['p50']:.2f} ms | p99: {metrics['latency_ms']['p99']:.2f} ms")
+    print(f"   - Micro-lotes: {metrics['micro_batch']['batches']:,} "
+          f"(media {metrics['micro_batch']['mean_users']:.1f} usuarios, máx {metrics['micro_batch']['max_users']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Evaluación de modelos en una sola pasada de predicción
+======================================================
+
+En `train_models.py` cada modelo se scoreaba varias veces sobre el mismo
+split: `evaluate_model` llamaba `predict` y `predict_proba`, la evaluación
+final repetía ambas sobre test y las curvas ROC y PR volvían a llamar
+`predict_proba` por modelo.
+
+`EvaluationReport` centraliza la evaluación:
+
+- caché de probabilidades por (modelo, split): cada modelo scorea cada
+  split exactamente una vez
+- etiquetas duras derivadas de las probabilidades (p > 0.5, la misma regla
+  de `predict` en XGBoost y RandomForest binarios), sin segunda pasada
+- métricas, matriz de confusión y curvas ROC/PR calculadas desde la caché;
+  las consumen las tablas, los gráficos y el JSON de `train_models.py`
+- métricas de ranking (Precision/Recall/Lift@k, curva de presupuesto y
+  niveles de prioridad) de `ranking_metrics`, en O(n) sin ordenar los scores
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+from sklearn.metrics import (
+    roc_auc_score, f1_score, precision_score, recall_score, accuracy_score,
+    confusion_matrix, roc_curve, precision_recall_curve, average_precision_score
+)
+
+from ranking_metrics import precision_at_k, ranking_report
+
+# Porcentaje para Precision@k (top 20% de usuarios a targetear)
+TOP_K_PERCENT = 0.20
+
+# Umbral de decisión de predict() en clasificadores binarios
+DECISION_THRESHOLD = 0.5
+
+
+class EvaluationReport:
+    """
+    Predicciones y métricas por (modelo, split) calculadas una sola vez.
+
+    Parameters:
+    -----------
+    splits : dict
+        {nombre_split: (X, y)}, p.ej. {'train': ..., 'val': ..., 'test': ...}
+    top_k : float
+        Fracción para Precision@k
+    threshold : float
+        Umbral de probabilidad para las etiquetas duras
+    """
+
+    def __init__(self, splits, top_k=TOP_K_PERCENT, threshold=DECISION_THRESHOLD):
+        self.splits = splits
+        self.top_k = top_k
+        self.threshold = threshold
+        self.models = {}
+        # nombre → clave de caché (modelos registrados con varios nombres comparten predicciones)
+        self._keys = {}
+        self._proba = {}
+        self._metrics = {}
+        self._ranking = {}
+        self.n_predict_calls = 0
+
+    def add_model(self, name, model):
+        """
+        Registra un modelo. Si el mismo objeto ya estaba registrado con otro
+        nombre, reutiliza sus predicciones.
+        """
+        if name in self.models:
+            if self.models[name] is not model:
+                raise ValueError(f"Ya hay otro modelo registrado como '{name}'")
+            return self
+        self._keys[name] = next((self._keys[other_name] for other_name, other in self.models.items()
+                                 if other is model), name)
+        self.models[name] = model
+        return self
+
+    def add_predictions(self, name, split, proba):
+        """
+        Registra probabilidades calculadas fuera del reporte (p.ej. scoring por
+        chunks de un split que no cabe en memoria; `splits[split]` puede ser
+        (None, y)).
+        """
+        if name not in self.models:
+            self.models[name] = None
+            self._keys[name] = name
+        self._proba[(self._keys[name], split)] = proba
+        return self
+
+    def y_true(self, split):
+        return self.splits[split][1]
+
+    def proba(self, name, split):
+        """Probabilidad de la clase positiva (una llamada a predict_proba por modelo y split)."""
+        key = (self._keys[name], split)
+        if key not in self._proba:
+            self._proba[key] = self.models[name].predict_proba(self.splits[split][0])[:, 1]
+            self.n_predict_calls += 1
+        return self._proba[key]
+
+    def labels(self, name, split):
+        """Etiquetas duras derivadas de las probabilidades cacheadas."""
+        return (self.proba(name, split) > self.threshold).astype(int)
+
+    def metrics(self, name, split):
+        """
+        Métricas de un modelo en un split.
+
+        Métricas calculadas:
+        - AUC-ROC: Capacidad de ordenamiento (métrica principal)
+        - F1-Score: Balance precisión-recall
+        - Precision@20%: Precisión en top usuarios (caso de uso de negocio)
+        """
+        key = (self._keys[name], split)
+        if key not in self._metrics:
+            y, y_proba, y_pred = self.y_true(split), self.proba(name, split), self.labels(name, split)
+            self._metrics[key] = {
+                'auc_roc': roc_auc_score(y, y_proba),
+                'f1': f1_score(y, y_pred),
+                'precision': precision_score(y, y_pred),
+                'recall': recall_score(y, y_pred),
+                'accuracy': accuracy_score(y, y_pred),
+                'avg_precision': average_precision_score(y, y_proba),
+                'precision_at_20': precision_at_k(y, y_proba, k=self.top_k)
+            }
+        return self._metrics[key]
+
+    def ranking(self, name, split):
+        """Precision/Recall/Lift@k, curva de presupuesto y niveles de prioridad (ver `ranking_metrics`)."""
+        key = (self._keys[name], split)
+        if key not in self._ranking:
+            self._ranking[key] = ranking_report(self.y_true(split), self.proba(name, split))
+        return self._ranking[key]
+
+    def confusion_matrix(self, name, split):
+        return confusion_matrix(self.y_true(split), self.labels(name, split))
+
+    def roc_curve(self, name, split):
+        """(fpr, tpr) de la curva ROC."""
+        fpr, tpr, _ = roc_curve(self.y_true(split), self.proba(name, split))
+        return fpr, tpr
+
+    def pr_curve(self, name, split):
+        """(precision, recall) de la curva Precision-Recall."""
+        precision, recall, _ = precision_recall_curve(self.y_true(split), self.proba(name, split))
+        return precision, recall
+
+    def to_dict(self, name, splits=('val', 'test')):
+        """Métricas serializables a JSON de un modelo: {split: {métrica: valor}}."""
+        return {split: {k: float(v) for k, v in self.metrics(name, split).items()} for split in splits}
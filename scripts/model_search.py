@@ -0,0 +1,190 @@
+"""
+Estrategias de búsqueda de hiperparámetros para train_models.py
+===============================================================
+
+El GridSearchCV exhaustivo (24 combinaciones × 5 folds por modelo) ajusta
+240 modelos antes de elegir uno. Este módulo ofrece estrategias más baratas
+con la misma interfaz, seleccionables con `train_models.py --search`:
+
+- `grid`: GridSearchCV exhaustivo (comportamiento original)
+- `halving`: HalvingGridSearchCV (successive halving): todas las
+  combinaciones arrancan con pocas filas y solo el mejor tercio pasa a la
+  siguiente ronda con el triple de datos
+- `early_stopping`: una sola pasada por combinación evaluada en el split de
+  validación. XGBoost agrega árboles hasta que el AUC de validación deja de
+  mejorar (`early_stopping_rounds`), de modo que `n_estimators` sale del
+  entrenamiento en lugar del grid; Random Forest crece el bosque por etapas
+  con `warm_start` y se detiene cuando el AUC de validación no mejora
+
+Cada estrategia retorna un diccionario con el estimador ganador, sus
+parámetros, el mejor AUC de la búsqueda, el número de ajustes y el tiempo
+de pared, que `train_models.py` registra en `classification_report.json`.
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
+
+SEARCH_STRATEGIES = ['grid', 'halving', 'early_stopping']
+
+# Successive halving: fracción de candidatos que sobrevive cada ronda = 1/factor
+HALVING_FACTOR = 3
+
+# XGBoost: tope de árboles y rondas sin mejora en validación antes de detener
+EARLY_STOPPING_MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+# XGBoost sin búsqueda (train_external_memory.py, benchmark_categorical_layout.py):
+# centro del grid de train_models.py
+XGB_GRID_CENTER = {'max_depth': 6, 'learning_rate': 0.1, 'subsample': 0.8, 'colsample_bytree': 0.8}
+
+# Random Forest: mejora mínima de AUC de validación para seguir creciendo el bosque
+RF_MIN_AUC_GAIN = 1e-4
+
+
+def _result(strategy, estimator, params, best_auc, auc_source, n_fits, start):
+    return {
+        'strategy': strategy,
+        'estimator': estimator,
+        'params': params,
+        'best_auc': float(best_auc),
+        'auc_source': auc_source,
+        'n_fits': int(n_fits),
+        'wall_time_s': time.perf_counter() - start,
+    }
+
+
+def grid_search(base_model, param_grid, X_train, y_train, cv=5, n_jobs=-1, verbose=1):
+    """GridSearchCV exhaustivo optimizando AUC-ROC."""
+    start = time.perf_counter()
+    search = GridSearchCV(base_model, param_grid=param_grid, cv=cv, scoring='roc_auc',
+                          n_jobs=n_jobs, verbose=verbose)
+    search.fit(X_train, y_train)
+    n_fits = len(search.cv_results_['params']) * cv + 1
+    return _result('grid', search.best_estimator_, search.best_params_, search.best_score_,
+                   f'cv_{cv}_fold', n_fits, start)
+
+
+def halving_search(base_model, param_grid, X_train, y_train, cv=5, n_jobs=-1, verbose=1,
+                   random_state=None):
+    """
+    Successive halving sobre el mismo grid: las rondas iniciales usan
+    submuestras de train y solo los mejores candidatos llegan a los datos
+    completos.
+    """
+    start = time.perf_counter()
+    search = HalvingGridSearchCV(base_model, param_grid=param_grid, factor=HALVING_FACTOR, cv=cv,
+                                 scoring='roc_auc', n_jobs=n_jobs, verbose=verbose,
+                                 random_state=random_state)
+    search.fit(X_train, y_train)
+    n_fits = int(np.sum(search.n_candidates_)) * cv + 1
+    # best_score_ es el AUC CV de la última ronda (la de más datos)
+    return _result('halving', search.best_estimator_, search.best_params_, search.best_score_,
+                   f'cv_{cv}_fold_ultima_ronda', n_fits, start)
+
+
+def _xgb_early_stopping(base_model, param_grid, X_train, y_train, X_val, y_val, verbose):
+    grid = {k: v for k, v in param_grid.items() if k != 'n_estimators'}
+    best = None
+    n_fits = 0
+    for params in ParameterGrid(grid):
+        model = clone(base_model).set_params(**params, n_estimators=EARLY_STOPPING_MAX_ESTIMATORS,
+                                              early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+        n_fits += 1
+        # best_score: AUC de validación en best_iteration (eval_metric='auc')
+        auc = model.best_score
+        if verbose:
+            print(f"   · {params} → {model.best_iteration + 1} árboles, AUC val {auc:.4f}")
+        if best is None or auc > best[0]:
+            best = (auc, model, {**params, 'n_estimators': model.best_iteration + 1})
+    return best, n_fits
+
+
+def _rf_early_stopping(base_model, param_grid, X_train, y_train, X_val, y_val, verbose):
+    grid = {k: v for k, v in param_grid.items() if k != 'n_estimators'}
+    stages = sorted(param_grid.get('n_estimators', [base_model.get_params()['n_estimators']]))
+    best = None
+    n_fits = 0
+    for params in ParameterGrid(grid):
+        model = clone(base_model).set_params(**params, warm_start=True)
+        stage_best = None
+        for n_estimators in stages:
+            # warm_start: solo se entrenan los árboles nuevos de la etapa
+            model.set_params(n_estimators=n_estimators).fit(X_train, y_train)
+            n_fits += 1
+            auc = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+            if stage_best is not None and auc < stage_best[0] + RF_MIN_AUC_GAIN:
+                break
+            if stage_best is None or auc > stage_best[0]:
+                stage_best = (auc, n_estimators)
+        auc, n_estimators = stage_best
+        if verbose:
+            print(f"   · {params} → {n_estimators} árboles, AUC val {auc:.4f}")
+        if best is None or auc > best[0]:
+            # Los primeros n árboles de warm_start son los mismos de un ajuste con n árboles
+            model.estimators_ = model.estimators_[:n_estimators]
+            model.set_params(n_estimators=n_estimators, warm_start=False)
+            best = (auc, model, {**params, 'n_estimators': n_estimators})
+    return best, n_fits
+
+
+def early_stopping_search(base_model, param_grid, X_train, y_train, X_val, y_val, verbose=1):
+    """
+    Una pasada por combinación (sin CV) con parada temprana sobre validación.
+
+    Parameters:
+    -----------
+    base_model : XGBClassifier | RandomForestClassifier
+        Modelo base (XGBoost usa early_stopping_rounds; RF, warm_start por etapas)
+    param_grid : dict
+        Grid de train_models.py; `n_estimators` se determina por parada temprana
+    X_train, y_train, X_val, y_val
+        Splits de entrenamiento y validación
+
+    Returns:
+    --------
+    dict con estimator, params, best_auc (AUC de validación), n_fits, wall_time_s
+    """
+    start = time.perf_counter()
+    if hasattr(base_model, 'get_booster'):
+        (auc, model, params), n_fits = _xgb_early_stopping(base_model, param_grid, X_train, y_train,
+                                                           X_val, y_val, verbose)
+    else:
+        (auc, model, params), n_fits = _rf_early_stopping(base_model, param_grid, X_train, y_train,
+                                                          X_val, y_val, verbose)
+    return _result('early_stopping', model, params, auc, 'validacion', n_fits, start)
+
+
+def run_search(strategy, base_model, param_grid, X_train, y_train, X_val, y_val, cv=5, n_jobs=-1,
+               verbose=1, random_state=None):
+    """
+    Ejecuta la estrategia de búsqueda indicada.
+
+    Parameters:
+    -----------
+    strategy : str
+        Una de SEARCH_STRATEGIES
+    base_model : estimador sklearn
+        Modelo base con los parámetros fijos
+    param_grid : dict
+        Grid de hiperparámetros
+
+    Returns:
+    --------
+    dict con estimator, params, best_auc, auc_source, n_fits y wall_time_s
+    """
+    if strategy == 'grid':
+        return grid_search(base_model, param_grid, X_train, y_train, cv, n_jobs, verbose)
+    if strategy == 'halving':
+        return halving_search(base_model, param_grid, X_train, y_train, cv, n_jobs, verbose,
+                              random_state)
+    if strategy == 'early_stopping':
+        return early_stopping_search(base_model, param_grid, X_train, y_train, X_val, y_val, verbose)
+    raise ValueError(f"Estrategia de búsqueda desconocida: {strategy} (opciones: {SEARCH_STRATEGIES})")
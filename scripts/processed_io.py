@@ -0,0 +1,318 @@
+"""
+Lectura y escritura de los splits procesados (train/val/test)
+=============================================================
+
+Los splits tienen ~50 columnas one-hot; guardarlos como CSV obliga a
+re-parsear texto en cada carga (entrenamiento y dashboard) y pandas los
+lee como int64/float64. Este módulo los persiste en Parquet (columnar,
+comprimido) con tipos compactos:
+
+- dummies y flags binarios (0/1) → int8
+- numéricos escalados → float32
+- demás enteros (delta_orders, conteos del resumen) → int32
+- uid se conserva sin cambios
+
+Los tipos dependen solo del rol de la columna (no del rango de cada lote),
+así que las particiones del modo streaming comparten esquema.
+
+Junto a los splits se escribe el resumen liviano por usuario
+(`user_summary`, columnas `user_features.USER_SUMMARY_COLUMNS`): features
+sin escalar y categóricas como `category`, sin el texto de los
+diccionarios. El dashboard lo lee en lugar del CSV crudo.
+
+Un split puede ser un archivo (`train.parquet`) o un directorio de
+particiones (`train/part-00000.parquet`, modo streaming). Los lectores
+prefieren Parquet y caen a CSV si no existe, por lo que los artefactos
+antiguos siguen funcionando. CSV queda como exportación opcional.
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import glob
+import importlib.util
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from user_features import BINARY_FEATURES, CATEGORICAL_FEATURES, NUMERIC_FEATURES
+
+PROCESSED_DIR = 'data/processed'
+SPLITS = ['train', 'val', 'test']
+
+# Columnas que no son features del modelo
+NON_FEATURE_COLS = ['high_growth', 'delta_orders', 'uid']
+
+# Resumen liviano por usuario (se guarda y se lee como un split más)
+USER_SUMMARY = 'user_summary'
+
+OUTPUT_FORMATS = ['parquet', 'csv', 'both']
+
+# Filas por lote al recorrer un split sin cargarlo completo (iter_split_chunks)
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Enteros 0/1 por rol: target y flags binarios (las dummies se reconocen por prefijo)
+BINARY_COLUMNS = ['high_growth'] + BINARY_FEATURES
+_DUMMY_PREFIXES = tuple(f'{col}_' for col in CATEGORICAL_FEATURES)
+
+
+def parquet_available():
+    """True si hay un motor Parquet instalado (pyarrow)."""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def is_binary_column(col):
+    """True si la columna es un flag 0/1 o una dummy de una categórica."""
+    return col in BINARY_COLUMNS or (col.startswith(_DUMMY_PREFIXES) and col not in NUMERIC_FEATURES)
+
+
+def compact_dtypes(df):
+    """
+    Convierte las columnas a tipos compactos según su rol (no según los
+    valores del lote), así todos los lotes de una columna comparten tipo.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Split procesado (features + high_growth, delta_orders, uid)
+
+    Returns:
+    --------
+    pd.DataFrame con dummies/binarios en int8 (`is_binary_column`),
+    flotantes en float32, el resto de enteros en int32 y texto en category (uid no se modifica).
+    """
+    df = df.copy()
+    for col in df.columns:
+        if col == 'uid':
+            continue
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            df[col] = series.astype(np.int8)
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = series.astype(np.int8 if is_binary_column(col) else np.int32)
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = series.astype(np.float32)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            df[col] = series.astype('category')
+    return df
+
+
+def split_path(name, output_dir=PROCESSED_DIR, fmt='parquet'):
+    """Ruta del archivo de un split en el formato indicado."""
+    return os.path.join(output_dir, f'{name}.{fmt}')
+
+
+def partition_dir(name, output_dir=PROCESSED_DIR):
+    """Directorio de particiones de un split (modo streaming)."""
+    return os.path.join(output_dir, name)
+
+
+def _check_format(output_format):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format debe ser uno de {OUTPUT_FORMATS}, no '{output_format}'")
+
+
+def _write(df, path_without_ext, output_format):
+    written = []
+    if output_format in ('parquet', 'both'):
+        path = f'{path_without_ext}.parquet'
+        compact_dtypes(df).to_parquet(path, index=False)
+        written.append(path)
+    if output_format in ('csv', 'both'):
+        path = f'{path_without_ext}.csv'
+        df.to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+def save_split(df, name, output_dir=PROCESSED_DIR, output_format='parquet'):
+    """
+    Guarda un split procesado.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Split a guardar
+    name : str
+        'train', 'val' o 'test'
+    output_dir : str
+        Directorio de salida
+    output_format : str
+        'parquet' (tipos compactos), 'csv' o 'both'
+
+    Returns:
+    --------
+    list con las rutas escritas
+    """
+    _check_format(output_format)
+    os.makedirs(output_dir, exist_ok=True)
+    # Las particiones de una corrida streaming o el Parquet de una corrida
+    # anterior tendrían prioridad sobre el CSV
+    clear_split(name, output_dir)
+    return _write(df, os.path.join(output_dir, name), output_format)
+
+
+def clear_split(name, output_dir=PROCESSED_DIR):
+    """
+    Elimina las particiones y el Parquet de un split antes de escribirlo,
+    para que los lectores no prefieran artefactos de una corrida anterior.
+    """
+    shutil.rmtree(partition_dir(name, output_dir), ignore_errors=True)
+    parquet_path = split_path(name, output_dir, 'parquet')
+    if os.path.exists(parquet_path):
+        os.remove(parquet_path)
+
+
+def save_split_partition(df, name, part, output_dir=PROCESSED_DIR, output_format='parquet'):
+    """
+    Guarda una partición de un split en `{output_dir}/{name}/part-XXXXX.{fmt}`.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filas del split producidas por un chunk
+    name : str
+        'train', 'val' o 'test'
+    part : int
+        Número de partición (chunk)
+    output_dir : str
+        Directorio de salida
+    output_format : str
+        'parquet', 'csv' o 'both'
+
+    Returns:
+    --------
+    list con las rutas escritas
+    """
+    _check_format(output_format)
+    directory = partition_dir(name, output_dir)
+    os.makedirs(directory, exist_ok=True)
+    return _write(df, os.path.join(directory, f'part-{part:05d}'), output_format)
+
+
+def load_split(name, base_dir=PROCESSED_DIR, columns=None):
+    """
+    Carga un split procesado prefiriendo Parquet sobre CSV.
+
+    Parameters:
+    -----------
+    name : str
+        'train', 'val' o 'test'
+    base_dir : str
+        Directorio donde están los splits
+    columns : list, optional
+        Subconjunto de columnas a leer (proyección; solo se leen esas columnas)
+
+    Returns:
+    --------
+    pd.DataFrame
+    """
+    parquet_path = split_path(name, base_dir, 'parquet')
+    if os.path.exists(parquet_path) and parquet_available():
+        return pd.read_parquet(parquet_path, columns=columns)
+
+    parts = split_partitions(name, base_dir)
+    if parts:
+        if parts[0].endswith('.parquet'):
+            return pd.concat([pd.read_parquet(p, columns=columns) for p in parts], ignore_index=True)
+        return pd.concat([pd.read_csv(p, usecols=columns) for p in parts], ignore_index=True)
+
+    csv_path = split_path(name, base_dir, 'csv')
+    if os.path.exists(csv_path):
+        return pd.read_csv(csv_path, usecols=columns)
+
+    raise FileNotFoundError(f"No se encontró el split '{name}' en {base_dir} (.parquet, particiones ni .csv)")
+
+
+def split_partitions(name, base_dir=PROCESSED_DIR):
+    """
+    Particiones de un split escrito en modo streaming, en orden.
+
+    Retorna las rutas Parquet si pyarrow está disponible y existen; si no,
+    las CSV. Lista vacía si el split no está particionado.
+    """
+    directory = partition_dir(name, base_dir)
+    if not os.path.isdir(directory):
+        return []
+    if parquet_available():
+        parts = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+        if parts:
+            return parts
+    return sorted(glob.glob(os.path.join(directory, 'part-*.csv')))
+
+
+def _split_sources(name, base_dir):
+    """Archivos de un split en el orden de preferencia de `load_split`."""
+    parquet_path = split_path(name, base_dir, 'parquet')
+    if os.path.exists(parquet_path) and parquet_available():
+        return [parquet_path]
+    parts = split_partitions(name, base_dir)
+    if parts:
+        return parts
+    csv_path = split_path(name, base_dir, 'csv')
+    if os.path.exists(csv_path):
+        return [csv_path]
+    raise FileNotFoundError(f"No se encontró el split '{name}' en {base_dir} (.parquet, particiones ni .csv)")
+
+
+def split_mtime(name, base_dir=PROCESSED_DIR):
+    """Última modificación de los archivos de un split (None si no existe); sirve como clave de caché."""
+    try:
+        return max(os.path.getmtime(source) for source in _split_sources(name, base_dir))
+    except FileNotFoundError:
+        return None
+
+
+def splits_available(base_dir=PROCESSED_DIR):
+    """True si existen los tres splits (el directorio puede tener solo algunos)."""
+    return all(split_mtime(name, base_dir) is not None for name in SPLITS)
+
+
+def split_columns(name, base_dir=PROCESSED_DIR):
+    """Columnas de un split leyendo solo el esquema (Parquet) o el encabezado (CSV)."""
+    source = _split_sources(name, base_dir)[0]
+    if source.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(source).names)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+def iter_split_chunks(name, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """
+    Recorre un split en DataFrames de hasta `chunk_rows` filas sin cargarlo
+    completo (Parquet por lotes de pyarrow, CSV con `chunksize`). Cada
+    partición del modo streaming se recorre por separado.
+
+    Parameters:
+    -----------
+    name : str
+        'train', 'val' o 'test'
+    base_dir : str
+        Directorio donde están los splits
+    chunk_rows : int
+        Filas máximas por lote
+    columns : list, optional
+        Subconjunto de columnas a leer
+
+    Yields:
+    -------
+    pd.DataFrame
+    """
+    for source in _split_sources(name, base_dir):
+        if source.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, usecols=columns, chunksize=chunk_rows)
+
+
+def load_splits(base_dir=PROCESSED_DIR, columns=None):
+    """Carga train, val y test (en ese orden)."""
+    return tuple(load_split(name, base_dir, columns) for name in SPLITS)
+
+
+def load_user_summary(base_dir=PROCESSED_DIR, columns=None):
+    """Carga el resumen liviano por usuario (`USER_SUMMARY`), con proyección opcional."""
+    return load_split(USER_SUMMARY, base_dir, columns)
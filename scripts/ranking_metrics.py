@@ -0,0 +1,243 @@
+"""
+Métricas de ranking: Precision/Recall/Lift@k y curva de presupuesto
+===================================================================
+
+`precision_at_k` ordenaba todas las probabilidades (`np.argsort`, O(n log n))
+para un solo k. Aquí todas las métricas salen de **una** llamada a
+`np.argpartition` con todas las posiciones de corte a la vez (`kth` = una
+por cada k y cada punto de la curva): después de la partición, los usuarios
+entre dos cortes consecutivos forman un bloque, y los high-growth del top k
+son la suma de los bloques por encima del corte. No se ordena ni se copia
+el arreglo de scores; la memoria extra es el arreglo de índices de la
+partición y una copia reordenada de las etiquetas, apto para decenas de
+millones de usuarios.
+
+- `precision_at_k`: un solo k (O(n))
+- `ranking_table`: precision, recall y lift para muchos k (1%..50%)
+- `budget_curve`: curva de presupuesto (ganancia acumulada): fracción de la
+  base contactada vs fracción de high-growth capturados
+- `tier_summary`: desempeño de los niveles de prioridad de la campaña
+  (alta 20% / media 30% / baja 50%, ver `scoring.PRIORITY_TIERS`)
+- `ranking_report`: todo lo anterior en un diccionario serializable a JSON
+- `top_k`: posiciones de los k scores más altos, en orden (lista de campaña):
+  partición O(n) y orden solo de los k seleccionados (O(k log k))
+
+Los empates en el score en el borde de un corte se resuelven de forma
+arbitraria, igual que con `argsort`.
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import numpy as np
+
+from scoring import PRIORITY_TIERS, tier_top_counts
+
+# Fracciones de la base para Precision/Recall/Lift@k: 1%, 2%, ..., 50%
+DEFAULT_KS = [round(k / 100, 2) for k in range(1, 51)]
+
+# Paso de la curva de presupuesto (5%, 10%, ..., 100% de la base contactada)
+BUDGET_STEP = 0.05
+
+
+def _as_arrays(y_true, y_score):
+    y_true = y_true.to_numpy() if hasattr(y_true, 'to_numpy') else np.asarray(y_true)
+    y_score = y_score.to_numpy() if hasattr(y_score, 'to_numpy') else np.asarray(y_score)
+    if len(y_true) != len(y_score):
+        raise ValueError(f"y_true ({len(y_true)}) y y_score ({len(y_score)}) difieren en longitud")
+    return y_true, y_score
+
+
+def top_counts(n, fractions):
+    """Usuarios en el top de cada fracción (mismo redondeo que Precision@k original)."""
+    return np.clip((np.asarray(fractions, dtype=np.float64) * n).astype(np.int64), 1, max(n, 1))
+
+
+def top_hits(y_true, y_score, n_top):
+    """
+    High-growth dentro del top `n_top[i]` por score, para varios tamaños a la vez.
+
+    Parameters:
+    -----------
+    y_true : array-like binario
+    y_score : array-like
+        Probabilidades o scores (mayor = más prioridad)
+    n_top : array-like de int
+        Tamaños de top (1..n)
+
+    Returns:
+    --------
+    np.ndarray int64 con los aciertos de cada tamaño de top (mismo orden que n_top)
+    """
+    y_true, y_score = _as_arrays(y_true, y_score)
+    n = len(y_score)
+    n_top = np.asarray(n_top, dtype=np.int64)
+    if n == 0:
+        return np.zeros(len(n_top), dtype=np.int64)
+
+    # Posición de corte de cada top en orden ascendente: top n_k = índices [n - n_k, n)
+    cuts = np.unique(n - n_top)
+    kth = cuts[cuts < n]
+    order = np.argpartition(y_score, kth) if len(kth) else np.arange(n)
+    labels = y_true[order]
+    del order
+
+    # Suma de etiquetas de cada bloque [cut_i, cut_{i+1}) y acumulado desde el final
+    block_hits = np.add.reduceat(labels, cuts, dtype=np.int64)
+    hits_from_cut = np.cumsum(block_hits[::-1])[::-1]
+    return hits_from_cut[np.searchsorted(cuts, n - n_top)]
+
+
+def top_k(y_score, k):
+    """
+    Posiciones de los `k` scores más altos, de mayor a menor, sin ordenar
+    el arreglo completo.
+
+    Parameters:
+    -----------
+    y_score : array-like
+        Probabilidades o scores (mayor = más prioridad)
+    k : int
+        Usuarios a seleccionar (se acota a 0..n)
+
+    Returns:
+    --------
+    np.ndarray int64 con las posiciones en `y_score`
+    """
+    y_score = y_score.to_numpy() if hasattr(y_score, 'to_numpy') else np.asarray(y_score)
+    n = len(y_score)
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(y_score, n - k)[n - k:] if k < n else np.arange(n)
+    return top[np.argsort(-y_score[top], kind='stable')].astype(np.int64)
+
+
+def precision_at_k(y_true, y_proba, k=0.20):
+    """
+    Calcula Precision@k: Si seleccionamos el top k% de usuarios según
+    la probabilidad predicha, ¿qué porcentaje son realmente high-growth?
+
+    Esta métrica es clave para el negocio porque responde:
+    "Si el equipo de Engagement contacta al top 20% de usuarios recomendados,
+    ¿qué tasa de acierto tendrá?"
+    """
+    n_top = top_counts(len(y_proba), [k])
+    return float(top_hits(y_true, y_proba, n_top)[0] / n_top[0])
+
+
+def ranking_table(y_true, y_score, ks=DEFAULT_KS):
+    """
+    Precision, recall y lift en el top k de cada fracción de `ks`.
+
+    Returns:
+    --------
+    list de diccionarios {k, usuarios, high_growth, precision, recall, lift}
+    """
+    y_true, y_score = _as_arrays(y_true, y_score)
+    n_top = top_counts(len(y_score), ks)
+    return _table(y_true, ks, n_top, top_hits(y_true, y_score, n_top))
+
+
+def _table(y_true, fractions, n_top, hits):
+    total_pos = int(np.asarray(y_true).sum())
+    base_rate = total_pos / len(y_true) if len(y_true) else 0.0
+    rows = []
+    for fraction, n_k, hits_k in zip(fractions, n_top, hits):
+        precision = hits_k / n_k
+        rows.append({
+            'k': float(fraction),
+            'usuarios': int(n_k),
+            'high_growth': int(hits_k),
+            'precision': float(precision),
+            'recall': float(hits_k / total_pos) if total_pos else 0.0,
+            'lift': float(precision / base_rate) if base_rate else 0.0,
+        })
+    return rows
+
+
+def budget_curve(y_true, y_score, step=BUDGET_STEP):
+    """
+    Curva de presupuesto: fracción de la base contactada (en orden de score)
+    vs fracción de high-growth capturados, con precisión y lift del tramo.
+
+    Returns:
+    --------
+    list de diccionarios {presupuesto, usuarios, high_growth, capturados, precision, lift}
+    """
+    return _budget_rows(ranking_table(y_true, y_score, _budget_points(step)))
+
+
+def _budget_points(step):
+    return [round(float(b), 4) for b in np.arange(step, 1 + step / 2, step)]
+
+
+def _budget_rows(rows):
+    return [{'presupuesto': row['k'], 'usuarios': row['usuarios'], 'high_growth': row['high_growth'],
+             'capturados': row['recall'], 'precision': row['precision'], 'lift': row['lift']}
+            for row in rows]
+
+
+def tier_summary(y_true, y_score, tiers=PRIORITY_TIERS):
+    """
+    Desempeño de cada nivel de prioridad (tramos consecutivos del ranking).
+
+    Returns:
+    --------
+    list de diccionarios {nivel, fraccion, usuarios, high_growth, precision, capturados, lift}
+    """
+    y_true, y_score = _as_arrays(y_true, y_score)
+    n_top = tier_top_counts(len(y_score), tiers)
+    hits = top_hits(y_true, y_score, n_top)
+    return _tiers(y_true, tiers, n_top, hits)
+
+
+def _tiers(y_true, tiers, n_top, hits):
+    total_pos = int(np.asarray(y_true).sum())
+    base_rate = total_pos / len(y_true) if len(y_true) else 0.0
+    rows = []
+    prev_n, prev_hits = 0, 0
+    for (name, fraction), n_k, hits_k in zip(tiers, n_top, hits):
+        users, tier_hits = int(n_k - prev_n), int(hits_k - prev_hits)
+        precision = tier_hits / users if users else 0.0
+        rows.append({
+            'nivel': name,
+            'fraccion': float(fraction),
+            'usuarios': users,
+            'high_growth': tier_hits,
+            'precision': float(precision),
+            'capturados': float(tier_hits / total_pos) if total_pos else 0.0,
+            'lift': float(precision / base_rate) if base_rate else 0.0,
+        })
+        prev_n, prev_hits = n_k, hits_k
+    return rows
+
+
+def ranking_report(y_true, y_score, ks=DEFAULT_KS, budget_step=BUDGET_STEP, tiers=PRIORITY_TIERS):
+    """
+    Tabla @k, curva de presupuesto y niveles de prioridad con una sola
+    partición de los scores.
+
+    Returns:
+    --------
+    dict serializable a JSON con n_usuarios, tasa_base, por_k, curva_presupuesto
+    y niveles_prioridad
+    """
+    y_true, y_score = _as_arrays(y_true, y_score)
+    n = len(y_score)
+    budget = _budget_points(budget_step)
+
+    n_k = top_counts(n, ks)
+    n_budget = top_counts(n, budget)
+    n_tiers = tier_top_counts(n, tiers)
+    hits = top_hits(y_true, y_score, np.concatenate([n_k, n_budget, n_tiers]))
+    hits_k, hits_budget, hits_tiers = np.split(hits, [len(n_k), len(n_k) + len(n_budget)])
+
+    total_pos = int(y_true.sum())
+    return {
+        'n_usuarios': int(n),
+        'high_growth': total_pos,
+        'tasa_base': float(total_pos / n) if n else 0.0,
+        'por_k': _table(y_true, ks, n_k, hits_k),
+        'curva_presupuesto': _budget_rows(_table(y_true, budget, n_budget, hits_budget)),
+        'niveles_prioridad': _tiers(y_true, tiers, n_tiers, hits_tiers),
+    }
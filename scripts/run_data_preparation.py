@@ -9,6 +9,7 @@ Cambios respecto a versión anterior:
 - Features binarios de negocio (is_multi_category, is_multi_shop)
 - Selección de 10-15 features "estrella" interpretables
 - Umbral HIGH_GROWTH_THRESHOLD documentado como constante
+- Modo streaming (--chunksize) para datasets que no caben en memoria
 
 Genera train/val/test datasets procesados listos para modelado.
 
@@ -19,17 +20,23 @@ Fecha: Noviembre 2025
 # Imports
 import pandas as pd
 import numpy as np
-import ast
 import pickle
+import argparse
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
 # Scikit-learn
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 import os
 
+# Pipeline de features reutilizable (scripts/feature_pipeline.py)
+from feature_engine import DICT_COLUMNS
+from feature_pipeline import FeaturePipeline
+from processed_io import OUTPUT_FORMATS, USER_SUMMARY, parquet_available, save_split
+from streaming_preparation import run_streaming_preparation
+from user_features import USER_SUMMARY_COLUMNS
+
 # =============================================================================
 # CONSTANTES DE NEGOCIO (DOCUMENTADAS)
 # =============================================================================
@@ -58,6 +65,20 @@ pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', 100)
 np.random.seed(RANDOM_SEED)
 
+# Argumentos de línea de comandos
+parser = argparse.ArgumentParser(description='Pipeline de preparación de datos')
+parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='parquet',
+                    help='Formato de los splits: parquet (tipos compactos, por defecto), csv o both')
+parser.add_argument('--chunksize', type=int, default=None,
+                    help='Modo streaming: procesa el CSV en chunks de este tamaño y escribe '
+                         'splits particionados (memoria acotada por el chunk)')
+args = parser.parse_args()
+
+OUTPUT_FORMAT = args.output_format
+if OUTPUT_FORMAT != 'csv' and not parquet_available():
+    print("⚠️ pyarrow no está instalado: los splits se exportarán solo como CSV")
+    OUTPUT_FORMAT = 'csv'
+
 print("="*80)
 print("PIPELINE DE PREPARACIÓN DE DATOS - VERSIÓN MEJORADA")
 print("="*80)
@@ -66,176 +87,100 @@ print(f"\n📌 CONSTANTES DE NEGOCIO:")
 print(f"   - HIGH_GROWTH_THRESHOLD = {HIGH_GROWTH_THRESHOLD} (top ~20% usuarios)")
 print(f"   - MULTI_CATEGORY_THRESHOLD = {MULTI_CATEGORY_THRESHOLD}")
 print(f"   - MULTI_SHOP_THRESHOLD = {MULTI_SHOP_THRESHOLD}")
+print(f"   - Formato de salida: {OUTPUT_FORMAT}")
+if args.chunksize:
+    print(f"   - Modo streaming: chunks de {args.chunksize:,} filas")
 print("="*80)
 
+DATASET_PATH = 'dataset_protegido (1).csv'
+output_dir = 'data/processed'
+models_dir = 'models'
+
+# ============================================================================
+# MODO STREAMING (--chunksize)
+# ============================================================================
+# Mismos features, encoding y scaling que el modo en memoria, pero por chunks
+# (ver streaming_preparation.py). El split se asigna por hash del uid.
+if args.chunksize:
+    pipeline, summary = run_streaming_preparation(
+        DATASET_PATH, output_dir, args.chunksize,
+        high_growth_threshold=HIGH_GROWTH_THRESHOLD,
+        multi_category_threshold=MULTI_CATEGORY_THRESHOLD,
+        multi_shop_threshold=MULTI_SHOP_THRESHOLD,
+        train_size=TRAIN_SIZE, val_size=VAL_SIZE,
+        output_format=OUTPUT_FORMAT,
+    )
+
+    os.makedirs(models_dir, exist_ok=True)
+    with open(f'{models_dir}/feature_engineering_pipeline.pkl', 'wb') as f:
+        pickle.dump(pipeline, f)
+    print(f"  ✓ Pipeline guardado: {models_dir}/feature_engineering_pipeline.pkl")
+
+    print("\n" + "="*80)
+    print("RESUMEN FINAL - PREPARACIÓN DE DATOS (MODO STREAMING)")
+    print("="*80)
+    print(f"\n📊 DATASET ORIGINAL: {summary['n_rows']:,} usuarios en {summary['n_parts']} chunks")
+    print(f"\n🎯 VARIABLE OBJETIVO:")
+    print(f"   - high_growth = 1 si delta_orders > {HIGH_GROWTH_THRESHOLD}")
+    print(f"   - Umbral corresponde al percentil {summary['percentil_umbral']:.1f}%")
+    print(f"   - {summary['high_growth_pct']:.1f}% usuarios high-growth")
+    print(f"\n📊 FEATURES FINALES: {len(pipeline.feature_cols)} features totales")
+    print(f"\n📂 DATASETS GENERADOS (particionados en {output_dir}/):")
+    for split_name, split_label in [('train', 'Train'), ('val', 'Validation'), ('test', 'Test')]:
+        rows = summary['split_rows'][split_name]
+        print(f"   - {split_label}: {rows:,} usuarios ({rows/summary['n_rows']*100:.1f}%) | "
+              f"high_growth {summary['split_high_growth_pct'][split_name]:.2f}%")
+    print(f"\n✅ PREPARACIÓN COMPLETADA EXITOSAMENTE")
+    print("="*80)
+    raise SystemExit(0)
+
 # ============================================================================
 # 1. CARGA DE DATOS
 # ============================================================================
-DATASET_PATH = 'dataset_protegido (1).csv'
 
 print(f"\n📂 Cargando dataset desde: {DATASET_PATH}")
 df = pd.read_csv(DATASET_PATH)
 print(f"✅ Dataset cargado: {df.shape[0]:,} filas × {df.shape[1]} columnas")
 
 # ============================================================================
-# 2. FUNCIONES AUXILIARES
+# 2. MOTOR DE FEATURES
 # ============================================================================
-
-def shannon_entropy(counts_dict):
-    """
-    Calcula el índice de Shannon (entropía) de un diccionario de conteos.
-
-    La entropía de Shannon mide la "diversidad" o "dispersión" de las compras:
-    - Entropía = 0: Usuario compra solo en 1 categoría/tienda
-    - Entropía alta: Usuario distribuye compras uniformemente
-
-    Interpretación de negocio:
-    - Alta diversidad → Usuario explorador → Oportunidad de cross-sell
-    - Baja diversidad → Usuario enfocado → Oportunidad de fidelización
-    """
-    if not isinstance(counts_dict, dict) or len(counts_dict) == 0:
-        return 0.0
-
-    total = sum(counts_dict.values())
-    if total == 0:
-        return 0.0
-
-    entropy = 0
-    for count in counts_dict.values():
-        if count > 0:
-            p = count / total
-            entropy -= p * np.log(p)
-
-    return entropy
-
-
-def get_dominant_item(counts_dict):
-    """Retorna el item con mayor número de órdenes."""
-    if not isinstance(counts_dict, dict) or len(counts_dict) == 0:
-        return 'unknown'
-    return max(counts_dict, key=counts_dict.get)
-
-
-def get_dominant_ratio(counts_dict):
-    """Calcula el ratio de concentración en el item dominante."""
-    if not isinstance(counts_dict, dict) or len(counts_dict) == 0:
-        return 0.0
-
-    total = sum(counts_dict.values())
-    if total == 0:
-        return 0.0
-
-    max_count = max(counts_dict.values())
-    return max_count / total
-
-
-def get_brand001_ratio(brand_dict, total_orders):
-    """Calcula el ratio de órdenes de brand001 (marca líder del mercado)."""
-    if not isinstance(brand_dict, dict) or total_orders == 0:
-        return 0.0
-    return brand_dict.get('brand001', 0) / total_orders
-
+# Los features por usuario se calculan con FeaturePipeline (feature_pipeline.py),
+# compartido con el modo streaming y con el scoring de usuarios nuevos: el
+# parser por lotes (dict_parser.py) emite la tabla larga (row, key, count) de
+# cada columna diccionario y el motor vectorizado (feature_engine.py) calcula
+# los features con reducciones agrupadas de NumPy. Las funciones fila a fila (shannon_entropy, ...) viven
+# en feature_engine.py como implementación de referencia.
 
 # ============================================================================
 # 3. FEATURE ENGINEERING
 # ============================================================================
 
-# 3.1 Parsear columnas diccionario
-dict_columns = ['main_category_counts', 'ka_type_counts', 'shop_name_counts', 'brand_name_counts']
-
-print("\n🔧 Parseando columnas de diccionarios...")
-for col in dict_columns:
-    if col in df.columns:
-        try:
-            df[col] = df[col].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-            print(f"  ✓ {col} parseado correctamente")
-        except Exception as e:
-            print(f"  ✗ Error parseando {col}: {str(e)}")
-
-# -----------------------------------------------------------------------------
-# 3.2 CONTEOS BASE (solo para cálculos intermedios, NO para modelo final)
-# -----------------------------------------------------------------------------
-print("\n🔧 Calculando conteos base (uso interno)...")
-df['_num_categories'] = df['main_category_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-df['_num_shops'] = df['shop_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-df['_num_brands'] = df['brand_name_counts'].apply(lambda x: len(x) if isinstance(x, dict) else 0)
-
-# -----------------------------------------------------------------------------
-# 3.3 FEATURES NORMALIZADOS POR ORDEN (reemplazan conteos crudos)
-# Capturan "intensidad de exploración" independiente del volumen de órdenes
-# -----------------------------------------------------------------------------
-print("\n🔧 Creando features NORMALIZADOS (reemplazan conteos crudos)...")
-
-# Categorías por orden: ¿Cuántas categorías distintas usa en promedio por orden?
-df['categories_per_order'] = df['_num_categories'] / df['total_orders']
-print(f"  ✓ categories_per_order: exploración de categorías normalizada")
-
-# Tiendas por orden: ¿Cuántas tiendas distintas visita en promedio por orden?
-df['shops_per_order'] = df['_num_shops'] / df['total_orders']
-print(f"  ✓ shops_per_order: diversidad de tiendas normalizada")
-
-# -----------------------------------------------------------------------------
-# 3.4 ÍNDICES DE DIVERSIDAD (Shannon)
-# -----------------------------------------------------------------------------
-print("\n🔧 Calculando índices de diversidad Shannon...")
-
-df['category_diversity'] = df['main_category_counts'].apply(shannon_entropy)
-print(f"  ✓ category_diversity: índice Shannon para categorías")
-
-df['shop_diversity'] = df['shop_name_counts'].apply(shannon_entropy)
-print(f"  ✓ shop_diversity: índice Shannon para tiendas")
-
-# -----------------------------------------------------------------------------
-# 3.5 RATIOS DE CONCENTRACIÓN
-# -----------------------------------------------------------------------------
-print("\n🔧 Calculando ratios de concentración...")
-
-df['dominant_category_ratio'] = df['main_category_counts'].apply(get_dominant_ratio)
-print(f"  ✓ dominant_category_ratio: concentración en categoría favorita")
-
-df['brand001_ratio'] = df.apply(
-    lambda row: get_brand001_ratio(row['brand_name_counts'], row['total_orders']),
-    axis=1
-)
-print(f"  ✓ brand001_ratio: afinidad con marca líder")
-
-# -----------------------------------------------------------------------------
-# 3.6 FEATURES BINARIOS DE NEGOCIO
-# -----------------------------------------------------------------------------
-print("\n🔧 Creando features binarios de negocio...")
-
-df['is_multi_category'] = (df['_num_categories'] >= MULTI_CATEGORY_THRESHOLD).astype(int)
-pct_multi_cat = df['is_multi_category'].mean() * 100
-print(f"  ✓ is_multi_category: 1 si usa >={MULTI_CATEGORY_THRESHOLD} categorías ({pct_multi_cat:.1f}% de usuarios)")
-
-df['is_multi_shop'] = (df['_num_shops'] >= MULTI_SHOP_THRESHOLD).astype(int)
-pct_multi_shop = df['is_multi_shop'].mean() * 100
-print(f"  ✓ is_multi_shop: 1 si usa >={MULTI_SHOP_THRESHOLD} tiendas ({pct_multi_shop:.1f}% de usuarios)")
-
-# -----------------------------------------------------------------------------
-# 3.7 FEATURES TEMPORALES
-# -----------------------------------------------------------------------------
-print("\n🔧 Derivando features temporales...")
-
 df['first_order_date'] = pd.to_datetime(df['first_order_date'])
 df['fourth_order_date'] = pd.to_datetime(df['fourth_order_date'])
 
 # Fecha de referencia para calcular recencia
 REFERENCE_DATE = df['first_order_date'].max()
-df['days_since_first_order'] = (REFERENCE_DATE - df['first_order_date']).dt.days
-print(f"  ✓ days_since_first_order: antigüedad del usuario")
-print(f"  ✓ efo_to_four: velocidad de adopción (ya existe en dataset)")
 
-# -----------------------------------------------------------------------------
-# 3.8 FEATURES DE AFINIDAD
-# -----------------------------------------------------------------------------
-print("\n🔧 Creando features de afinidad...")
+pipeline = FeaturePipeline(
+    high_growth_threshold=HIGH_GROWTH_THRESHOLD,
+    multi_category_threshold=MULTI_CATEGORY_THRESHOLD,
+    multi_shop_threshold=MULTI_SHOP_THRESHOLD,
+)
+pipeline.reference_date = REFERENCE_DATE
 
-df['dominant_category'] = df['main_category_counts'].apply(get_dominant_item)
-print(f"  ✓ dominant_category: categoría preferida del usuario")
+# Parseo de las columnas diccionario y todos los features derivados
+# (conteos, normalizados, Shannon, ratios, binarios, temporales, afinidad)
+print("\n🔧 Calculando features por usuario con FeaturePipeline.derive...")
+derived = pipeline.derive(df)
 
-df['dominant_ka_type'] = df['ka_type_counts'].apply(get_dominant_item)
-print(f"  ✓ dominant_ka_type: tipo de tienda preferido")
+# El texto crudo ya no se necesita: liberar memoria
+df = df.drop(columns=DICT_COLUMNS)
+df[derived.columns] = derived
+print(f"  ✓ {derived.shape[1]} features (REFERENCE_DATE = {REFERENCE_DATE.date()}): "
+      f"{', '.join(derived.columns)} | is_multi_category {df['is_multi_category'].mean() * 100:.1f}%, "
+      f"is_multi_shop {df['is_multi_shop'].mean() * 100:.1f}% de usuarios")
+del derived
 
 print("\n✅ Feature Engineering completado")
 
@@ -244,7 +189,7 @@ print("\n✅ Feature Engineering completado")
 # ============================================================================
 
 print("\n🎯 Creando variable objetivo...")
-df['high_growth'] = (df['delta_orders'] > HIGH_GROWTH_THRESHOLD).astype(int)
+df['high_growth'] = pipeline.target(df)
 
 # Calcular percentil real del umbral
 percentil_real = (df['delta_orders'] <= HIGH_GROWTH_THRESHOLD).mean() * 100
@@ -260,38 +205,10 @@ print(f"  📌 Distribución: {df['high_growth'].value_counts(normalize=True).to
 print("\n⭐ SELECCIÓN DE FEATURES ESTRELLA")
 print("="*60)
 
-# Features NUMÉRICOS (9 features)
-numeric_features = [
-    # VELOCIDAD (predictor #1 según EDA)
-    'efo_to_four',              # Días hasta 4ta orden (CLAVE)
-
-    # ANTIGÜEDAD
-    'days_since_first_order',   # Antigüedad del usuario
-
-    # DIVERSIDAD (normalizados - NO conteos crudos)
-    'categories_per_order',     # Categorías por orden
-    'shops_per_order',          # Tiendas por orden
-    'category_diversity',       # Índice Shannon categorías
-    'shop_diversity',           # Índice Shannon tiendas
-
-    # CONCENTRACIÓN Y LEALTAD
-    'dominant_category_ratio',  # % órdenes en categoría favorita
-    'brand001_ratio',           # Afinidad con marca líder
-]
-
-# Features BINARIOS (2 features)
-binary_features = [
-    'is_multi_category',        # ¿Compra en 3+ categorías?
-    'is_multi_shop',            # ¿Compra en 5+ tiendas?
-]
-
-# Features CATEGÓRICOS (4 features)
-categorical_features = [
-    'categoria_recencia',       # CLAVE: 7x impacto
-    'r_segment',                # Segmentación negocio
-    'city_token',               # Diferencias geográficas
-    'dominant_category',        # Preferencia para personalización
-]
+# Definidos en user_features.py (los mismos que usa FeaturePipeline)
+numeric_features = pipeline.numeric_features
+binary_features = pipeline.binary_features
+categorical_features = pipeline.categorical_features
 
 all_features = numeric_features + binary_features + categorical_features
 
@@ -312,23 +229,22 @@ else:
 # 6. ENCODING Y SCALING
 # ============================================================================
 
-# 6.1 One-Hot Encoding
-print("\n🔧 Aplicando One-Hot Encoding...")
-
-df_model = df[all_features + ['high_growth', 'delta_orders', 'uid']].copy()
-df_encoded = pd.get_dummies(df_model, columns=categorical_features, drop_first=True, dtype=int)
+# 6.1 Ajuste: vocabularios one-hot (ordenados, sin la primera categoría, igual
+# que pd.get_dummies(drop_first=True)) y StandardScaler de los numéricos
+print("\n🔧 Ajustando vocabularios One-Hot y StandardScaler...")
+pipeline.fit_features(df[all_features])
 
-encoded_cols = [col for col in df_encoded.columns if col not in df_model.columns]
-print(f"  ✓ Encoding completado: {len(categorical_features)} categóricas → {len(encoded_cols)} dummies")
+encoded_cols = pipeline.encoded_cols
+print(f"  ✓ Encoding: {len(categorical_features)} categóricas → {len(encoded_cols)} dummies")
 
-# 6.2 Scaling
-print("\n🔧 Aplicando StandardScaler a variables numéricas...")
+# 6.2 Encoding + Scaling (columnas estables: categorías no vistas → dummies en 0)
+print("\n🔧 Aplicando One-Hot Encoding y StandardScaler...")
+df_encoded = pipeline.encode(df[all_features])
+df_encoded['high_growth'] = df['high_growth']
+df_encoded['delta_orders'] = df['delta_orders']
+df_encoded['uid'] = df['uid']
 
-scaler = StandardScaler()
-cols_to_scale = numeric_features.copy()
-df_encoded[cols_to_scale] = scaler.fit_transform(df_encoded[cols_to_scale])
-
-print(f"  ✓ Scaling completado")
+print(f"  ✓ Encoding y scaling completados")
 
 # ============================================================================
 # 7. SPLITTING
@@ -337,7 +253,7 @@ print(f"  ✓ Scaling completado")
 print("\n🔧 Realizando split estratificado...")
 
 # Separar features y targets
-feature_cols = [col for col in df_encoded.columns if col not in ['uid', 'high_growth', 'delta_orders']]
+feature_cols = pipeline.feature_cols
 X = df_encoded[feature_cols]
 y = df_encoded['high_growth']
 y_regression = df_encoded['delta_orders']
@@ -394,35 +310,26 @@ test_df['uid'] = uid_test.values
 print("\n💾 Guardando datasets procesados...")
 
 # Crear directorios
-output_dir = 'data/processed'
-models_dir = 'models'
 os.makedirs(output_dir, exist_ok=True)
 os.makedirs(models_dir, exist_ok=True)
 
-# Guardar CSVs
-train_df.to_csv(f'{output_dir}/train.csv', index=False)
-print(f"  ✓ Train guardado: {output_dir}/train.csv")
-
-val_df.to_csv(f'{output_dir}/val.csv', index=False)
-print(f"  ✓ Validation guardado: {output_dir}/val.csv")
-
-test_df.to_csv(f'{output_dir}/test.csv', index=False)
-print(f"  ✓ Test guardado: {output_dir}/test.csv")
-
-# Guardar pipeline
-pipeline_dict = {
-    'scaler': scaler,
-    'numeric_features': numeric_features,
-    'binary_features': binary_features,
-    'categorical_features': categorical_features,
-    'feature_cols': feature_cols,
-    'high_growth_threshold': HIGH_GROWTH_THRESHOLD,
-    'multi_category_threshold': MULTI_CATEGORY_THRESHOLD,
-    'multi_shop_threshold': MULTI_SHOP_THRESHOLD,
-}
-
+# Guardar splits (Parquet con tipos compactos; CSV como exportación opcional)
+for split_name, split_label, split_df in [('train', 'Train', train_df),
+                                          ('val', 'Validation', val_df),
+                                          ('test', 'Test', test_df)]:
+    for path in save_split(split_df, split_name, output_dir, OUTPUT_FORMAT):
+        print(f"  ✓ {split_label} guardado: {path}")
+
+# Resumen liviano por usuario (features sin escalar, sin diccionarios) para el dashboard
+df['split'] = 'train'
+df.loc[X_val.index, 'split'] = 'val'
+df.loc[X_test.index, 'split'] = 'test'
+for path in save_split(df[USER_SUMMARY_COLUMNS], USER_SUMMARY, output_dir, OUTPUT_FORMAT):
+    print(f"  ✓ Resumen por usuario guardado: {path}")
+
+# Guardar pipeline (FeaturePipeline: transforma usuarios crudos nuevos al layout de feature_cols)
 with open(f'{models_dir}/feature_engineering_pipeline.pkl', 'wb') as f:
-    pickle.dump(pipeline_dict, f)
+    pickle.dump(pipeline, f)
 print(f"  ✓ Pipeline guardado: {models_dir}/feature_engineering_pipeline.pkl")
 
 # ============================================================================
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Scoring batch de usuarios crudos con el mejor clasificador
+==========================================================
+
+Calcula la probabilidad de alto crecimiento de un extracto completo de
+usuarios (CSV o Parquet con el esquema del CSV original) y le asigna su
+nivel de prioridad de Engagement:
+
+- alta  → top 20% de probabilidad
+- media → siguiente 30%
+- baja  → 50% restante
+
+El extracto se lee por chunks y cada chunk pasa por el FeaturePipeline y
+`models/best_classifier.pkl` en procesos worker (cada worker carga los
+artefactos una sola vez). Como los niveles dependen de la población
+completa, el scoring escribe primero (uid, probabilidad) por chunk en un
+directorio temporal y solo conserva en memoria las probabilidades
+(4 bytes por usuario: ~40 MB para 10M usuarios); luego calcula los cortes
+globales y escribe la salida final chunk a chunk. La memoria pico queda
+acotada por chunksize × workers.
+
+Uso (desde la raíz del proyecto):
+    python scripts/score.py --input extracto.csv --output scores.parquet
+    python scripts/score.py --input extracto.parquet --output scores.csv --workers 8 --chunksize 200000
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scoring import (MODEL_PATH, PIPELINE_PATH, PRIORITY_TIERS, assign_tiers, load_artifacts,
+                     predict_raw, tier_cutoffs)
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Artefactos cargados una vez por proceso worker (ver _init_worker)
+_worker_state = {}
+
+
+# =============================================================================
+# LECTURA / ESCRITURA
+# =============================================================================
+
+def _is_parquet(path):
+    return path.lower().endswith('.parquet')
+
+
+def iter_raw_chunks(path, chunksize, columns=None):
+    """Itera el extracto crudo (CSV o Parquet) en DataFrames de hasta `chunksize` filas."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def scan_reference_date(path, chunksize):
+    """Máximo de first_order_date del extracto (lee solo esa columna)."""
+    reference_date = None
+    for chunk in iter_raw_chunks(path, chunksize, columns=['first_order_date']):
+        chunk_max = pd.to_datetime(chunk['first_order_date']).max()
+        if reference_date is None or chunk_max > reference_date:
+            reference_date = chunk_max
+    return reference_date
+
+
+class _ScoreWriter:
+    """Escritura incremental de la salida final (Parquet o CSV)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._first = True
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+
+def _init_worker(model_path, pipeline_path, reference_date):
+    """Carga modelo y pipeline una vez por proceso."""
+    model, feature_cols, pipeline = load_artifacts(model_path, pipeline_path)
+    # El paralelismo lo dan los procesos: un hilo por worker evita sobresuscripción
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    if reference_date is not None:
+        pipeline.reference_date = reference_date
+    _worker_state.update(model=model, feature_cols=feature_cols, pipeline=pipeline)
+
+
+def _score_chunk(chunk):
+    """Scorea un chunk crudo en el worker; retorna solo (uid, probabilidad)."""
+    probabilities = predict_raw(chunk, _worker_state['model'], _worker_state['feature_cols'],
+                                _worker_state['pipeline'])
+    return pd.DataFrame({'uid': chunk['uid'].to_numpy(), 'probability': probabilities})
+
+
+def _score_in_order(chunks, workers, initargs):
+    """
+    Scorea los chunks preservando el orden de entrada, con a lo sumo
+    2 × workers chunks en vuelo (la lectura no se adelanta sin límite).
+    """
+    if workers <= 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            yield len(chunk), _score_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), executor.submit(_score_chunk, chunk)))
+            del chunk
+            if len(pending) >= 2 * workers:
+                n_rows, future = pending.popleft()
+                yield n_rows, future.result()
+        while pending:
+            n_rows, future = pending.popleft()
+            yield n_rows, future.result()
+
+
+# =============================================================================
+# SCORING
+# =============================================================================
+
+def score_file(input_path, output_path, model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH,
+               workers=None, chunksize=DEFAULT_CHUNKSIZE, reference_date='pipeline'):
+    """
+    Scorea un extracto crudo completo y escribe uid, probability, priority_tier.
+
+    Parameters:
+    -----------
+    input_path : str
+        Extracto crudo (.csv o .parquet)
+    output_path : str
+        Salida (.parquet o .csv)
+    model_path, pipeline_path : str
+        Artefactos del entrenamiento
+    workers : int, optional
+        Procesos worker (por defecto, todos los núcleos)
+    chunksize : int
+        Filas por chunk
+    reference_date : str
+        'pipeline' (fecha de referencia del entrenamiento), 'extract'
+        (máximo de first_order_date del extracto) o una fecha YYYY-MM-DD
+
+    Returns:
+    --------
+    dict con filas scoreadas, tiempos, filas/s y cortes por nivel
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    if reference_date == 'pipeline':
+        override = None
+    elif reference_date == 'extract':
+        override = scan_reference_date(input_path, chunksize)
+        print(f"  ✓ Fecha de referencia del extracto: {override.date()}")
+    else:
+        override = pd.Timestamp(reference_date)
+
+    # ------------------------------------------------------------------
+    # 1. Probabilidades por chunk (workers) → particiones temporales
+    # ------------------------------------------------------------------
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.score-', dir=output_dir)
+    try:
+        probabilities = []
+        n_rows = 0
+        chunks = iter_raw_chunks(input_path, chunksize)
+        initargs = (model_path, pipeline_path, override)
+        for part, (chunk_rows, scored) in enumerate(_score_in_order(chunks, workers, initargs)):
+            scored.to_pickle(os.path.join(tmp_dir, f'part-{part:05d}.pkl'))
+            probabilities.append(scored['probability'].to_numpy())
+            n_rows += chunk_rows
+            elapsed = time.perf_counter() - start
+            print(f"  ✓ Chunk {part:05d}: {n_rows:,} usuarios scoreados ({n_rows / elapsed:,.0f} filas/s)")
+        n_parts = len(probabilities)
+        score_time = time.perf_counter() - start
+
+        # --------------------------------------------------------------
+        # 2. Cortes globales de prioridad y salida final
+        # --------------------------------------------------------------
+        probabilities = np.concatenate(probabilities) if probabilities else np.array([], dtype=np.float32)
+        cutoffs = tier_cutoffs(probabilities)
+        del probabilities
+
+        writer = _ScoreWriter(output_path)
+        tier_counts = {name: 0 for name, _ in PRIORITY_TIERS}
+        try:
+            for part in range(n_parts):
+                part_path = os.path.join(tmp_dir, f'part-{part:05d}.pkl')
+                scored = pd.read_pickle(part_path)
+                os.remove(part_path)
+                scored['priority_tier'] = assign_tiers(scored['probability'].to_numpy(), cutoffs)
+                for name, count in scored['priority_tier'].value_counts().items():
+                    tier_counts[name] += int(count)
+                writer.write(scored)
+        finally:
+            writer.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    total_time = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'workers': workers,
+        'score_time': score_time,
+        'total_time': total_time,
+        'rows_per_second': n_rows / total_time if total_time else 0.0,
+        'cutoffs': dict(zip([name for name, _ in PRIORITY_TIERS], cutoffs)),
+        'tier_counts': tier_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', required=True, help='Extracto crudo (.csv o .parquet)')
+    parser.add_argument('--output', required=True, help='Salida (.parquet o .csv)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--pipeline', default=PIPELINE_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='Procesos worker (por defecto, núcleos)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--reference-date', default='pipeline',
+                        help="'pipeline' (por defecto), 'extract' o una fecha YYYY-MM-DD")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("SCORING BATCH - PROBABILIDAD DE ALTO CRECIMIENTO")
+    print("="*80)
+    print(f"📂 Entrada: {args.input}")
+    print(f"💾 Salida: {args.output}")
+    print(f"⚙️ Workers: {args.workers or os.cpu_count()} | chunksize: {args.chunksize:,}")
+
+    result = score_file(args.input, args.output, args.model, args.pipeline,
+                        workers=args.workers, chunksize=args.chunksize,
+                        reference_date=args.reference_date)
+
+    print(f"\n📊 RESUMEN:")
+    print(f"   - Usuarios scoreados: {result['rows']:,}")
+    print(f"   - Tiempo de scoring: {result['score_time']:.1f} s")
+    print(f"   - Tiempo total (incluye niveles y escritura): {result['total_time']:.1f} s")
+    print(f"   - Throughput: {result['rows_per_second']:,.0f} filas/s")
+    print(f"\n🎯 NIVELES DE PRIORIDAD:")
+    for (name, fraction), count in zip(PRIORITY_TIERS, result['tier_counts'].values()):
+        cutoff = result['cutoffs'].get(name)
+        cutoff_text = f" (probabilidad >= {cutoff:.4f})" if cutoff is not None else ''
+        print(f"   - {name.upper():<6} objetivo {fraction:.0%}: {count:,} usuarios{cutoff_text}")
+
+    print(f"\n✅ SCORING COMPLETADO")
+    print("="*80)
+
+
+if __name__ == '__main__':
+    main()
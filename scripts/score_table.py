@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tabla de probabilidades precalculadas por versión del modelo
+============================================================
+
+La página de Predicciones del dashboard filtraba `test_df` por uid tres
+veces (un escaneo booleano cada una) y llamaba `predict_proba` y `predict`
+en cada clic, y solo ofrecía una muestra de 100 usuarios del test. Este
+módulo scorea una sola vez a todos los usuarios de train/val/test con
+`best_classifier.pkl` (por lotes, con `processed_io.iter_split_chunks`) y
+guarda una tabla indexada por uid:
+
+- uid (índice), split, high_growth real, category_diversity
+- probability (float32), prediction (p > 0.5, la regla de `predict`)
+- priority_tier: alta/media/baja sobre todos los usuarios scoreados
+  (`scoring.PRIORITY_TIERS`)
+
+La tabla se guarda en `models/score_cache/scores_<huella>.parquet`, donde
+la huella es el SHA-256 (16 hex) de `best_classifier.pkl`: al re-entrenar
+cambia la huella y la tabla se recalcula; las anteriores quedan como caché
+de versiones previas. La búsqueda de un uid es O(1) (índice hash de pandas).
+
+Uso (desde la raíz del proyecto):
+    python scripts/score_table.py
+    python scripts/score_table.py --model models/best_classifier.pkl --data data/processed
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from processed_io import DEFAULT_CHUNK_ROWS, PROCESSED_DIR, SPLITS, iter_split_chunks
+from scoring import MODEL_PATH, PIPELINE_PATH, assign_tiers, tier_cutoffs
+from user_features import onehot_to_categorical
+
+SCORE_CACHE_DIR = 'models/score_cache'
+
+# Columnas de los splits que se copian a la tabla (además del uid)
+INFO_COLS = ['high_growth', 'category_diversity']
+
+
+def model_fingerprint(model_path=MODEL_PATH):
+    """Huella del modelo: primeros 16 hex del SHA-256 del archivo."""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def score_table_path(fingerprint, cache_dir=SCORE_CACHE_DIR):
+    return os.path.join(cache_dir, f'scores_{fingerprint}.parquet')
+
+
+def build_score_table(model_data, data_dir=PROCESSED_DIR, pipeline_path=PIPELINE_PATH,
+                      chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Scorea todos los usuarios de los splits procesados.
+
+    Parameters:
+    -----------
+    model_data : dict
+        Contenido de `best_classifier.pkl` ('model', 'feature_cols')
+    data_dir : str
+        Directorio de los splits procesados
+    pipeline_path : str
+        FeaturePipeline (solo para modelos con categóricas nativas)
+    chunk_rows : int
+        Filas por lote de scoring
+
+    Returns:
+    --------
+    pd.DataFrame indexado por uid con split, high_growth, category_diversity,
+    probability, prediction y priority_tier
+    """
+    model, feature_cols = model_data['model'], model_data['feature_cols']
+    pipeline = None
+    if getattr(model, 'enable_categorical', False):
+        with open(pipeline_path, 'rb') as f:
+            pipeline = pickle.load(f)
+
+    parts = []
+    for name in SPLITS:
+        for chunk in iter_split_chunks(name, data_dir, chunk_rows):
+            if pipeline is not None:
+                X = onehot_to_categorical(chunk, pipeline.vocabularies, pipeline.categorical_features)[feature_cols]
+            else:
+                X = chunk[feature_cols]
+            part = chunk[['uid'] + [col for col in INFO_COLS if col in chunk.columns]].copy()
+            part['split'] = name
+            part['probability'] = model.predict_proba(X)[:, 1].astype(np.float32)
+            parts.append(part)
+
+    table = pd.concat(parts, ignore_index=True)
+    table['split'] = table['split'].astype('category')
+    table['prediction'] = (table['probability'] > 0.5).astype(np.int8)
+    probabilities = table['probability'].to_numpy()
+    table['priority_tier'] = pd.Categorical(assign_tiers(probabilities, tier_cutoffs(probabilities)))
+    return table.set_index('uid')
+
+
+def load_score_table(model_path=MODEL_PATH, data_dir=PROCESSED_DIR, cache_dir=SCORE_CACHE_DIR,
+                     fingerprint=None, model_data=None):
+    """
+    Tabla de probabilidades de la versión actual del modelo: la lee de la
+    caché si existe y si no la calcula y la guarda.
+
+    Parameters:
+    -----------
+    fingerprint : str, optional
+        Huella ya calculada de `model_path`
+    model_data : dict, optional
+        Modelo ya cargado (se carga de `model_path` si hace falta scorear)
+
+    Returns:
+    --------
+    pd.DataFrame indexado por uid (ver `build_score_table`)
+    """
+    fingerprint = fingerprint or model_fingerprint(model_path)
+    path = score_table_path(fingerprint, cache_dir)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    if model_data is None:
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
+    table = build_score_table(model_data, data_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Escritura atómica: otro proceso (sesión del dashboard) puede estar leyendo
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    table.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=MODEL_PATH, help='Modelo a scorear')
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de splits procesados')
+    parser.add_argument('--cache-dir', default=SCORE_CACHE_DIR, help='Directorio de tablas por versión')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("TABLA DE PROBABILIDADES POR VERSIÓN DEL MODELO")
+    print("="*80)
+    fingerprint = model_fingerprint(args.model)
+    path = score_table_path(fingerprint, args.cache_dir)
+    print(f"🔑 Huella de {args.model}: {fingerprint}")
+    if os.path.exists(path):
+        print(f"  ✓ Ya existe: {path}")
+        return
+
+    start = time.perf_counter()
+    table = load_score_table(args.model, args.data, args.cache_dir, fingerprint)
+    elapsed = time.perf_counter() - start
+    print(f"  ✓ {len(table):,} usuarios scoreados en {elapsed:.1f} s ({len(table) / elapsed:,.0f} usuarios/s)")
+    print(f"  ✓ Niveles: {table['priority_tier'].value_counts().to_dict()}")
+    print(f"💾 Tabla guardada en {path} ({os.path.getsize(path) / 1024**2:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Utilidades de inferencia sobre usuarios crudos
+==============================================
+
+Carga los artefactos del entrenamiento (`models/best_classifier.pkl` y
+`models/feature_engineering_pipeline.pkl`) y calcula la probabilidad de
+alto crecimiento de lotes de usuarios crudos (esquema del CSV original).
+Lo comparten el scoring batch (`score.py`) y el servicio HTTP.
+
+Los niveles de prioridad siguen el resumen ejecutivo de `train_models.py`:
+
+- ALTA PRIORIDAD (top 20%): Cupón 20% en categoría dominante
+- MEDIA PRIORIDAD (next 30%): Email de reactivación + cupón 10%
+- BAJA PRIORIDAD (bottom 50%): Comunicación genérica de bajo costo
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import pickle
+import warnings
+
+import numpy as np
+
+MODEL_PATH = 'models/best_classifier.pkl'
+PIPELINE_PATH = 'models/feature_engineering_pipeline.pkl'
+
+# (nivel, fracción de la población), de mayor a menor probabilidad
+PRIORITY_TIERS = [('alta', 0.20), ('media', 0.30), ('baja', 0.50)]
+
+
+def load_artifacts(model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH):
+    """
+    Carga el modelo y el FeaturePipeline persistidos.
+
+    Returns:
+    --------
+    tuple (model, feature_cols, pipeline)
+    """
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+    with open(pipeline_path, 'rb') as f:
+        pipeline = pickle.load(f)
+
+    if isinstance(pipeline, dict):
+        raise ValueError(f"{pipeline_path} es un pipeline antiguo (diccionario) que no puede "
+                         "transformar usuarios crudos: re-ejecutar run_data_preparation.py")
+    return model_data['model'], model_data['feature_cols'], pipeline
+
+
+def predict_raw(raw_df, model, feature_cols, pipeline):
+    """
+    Probabilidad de high_growth para un lote de usuarios crudos.
+
+    Parameters:
+    -----------
+    raw_df : pd.DataFrame
+        Usuarios con el esquema del CSV crudo
+    model : estimador con predict_proba
+    feature_cols : list
+        Columnas con las que se entrenó el modelo
+    pipeline : FeaturePipeline
+        Pipeline ajustado en la preparación de datos
+
+    Returns:
+    --------
+    np.ndarray float32 con la probabilidad de la clase positiva
+    """
+    if getattr(model, 'enable_categorical', False):
+        # XGBoost con categóricas nativas: DataFrame con columnas `category`
+        X = pipeline.transform(raw_df, layout='categorical')[feature_cols]
+        return model.predict_proba(X)[:, 1].astype(np.float32)
+
+    X = pipeline.transform(raw_df)
+    # Mismo orden que en entrenamiento; dummies ausentes en el pipeline → 0
+    X = X.reindex(columns=feature_cols, fill_value=0).to_numpy(dtype=np.float32)
+    # Matriz NumPy: evita la validación de nombres de columnas del DataFrame en
+    # cada llamada (domina la latencia en lotes pequeños); el orden ya está alineado
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return model.predict_proba(X)[:, 1].astype(np.float32)
+
+
+def tier_top_counts(n, tiers=PRIORITY_TIERS):
+    """
+    Usuarios acumulados hasta el final de cada nivel (el último cubre a
+    todos). Mismo redondeo que `ranking_metrics.top_counts` (piso, mínimo 1),
+    así el reporte de ranking, la tabla de scores y la lista de campaña
+    cuentan los mismos usuarios por nivel.
+
+    Returns:
+    --------
+    np.ndarray int64 con un tamaño de top por nivel
+    """
+    cumulative = np.cumsum([fraction for _, fraction in tiers])
+    counts = np.clip((cumulative * n).astype(np.int64), 1, max(n, 1))
+    counts[-1] = n
+    return counts
+
+
+def tier_cutoffs(probabilities, tiers=PRIORITY_TIERS):
+    """
+    Probabilidades de corte entre niveles sobre la población completa.
+
+    Parameters:
+    -----------
+    probabilities : np.ndarray
+        Probabilidades de todos los usuarios scoreados
+    tiers : list
+        [(nivel, fracción)] de mayor a menor prioridad
+
+    Returns:
+    --------
+    list con el corte inferior de cada nivel salvo el último
+    (p >= corte[i] → tiers[i])
+    """
+    n = len(probabilities)
+    cutoffs = []
+    for k in tier_top_counts(n, tiers)[:-1]:
+        # k-ésima probabilidad más alta sin ordenar el arreglo completo
+        cutoffs.append(float(np.partition(probabilities, n - k)[n - k]) if n else 1.0)
+    return cutoffs
+
+
+def assign_tiers(probabilities, cutoffs, tiers=PRIORITY_TIERS):
+    """
+    Asigna el nivel de prioridad de cada probabilidad según los cortes.
+
+    Returns:
+    --------
+    np.ndarray de strings con el nivel ('alta', 'media', 'baja')
+    """
+    names = np.array([name for name, _ in tiers], dtype=object)
+    # Cortes descendentes: contar cuántos cortes supera cada probabilidad
+    level = np.zeros(len(probabilities), dtype=np.int64)
+    for cutoff in cutoffs:
+        level += probabilities < cutoff
+    return names[level]
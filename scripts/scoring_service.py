@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Servicio HTTP local de scoring en tiempo real
+=============================================
+
+Servidor HTTP (stdlib, sin dependencias extra) que carga una sola vez
+`models/best_classifier.pkl` y el FeaturePipeline y responde la
+probabilidad de alto crecimiento de usuarios crudos.
+
+Las peticiones concurrentes se agrupan en micro-lotes: cada hilo de
+petición encola sus usuarios y un único hilo de scoring los junta (hasta
+`--max-batch-size` usuarios o `--max-wait-ms` desde el primero) en una
+sola llamada a `FeaturePipeline.transform` + `predict_proba`. El costo fijo
+por llamada se reparte entre todas las peticiones del lote.
+
+Con `--compiled`, los micro-lotes de hasta `--compiled-max-rows` usuarios
+se evalúan con el ensamble compilado de `tree_compiler.py` (sin el costo
+fijo de `predict_proba` nativo); los lotes más grandes siguen usando el
+predictor nativo, más rápido a partir de unas decenas de usuarios.
+
+Endpoints:
+    POST /score     Un usuario (objeto JSON) o una lista de usuarios con el
+                    esquema del CSV crudo; las columnas de conteos pueden
+                    venir como objetos JSON o como texto str(dict).
+                    → {"predictions": [{"uid": ..., "probability": ...}]}
+    GET  /metrics   Latencias p50/p99 (ms), peticiones y tamaño de lote
+    GET  /health    Estado del servicio
+
+Uso (desde la raíz del proyecto):
+    python scripts/scoring_service.py --port 8000
+    python scripts/load_test_service.py --url http://127.0.0.1:8000 --concurrency 16
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from scoring import MODEL_PATH, PIPELINE_PATH, load_artifacts, predict_raw
+from tree_compiler import CompiledTreeEnsemble
+from user_features import RAW_INPUT_COLUMNS
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+# Hasta este tamaño de lote el ensamble compilado es más rápido (benchmark_tree_compiler.py)
+DEFAULT_COMPILED_MAX_ROWS = 32
+
+# Ventana de latencias para los percentiles de /metrics
+LATENCY_WINDOW = 10_000
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """Servidor con un hilo por conexión y backlog amplio para ráfagas de clientes."""
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias (ms) y tamaños de micro-lote, thread-safe."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.users = 0
+        self.started = time.time()
+
+    def record_request(self, latency_ms, n_users, ok=True):
+        with self._lock:
+            self._latencies.append(latency_ms)
+            self.requests += 1
+            self.users += n_users
+            self.errors += not ok
+
+    def record_batch(self, n_users):
+        with self._lock:
+            self._batch_sizes.append(n_users)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            batch_sizes = np.array(self._batch_sizes)
+            requests, errors, users = self.requests, self.errors, self.users
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'requests': requests,
+            'errors': errors,
+            'users_scored': users,
+            'uptime_s': round(time.time() - self.started, 1),
+            'latency_ms': {
+                'p50': round(float(p50), 3),
+                'p99': round(float(p99), 3),
+                'mean': round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+                'window': len(latencies),
+            },
+            'micro_batch': {
+                'batches': len(batch_sizes),
+                'mean_users': round(float(batch_sizes.mean()), 2) if len(batch_sizes) else 0.0,
+                'max_users': int(batch_sizes.max()) if len(batch_sizes) else 0,
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Agrupa los usuarios de peticiones concurrentes en una sola llamada al modelo.
+
+    Parameters:
+    -----------
+    model, feature_cols, pipeline
+        Artefactos de `scoring.load_artifacts`
+    max_batch_size : int
+        Máximo de usuarios por micro-lote
+    max_wait_ms : float
+        Espera máxima desde la primera petición del lote antes de scorear
+    tracker : LatencyTracker
+        Registro de tamaños de lote
+    compiled : CompiledTreeEnsemble, optional
+        Evaluador compilado para lotes pequeños
+    compiled_max_rows : int
+        Máximo de usuarios de un lote evaluado con `compiled`
+    """
+
+    def __init__(self, model, feature_cols, pipeline, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, tracker=None, compiled=None,
+                 compiled_max_rows=DEFAULT_COMPILED_MAX_ROWS):
+        self.model = model
+        self.compiled = compiled
+        self.compiled_max_rows = compiled_max_rows
+        self.feature_cols = feature_cols
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.tracker = tracker
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """Encola los usuarios de una petición; retorna un Future con sus probabilidades."""
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def _collect(self):
+        """Bloquea hasta la primera petición y junta las que lleguen dentro de la ventana."""
+        batch = [self._queue.get()]
+        n_users = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_users < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_users += len(item[0])
+        return batch, n_users
+
+    def _predict(self, records):
+        model = self.model
+        if self.compiled is not None and len(records) <= self.compiled_max_rows:
+            model = self.compiled
+        return predict_raw(pd.DataFrame.from_records(records), model, self.feature_cols,
+                           self.pipeline)
+
+    def _run(self):
+        while True:
+            batch, n_users = self._collect()
+            if self.tracker is not None:
+                self.tracker.record_batch(n_users)
+            try:
+                probabilities = self._predict([r for records, _ in batch for r in records])
+            except Exception:
+                # Un usuario malformado no debe tumbar el lote: reintentar petición por petición
+                for records, future in batch:
+                    try:
+                        future.set_result(self._predict(records))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for records, future in batch:
+                future.set_result(probabilities[start:start + len(records)])
+                start += len(records)
+
+
+def validate_records(payload):
+    """
+    Normaliza el cuerpo de /score a una lista de usuarios y valida columnas.
+
+    Raises:
+    -------
+    ValueError si el cuerpo no es un usuario o lista de usuarios válida
+    """
+    records = payload if isinstance(payload, list) else [payload]
+    if not records:
+        raise ValueError('lista de usuarios vacía')
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f'usuario {i}: se esperaba un objeto JSON')
+        missing = [col for col in RAW_INPUT_COLUMNS if col not in record]
+        if missing:
+            raise ValueError(f'usuario {i}: faltan columnas {missing}')
+    return records
+
+
+def make_handler(batcher, tracker):
+    """Crea la clase handler con el micro-batcher y el tracker del servidor."""
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Cabeceras y cuerpo salen en envíos separados: sin TCP_NODELAY el ACK
+        # retardado del cliente agrega ~40 ms por respuesta en keep-alive
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            # Sin log por petición: distorsiona la latencia bajo carga
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, tracker.snapshot())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'features': len(batcher.feature_cols)})
+            else:
+                self._send_json(404, {'error': f'ruta no encontrada: {self.path}'})
+
+        def do_POST(self):
+            start = time.perf_counter()
+            if self.path != '/score':
+                self._send_json(404, {'error': f'ruta no encontrada: {self.path}'})
+                return
+
+            n_users = 0
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                records = validate_records(json.loads(self.rfile.read(length)))
+                n_users = len(records)
+                probabilities = batcher.submit(records).result()
+            except ValueError as exc:
+                self._send_json(400, {'error': str(exc)})
+                tracker.record_request((time.perf_counter() - start) * 1000, n_users, ok=False)
+                return
+            except Exception as exc:
+                self._send_json(500, {'error': f'{type(exc).__name__}: {exc}'})
+                tracker.record_request((time.perf_counter() - start) * 1000, n_users, ok=False)
+                return
+
+            predictions = [{'uid': record.get('uid'), 'probability': float(p)}
+                           for record, p in zip(records, probabilities)]
+            self._send_json(200, {'predictions': predictions})
+            tracker.record_request((time.perf_counter() - start) * 1000, n_users)
+
+    return ScoringHandler
+
+
+def create_server(host='127.0.0.1', port=8000, model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH,
+                  max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                  model_threads=1, compiled=False, compiled_max_rows=DEFAULT_COMPILED_MAX_ROWS):
+    """
+    Carga los artefactos y construye el servidor (sin iniciarlo).
+
+    Returns:
+    --------
+    ScoringHTTPServer listo para `serve_forever()`
+    """
+    model, feature_cols, pipeline = load_artifacts(model_path, pipeline_path)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=model_threads)
+    compiled_model = CompiledTreeEnsemble.from_model(model, feature_cols) if compiled else None
+
+    tracker = LatencyTracker()
+    batcher = MicroBatcher(model, feature_cols, pipeline, max_batch_size, max_wait_ms, tracker,
+                           compiled_model, compiled_max_rows)
+    return ScoringHTTPServer((host, port), make_handler(batcher, tracker))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--pipeline', default=PIPELINE_PATH)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help='Máximo de usuarios por micro-lote')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help='Espera máxima para completar un micro-lote')
+    parser.add_argument('--model-threads', type=int, default=1,
+                        help='Hilos del modelo (n_jobs) por llamada a predict_proba')
+    parser.add_argument('--compiled', action='store_true',
+                        help='Evaluar lotes pequeños con el ensamble compilado (tree_compiler.py)')
+    parser.add_argument('--compiled-max-rows', type=int, default=DEFAULT_COMPILED_MAX_ROWS,
+                        help='Máximo de usuarios por lote para el ensamble compilado')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.model, args.pipeline,
+                           args.max_batch_size, args.max_wait_ms, args.model_threads,
+                           args.compiled, args.compiled_max_rows)
+    print("="*80)
+    print("SERVICIO DE SCORING - PROBABILIDAD DE ALTO CRECIMIENTO")
+    print("="*80)
+    print(f"🚀 Escuchando en http://{args.host}:{args.port}")
+    print(f"   - POST /score | GET /metrics | GET /health")
+    print(f"   - Micro-lotes: hasta {args.max_batch_size} usuarios o {args.max_wait_ms} ms")
+    if args.compiled:
+        print(f"   - Ensamble compilado para lotes de hasta {args.compiled_max_rows} usuarios")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servicio detenido")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
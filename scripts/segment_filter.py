@@ -0,0 +1,217 @@
+"""
+Motor de filtros del Explorador de Segmentos (bitmaps por categoría)
+====================================================================
+
+El Explorador de Segmentos copiaba `all_data` completo en cada rerun y solo
+aplicaba el filtro de crecimiento. `SegmentIndex` se construye una vez por
+proceso sobre el resumen por usuario (`processed_io.load_user_summary`) y
+guarda, para cada grupo de filtro (recencia, r_segment, ciudad, categoría
+dominante y crecimiento), un bitmap empaquetado por categoría
+(`np.packbits`: 1 bit por usuario, ~0,3 MB por categoría con 2,4M usuarios).
+
+Un filtro es {grupo: [categorías]}: dentro de un grupo las categorías se
+combinan con OR y entre grupos con AND, sobre los bitmaps empaquetados
+(8 usuarios por byte). Los conteos salen del bitmap (popcount por tabla);
+solo las medias desempaquetan el bitmap resultante para seleccionar los
+valores de una columna. Nunca se copia ni se filtra el DataFrame completo.
+
+Para el scatter, `density` agrega el segmento completo en una grilla 2D fija
+(conteo y % high growth por celda, con `np.bincount`): el navegador recibe a
+lo sumo `DENSITY_BINS`² puntos sin importar el tamaño del segmento.
+
+Uso:
+
+    index = SegmentIndex(load_user_summary())
+    filters = {'categoria_recencia': ['Activo (0–7d)'], 'high_growth': [1]}
+    index.summary(filters)          # usuarios, % del total, % high growth, ...
+    index.rows(index.mask(filters)) # posiciones de los usuarios del segmento
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import numpy as np
+import pandas as pd
+
+# Grupos de filtro (columnas categóricas del resumen por usuario)
+FILTER_GROUPS = ['categoria_recencia', 'r_segment', 'city_token', 'dominant_category', 'high_growth']
+
+# Columnas numéricas que se conservan para métricas, scatter y tabla
+VALUE_COLS = ['high_growth', 'efo_to_four', 'days_since_first_order', 'categories_per_order',
+              'shops_per_order', 'category_diversity']
+
+# Celdas por eje de la grilla de densidad del scatter
+DENSITY_BINS = 60
+# Percentiles que acotan el rango de cada eje (los extremos caen en las celdas del borde)
+DENSITY_RANGE_PERCENTILES = (0.5, 99.5)
+
+# Bits en 1 de cada byte (popcount por tabla; np.bitwise_count requiere numpy 2)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class SegmentIndex:
+    """
+    Bitmaps por categoría para filtrar segmentos sin copiar el DataFrame.
+
+    Parameters:
+    -----------
+    frame : pd.DataFrame
+        Una fila por usuario con `uid`, los grupos de `groups` y las columnas
+        de `value_cols` (el resumen por usuario de la preparación)
+    groups : list
+        Columnas categóricas filtrables
+    value_cols : list
+        Columnas numéricas para métricas, scatter y tabla
+    """
+
+    def __init__(self, frame, groups=FILTER_GROUPS, value_cols=VALUE_COLS):
+        self.n = len(frame)
+        self.uids = frame['uid'].to_numpy()
+        self.values = {col: frame[col].to_numpy() for col in value_cols if col in frame.columns}
+        self.all = np.packbits(np.ones(self.n, dtype=bool))
+
+        self.bitmaps = {}
+        for col in groups:
+            if col not in frame.columns:
+                continue
+            categorical = pd.Categorical(frame[col])
+            codes = categorical.codes
+            self.bitmaps[col] = {value: np.packbits(codes == i)
+                                 for i, value in enumerate(categorical.categories.tolist())}
+        self._ranges = {}
+
+    def __repr__(self):
+        return f'SegmentIndex({self.n:,} usuarios, grupos={list(self.bitmaps)})'
+
+    def categories(self, group):
+        """Categorías de un grupo, en orden."""
+        return list(self.bitmaps.get(group, {}))
+
+    @property
+    def nbytes(self):
+        """Memoria de los bitmaps."""
+        return sum(bitmap.nbytes for group in self.bitmaps.values() for bitmap in group.values())
+
+    # ------------------------------------------------------------------
+    # Bitmaps
+    # ------------------------------------------------------------------
+
+    def mask(self, filters):
+        """
+        Bitmap empaquetado del segmento.
+
+        Parameters:
+        -----------
+        filters : dict
+            {grupo: lista de categorías}; OR dentro del grupo, AND entre
+            grupos. Un grupo ausente o con lista vacía no filtra.
+
+        Returns:
+        --------
+        np.ndarray uint8 (bitmap empaquetado, ver `count` y `rows`)
+        """
+        result = None
+        for group, selected in (filters or {}).items():
+            if not selected:
+                continue
+            bitmaps = self.bitmaps[group]
+            group_mask = np.zeros_like(self.all)
+            for value in selected:
+                if value in bitmaps:
+                    group_mask |= bitmaps[value]
+            result = group_mask if result is None else np.bitwise_and(result, group_mask, out=result)
+        return self.all if result is None else result
+
+    def count(self, bitmap):
+        """Usuarios en un bitmap."""
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def to_bool(self, bitmap):
+        """Bitmap empaquetado → máscara booleana de longitud n."""
+        return np.unpackbits(bitmap, count=self.n).view(bool)
+
+    def rows(self, bitmap):
+        """Posiciones (en el orden del resumen) de los usuarios de un bitmap."""
+        return np.flatnonzero(self.to_bool(bitmap))
+
+    # ------------------------------------------------------------------
+    # Métricas y densidad
+    # ------------------------------------------------------------------
+
+    def summary(self, filters):
+        """
+        Métricas del segmento.
+
+        Returns:
+        --------
+        dict con usuarios, pct_total, high_growth_pct y la media de
+        category_diversity
+        """
+        bitmap = self.mask(filters)
+        users = self.count(bitmap)
+        summary = {
+            'usuarios': users,
+            'pct_total': users / self.n * 100 if self.n else 0.0,
+            'high_growth_pct': 0.0,
+            'category_diversity_promedio': 0.0,
+        }
+        if users and 1 in self.bitmaps.get('high_growth', {}):
+            summary['high_growth_pct'] = self.count(bitmap & self.bitmaps['high_growth'][1]) / users * 100
+        if users and 'category_diversity' in self.values:
+            summary['category_diversity_promedio'] = float(
+                self.values['category_diversity'][self.to_bool(bitmap)].mean())
+        return summary
+
+    def column(self, bitmap, col):
+        """Valores de una columna para los usuarios del bitmap."""
+        return self.values[col][self.to_bool(bitmap)]
+
+    def axis_range(self, col):
+        """Rango fijo de un eje sobre toda la población (estable entre filtros)."""
+        if col not in self._ranges:
+            low, high = np.nanpercentile(self.values[col], DENSITY_RANGE_PERCENTILES)
+            self._ranges[col] = (float(low), float(high) if high > low else float(low) + 1.0)
+        return self._ranges[col]
+
+    def density(self, bitmap, x, y, bins=DENSITY_BINS):
+        """
+        Grilla 2D del segmento: usuarios y % high growth por celda.
+
+        Parameters:
+        -----------
+        bitmap : np.ndarray
+            Bitmap del segmento (`mask`)
+        x, y : str
+            Columnas de los ejes
+        bins : int
+            Celdas por eje
+
+        Returns:
+        --------
+        dict con x, y (centros de las celdas no vacías), usuarios y
+        high_growth_pct por celda
+        """
+        selected = self.to_bool(bitmap)
+        cells = np.zeros(selected.sum(), dtype=np.int64)
+        centers = []
+        for col, stride in ((x, bins), (y, 1)):
+            low, high = self.axis_range(col)
+            width = (high - low) / bins
+            position = np.clip(((self.values[col][selected] - low) / width).astype(np.int64), 0, bins - 1)
+            cells += position * stride
+            centers.append(low + (np.arange(bins) + 0.5) * width)
+
+        users = np.bincount(cells, minlength=bins * bins)
+        high_growth = np.bincount(cells, weights=self.values['high_growth'][selected], minlength=bins * bins)
+        filled = np.flatnonzero(users)
+        return {
+            'x': centers[0][filled // bins],
+            'y': centers[1][filled % bins],
+            'usuarios': users[filled],
+            'high_growth_pct': high_growth[filled] / users[filled] * 100,
+        }
+
+    def frame(self, positions, columns):
+        """DataFrame pequeño con uid y `columns` para las posiciones dadas."""
+        data = {'uid': self.uids[positions]}
+        data.update({col: self.values[col][positions] for col in columns if col in self.values})
+        return pd.DataFrame(data)
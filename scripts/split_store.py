@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Almacén Arrow de solo lectura de los splits procesados
+======================================================
+
+`st.cache_data` guarda el resultado serializado y lo deserializa en cada
+llamada: cada sesión (y cada rerun) del dashboard recibía su propia copia de
+train/val/test y de la concatenación `all_data` (una cuarta copia completa).
+
+`SplitStore` escribe una sola vez los tres splits, uno tras otro, en un
+archivo Arrow IPC sin comprimir (`data/processed/splits.arrow`) y lo abre
+con `pa.memory_map`: las columnas son vistas sobre el archivo mapeado, las
+páginas las comparte el sistema operativo entre procesos y solo se leen del
+disco las columnas que se usan. Sobre esa tabla:
+
+- `split(name)` y `union()` son DataFrames con tipos `pd.ArrowDtype` que
+  apuntan a los mismos buffers (sin copia; `union` no concatena nada)
+- `column(col, split)` devuelve la columna como array de numpy (sin copia
+  si la columna tiene un solo bloque)
+
+El dashboard lo abre (`st.cache_resource`, un único almacén por proceso)
+solo para calcular los agregados cuando falta
+`models/dashboard_aggregates.json`; ver `benchmark_dashboard_memory.py`
+para la comparación de memoria con N sesiones simuladas.
+
+El archivo se reconstruye si algún split es más reciente que él.
+
+Uso (desde la raíz del proyecto):
+    python scripts/split_store.py
+    python scripts/split_store.py --data data/processed --rebuild
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from processed_io import DEFAULT_CHUNK_ROWS, PROCESSED_DIR, SPLITS, compact_dtypes, iter_split_chunks, split_mtime
+
+STORE_FILE = 'splits.arrow'
+
+# Metadatos de cada record batch con el split al que pertenece
+SPLIT_KEY = b'split'
+
+
+def store_path(base_dir=PROCESSED_DIR):
+    return os.path.join(base_dir, STORE_FILE)
+
+
+def store_is_current(base_dir=PROCESSED_DIR):
+    """True si el almacén existe y es posterior a todos los splits."""
+    path = store_path(base_dir)
+    if not os.path.exists(path):
+        return False
+    stored = os.path.getmtime(path)
+    return all((split_mtime(name, base_dir) or 0) <= stored for name in SPLITS)
+
+
+def build_store(base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Escribe los splits en `splits.arrow` recorriéndolos por lotes (nunca
+    se cargan completos).
+
+    Parameters:
+    -----------
+    base_dir : str
+        Directorio de los splits procesados
+    chunk_rows : int
+        Filas por lote (un record batch por lote)
+
+    Returns:
+    --------
+    str con la ruta del almacén
+    """
+    import pyarrow as pa
+
+    path = store_path(base_dir)
+    # Escritura atómica: otro proceso (sesión del dashboard) puede tener mapeado el archivo anterior
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    writer, schema = None, None
+    try:
+        for name in SPLITS:
+            for chunk in iter_split_chunks(name, base_dir, chunk_rows):
+                # Los lotes CSV se compactan igual que al escribir Parquet; todos los lotes usan el esquema del primero
+                batch = pa.RecordBatch.from_pandas(compact_dtypes(chunk), schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = batch.schema
+                    writer = pa.ipc.new_file(tmp_path, schema)
+                writer.write_batch(batch, custom_metadata={SPLIT_KEY: name.encode()})
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+class SplitStore:
+    """
+    Vistas de solo lectura (sin copia) de train/val/test y su unión sobre
+    el archivo Arrow mapeado en memoria.
+
+    Parameters:
+    -----------
+    base_dir : str
+        Directorio de los splits procesados (y del almacén)
+    """
+
+    def __init__(self, base_dir=PROCESSED_DIR):
+        import pyarrow as pa
+
+        self.path = store_path(base_dir)
+        # Leer de un memory_map no copia: los buffers apuntan al archivo mapeado
+        reader = pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+        batches, rows = [], {name: 0 for name in SPLITS}
+        for i in range(reader.num_record_batches):
+            batch, metadata = reader.get_batch_with_custom_metadata(i)
+            batches.append(batch)
+            rows[metadata[SPLIT_KEY].decode()] += batch.num_rows
+        self.table = pa.Table.from_batches(batches, schema=reader.schema)
+
+        # Rango de filas (inicio, filas) de cada split: se escribieron uno tras otro
+        self.offsets, start = {}, 0
+        for name in SPLITS:
+            self.offsets[name] = (start, rows[name])
+            start += rows[name]
+
+    def __repr__(self):
+        sizes = ', '.join(f'{name}={length:,}' for name, (_, length) in self.offsets.items())
+        return f'SplitStore({sizes})'
+
+    @property
+    def nbytes(self):
+        """Tamaño de los buffers (mapeados, no copiados al heap)."""
+        return self.table.nbytes
+
+    def _frame(self, table):
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def split(self, name):
+        """DataFrame (ArrowDtype, sin copia) de un split."""
+        start, length = self.offsets[name]
+        return self._frame(self.table.slice(start, length))
+
+    def union(self):
+        """DataFrame (ArrowDtype, sin copia) de train + val + test, en ese orden."""
+        return self._frame(self.table)
+
+    def column(self, col, split=None):
+        """Una columna como array de numpy, de un split o de la unión."""
+        data = self.table.column(col)
+        if split is not None:
+            start, length = self.offsets[split]
+            data = data.slice(start, length)
+        return data.to_numpy()
+
+
+def open_store(base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Abre el almacén, construyéndolo antes si no existe o está desactualizado."""
+    if not store_is_current(base_dir):
+        build_store(base_dir, chunk_rows)
+    return SplitStore(base_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de splits procesados')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Filas por record batch')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir aunque esté al día')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("ALMACÉN ARROW DE LOS SPLITS PROCESADOS")
+    print("="*80)
+    if store_is_current(args.data) and not args.rebuild:
+        print(f"  ✓ Ya está al día: {store_path(args.data)}")
+    else:
+        start = time.perf_counter()
+        build_store(args.data, args.chunk_rows)
+        print(f"  ✓ Construido en {time.perf_counter() - start:.1f} s")
+
+    store = SplitStore(args.data)
+    print(f"  ✓ {store}")
+    print(f"💾 {store.path} ({os.path.getsize(store.path) / 1024**2:.1f} MB, {store.table.num_columns} columnas)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Modo streaming del pipeline de preparación de datos
+===================================================
+
+`run_data_preparation.py` carga el CSV crudo completo en memoria junto con
+todas las columnas derivadas. En extractos grandes eso no escala, así que
+este módulo procesa el CSV por chunks y la memoria pico queda acotada por
+el tamaño del chunk, no del dataset:
+
+1. Pasada ligera (solo `first_order_date` y categóricas crudas): fecha de
+   referencia (máximo de first_order_date) y vocabularios de
+   categoria_recencia, r_segment y city_token.
+2. Pasada de features por chunk: parseo de diccionarios, features
+   derivados, estadísticas del scaler y vocabulario de dominant_category
+   (`FeaturePipeline.partial_fit_features`). Cada chunk se guarda ya reducido (sin el texto de
+   los diccionarios) en un directorio temporal.
+3. Por cada chunk reducido: one-hot con vocabulario fijo, scaling y
+   asignación a train/val/test; se escribe una partición por split
+   (`data/processed/{split}/part-XXXXX.parquet`) y una del resumen liviano
+   por usuario (`data/processed/user_summary/part-XXXXX.parquet`).
+
+El split se asigna con un hash determinista del uid: es independiente de la
+variable objetivo, así que la proporción de high_growth se preserva en
+expectativa (no exactamente como con `train_test_split(stratify=...)`).
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import FeaturePipeline
+from processed_io import NON_FEATURE_COLS, SPLITS, USER_SUMMARY, clear_split, save_split_partition
+from user_features import RAW_CATEGORICAL_FEATURES, USER_SUMMARY_COLUMNS
+
+# Resolución del hash del uid para asignar splits
+_SPLIT_BUCKETS = 10_000
+
+
+def scan_globals(dataset_path, chunksize):
+    """
+    Primera pasada ligera: lee solo las columnas necesarias para los
+    valores globales que no dependen de los diccionarios.
+
+    Parameters:
+    -----------
+    dataset_path : str
+        CSV crudo
+    chunksize : int
+        Filas por chunk
+
+    Returns:
+    --------
+    tuple (reference_date, vocabularies, n_rows) donde vocabularies es
+    {columna: conjunto de categorías} para las categóricas crudas
+    """
+    reference_date = None
+    vocabularies = {col: set() for col in RAW_CATEGORICAL_FEATURES}
+    n_rows = 0
+    usecols = ['first_order_date'] + RAW_CATEGORICAL_FEATURES
+    for chunk in pd.read_csv(dataset_path, usecols=usecols, chunksize=chunksize):
+        chunk_max = pd.to_datetime(chunk['first_order_date']).max()
+        if reference_date is None or chunk_max > reference_date:
+            reference_date = chunk_max
+        for col in RAW_CATEGORICAL_FEATURES:
+            vocabularies[col].update(chunk[col].dropna().unique())
+        n_rows += len(chunk)
+    return reference_date, vocabularies, n_rows
+
+
+def assign_splits(uids, train_size=0.60, val_size=0.20):
+    """
+    Asigna cada uid a 'train', 'val' o 'test' con un hash determinista.
+
+    Parameters:
+    -----------
+    uids : pd.Series
+        Identificadores de usuario
+    train_size, val_size : float
+        Fracción esperada de train y validación (test = resto)
+
+    Returns:
+    --------
+    np.ndarray de strings con el split de cada fila
+    """
+    hashes = pd.util.hash_pandas_object(uids, index=False).to_numpy()
+    position = (hashes % _SPLIT_BUCKETS) / _SPLIT_BUCKETS
+    return np.where(position < train_size, 'train',
+                    np.where(position < train_size + val_size, 'val', 'test'))
+
+
+def run_streaming_preparation(dataset_path, output_dir, chunksize, high_growth_threshold,
+                              multi_category_threshold, multi_shop_threshold,
+                              train_size=0.60, val_size=0.20, output_format='parquet'):
+    """
+    Ejecuta el pipeline de preparación por chunks y escribe los splits
+    particionados.
+
+    Parameters:
+    -----------
+    dataset_path : str
+        CSV crudo
+    output_dir : str
+        Directorio de los splits procesados
+    chunksize : int
+        Filas por chunk (acota la memoria pico)
+    high_growth_threshold : int
+        high_growth = 1 si delta_orders > este umbral
+    multi_category_threshold, multi_shop_threshold : int
+        Umbrales de los features binarios de negocio
+    train_size, val_size : float
+        Fracción esperada de train y validación
+    output_format : str
+        'parquet', 'csv' o 'both'
+
+    Returns:
+    --------
+    tuple (pipeline, summary): `FeaturePipeline` ajustado (equivalente al del
+    modo en memoria); summary resume la corrida (filas, splits, umbral)
+    """
+    # ------------------------------------------------------------------
+    # PASADA 1: fecha de referencia y vocabularios de categóricas crudas
+    # ------------------------------------------------------------------
+    print(f"\n📂 Pasada 1 (ligera): fecha de referencia y vocabularios...")
+    reference_date, vocabularies, n_rows = scan_globals(dataset_path, chunksize)
+    print(f"  ✓ {n_rows:,} usuarios | REFERENCE_DATE = {reference_date.date()}")
+    for col in RAW_CATEGORICAL_FEATURES:
+        print(f"  ✓ {col}: {len(vocabularies[col])} categorías")
+
+    pipeline = FeaturePipeline(high_growth_threshold, multi_category_threshold, multi_shop_threshold)
+    pipeline.reference_date = reference_date
+    pipeline.vocabularies.update({col: sorted(values) for col, values in vocabularies.items()})
+    n_missing = pd.Series(0, index=pipeline.all_features)
+    n_at_or_below_threshold = 0
+
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix='.streaming-') as tmp_dir:
+        # --------------------------------------------------------------
+        # PASADA 2: features por chunk + estadísticas del scaler
+        # --------------------------------------------------------------
+        print(f"\n🔧 Pasada 2: features por chunk ({chunksize:,} filas por chunk)...")
+        n_parts = 0
+        for part, chunk in enumerate(pd.read_csv(dataset_path, chunksize=chunksize)):
+            # Solo features pre-encoding + targets: el texto de los diccionarios se descarta aquí
+            reduced = pipeline.derive(chunk)
+            reduced['delta_orders'] = chunk['delta_orders']
+            reduced['total_orders'] = chunk['total_orders']
+            reduced['uid'] = chunk['uid']
+            del chunk
+
+            pipeline.partial_fit_features(reduced)
+            n_missing += reduced[pipeline.all_features].isnull().sum()
+            n_at_or_below_threshold += int((reduced['delta_orders'] <= high_growth_threshold).sum())
+
+            reduced.to_pickle(os.path.join(tmp_dir, f'part-{part:05d}.pkl'))
+            n_parts += 1
+            print(f"  ✓ Chunk {part:05d}: {len(reduced):,} usuarios")
+
+        feature_cols = pipeline.feature_cols
+        print(f"  ✓ Encoding: {len(pipeline.categorical_features)} categóricas → "
+              f"{len(pipeline.encoded_cols)} dummies")
+
+        if n_missing.sum() > 0:
+            print(f"\n⚠️ ADVERTENCIA: Hay valores faltantes:")
+            print(n_missing[n_missing > 0])
+
+        # --------------------------------------------------------------
+        # PASADA 3: encoding, scaling y particiones por split
+        # --------------------------------------------------------------
+        print(f"\n💾 Pasada 3: encoding, scaling y escritura de particiones...")
+        for name in SPLITS + [USER_SUMMARY]:
+            clear_split(name, output_dir)
+
+        split_rows = {name: 0 for name in SPLITS}
+        split_positives = {name: 0 for name in SPLITS}
+        for part in range(n_parts):
+            part_path = os.path.join(tmp_dir, f'part-{part:05d}.pkl')
+            reduced = pd.read_pickle(part_path)
+            os.remove(part_path)
+
+            encoded = pipeline.encode(reduced)
+            encoded['high_growth'] = pipeline.target(reduced)
+            encoded['delta_orders'] = reduced['delta_orders']
+            encoded['uid'] = reduced['uid']
+            encoded = encoded[feature_cols + NON_FEATURE_COLS]
+
+            assignment = assign_splits(reduced['uid'], train_size, val_size)
+            for name in SPLITS:
+                split_df = encoded[assignment == name]
+                save_split_partition(split_df, name, part, output_dir, output_format)
+                split_rows[name] += len(split_df)
+                split_positives[name] += int(split_df['high_growth'].sum())
+
+            reduced['high_growth'] = encoded['high_growth']
+            reduced['split'] = assignment
+            save_split_partition(reduced[USER_SUMMARY_COLUMNS], USER_SUMMARY, part, output_dir, output_format)
+
+        print(f"  ✓ {n_parts} particiones por split en {output_dir}/{{{','.join(SPLITS + [USER_SUMMARY])}}}/")
+
+    total_positives = sum(split_positives.values())
+    summary = {
+        'n_rows': n_rows,
+        'n_parts': n_parts,
+        'reference_date': reference_date,
+        'percentil_umbral': n_at_or_below_threshold / n_rows * 100,
+        'high_growth_pct': total_positives / n_rows * 100,
+        'split_rows': split_rows,
+        'split_high_growth_pct': {name: (split_positives[name] / split_rows[name] * 100
+                                         if split_rows[name] else 0.0) for name in SPLITS},
+    }
+
+    return pipeline, summary
@@ -0,0 +1,87 @@
+"""
+Generador de datos sintéticos con el esquema del dataset original
+=================================================================
+
+El dataset protegido no se versiona en el repositorio. Para medir el
+desempeño del pipeline a escala (millones de usuarios) se generan usuarios
+sintéticos con las mismas columnas y formatos que `dataset_protegido (1).csv`,
+incluidas las columnas diccionario serializadas como texto
+("{'main_category007': 2, 'main_category021': 1}").
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import numpy as np
+import pandas as pd
+
+RECENCY_CATEGORIES = ['Activo (0–7d)', 'Semi-Activo (8–14d)', 'Tibio (15–30d)',
+                      'Frío (31–90d)', 'Perdido (>90d)']
+
+# (prefijo, ancho del sufijo numérico, tamaño del vocabulario, máximo de items por usuario)
+DICT_SPECS = {
+    'main_category_counts': ('main_category', 3, 28, 8),
+    'ka_type_counts': ('ka_type', 3, 3, 3),
+    'shop_name_counts': ('shop_', 0, 11534, 12),
+    'brand_name_counts': ('brand', 3, 817, 10),
+}
+
+
+def _dict_column(rng, n_rows, prefix, width, vocab_size, max_items):
+    """Genera una columna diccionario serializada como texto."""
+    vocab = np.array([f"'{prefix}{i:0{width}d}': " if width else f"'{prefix}{i}': "
+                      for i in range(1, vocab_size + 1)], dtype=object)
+    # Distribución sesgada: pocos items concentran la mayoría de las órdenes
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+
+    n_items = rng.integers(1, min(max_items, vocab_size) + 1, size=n_rows)
+    offsets = np.concatenate([[0], np.cumsum(n_items)])
+    # Items consecutivos a partir de un item base sesgado: distintos dentro del usuario
+    base = np.repeat(rng.choice(vocab_size, size=n_rows, p=weights), n_items)
+    position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], n_items)
+    items = (base + position) % vocab_size
+    counts = rng.integers(1, 6, size=offsets[-1]).astype(str).astype(object)
+    entries = (vocab[items] + counts).tolist()
+
+    return ['{' + ', '.join(entries[offsets[i]:offsets[i + 1]]) + '}' for i in range(n_rows)]
+
+
+def make_raw_users(n_rows, seed=42):
+    """
+    Genera `n_rows` usuarios sintéticos con el esquema del dataset original.
+
+    Parameters:
+    -----------
+    n_rows : int
+        Número de usuarios a generar
+    seed : int
+        Semilla para reproducibilidad
+
+    Returns:
+    --------
+    pd.DataFrame con las columnas del CSV crudo (diccionarios como texto)
+    """
+    rng = np.random.default_rng(seed)
+
+    first_order = pd.Timestamp('2025-05-01') + pd.to_timedelta(rng.integers(0, 120, size=n_rows), unit='D')
+    efo_to_four = rng.integers(1, 60, size=n_rows)
+    delta_orders = rng.negative_binomial(2, 0.25, size=n_rows)
+
+    df = pd.DataFrame({
+        'country_code': 'CO',
+        'uid': 492892698476209 + np.arange(n_rows, dtype=np.int64) * 7,
+        'total_orders': 4 + delta_orders,
+        'total_orders_tmenos1': 0,
+        'delta_orders': delta_orders,
+        'categoria_recencia': rng.choice(RECENCY_CATEGORIES, size=n_rows, p=[0.30, 0.15, 0.20, 0.25, 0.10]),
+        'first_order_date': first_order.strftime('%Y-%m-%d'),
+        'fourth_order_date': (first_order + pd.to_timedelta(efo_to_four, unit='D')).strftime('%Y-%m-%d'),
+        'efo_to_four': efo_to_four,
+    })
+
+    for col, (prefix, width, vocab_size, max_items) in DICT_SPECS.items():
+        df[col] = _dict_column(rng, n_rows, prefix, width, vocab_size, max_items)
+
+    df['city_token'] = rng.choice([f'city{i:03d}' for i in range(1, 8)], size=n_rows)
+    df['r_segment'] = rng.choice([f'r_segment{i:03d}' for i in range(1, 4)], size=n_rows)
+    return df
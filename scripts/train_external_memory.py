@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Entrenamiento XGBoost fuera de memoria (external memory)
+========================================================
+
+`train_models.py` carga `X_train` completo en un DataFrame antes de `fit`;
+en los mercados más grandes no cabe en RAM. Este modo construye las
+matrices de XGBoost desde los splits procesados leídos por lotes
+(`processed_io.iter_split_chunks`, Parquet o CSV, archivo único o
+particiones del modo streaming) a través de un `xgb.DataIter`:
+
+- `ExtMemQuantileDMatrix`: cuantiza cada lote y guarda las páginas del
+  índice de gradientes en disco (`--cache-dir`); en memoria queda solo el
+  lote en curso y las páginas en uso
+- validación con la misma cuantización (`ref=dtrain`) para early stopping
+- evaluación por chunks: las probabilidades de val/test (4 bytes por
+  usuario) alimentan `EvaluationReport`, así que métricas, ranking y
+  `classification_report.json` tienen las mismas claves que en
+  `train_models.py`
+
+Los hiperparámetros no se buscan (la búsqueda con CV requiere los datos en
+memoria): se usan los del centro del grid de `train_models.py`
+(`model_search.XGB_GRID_CENTER`) o los de un modelo XGBoost ya entrenado
+(`--params-from`), con early stopping sobre validación. El umbral de
+high_growth se toma del FeaturePipeline que generó los splits.
+
+Por eso los artefactos se escriben por defecto en `models/external_memory/`
+y no reemplazan el modelo de producción; `--output-dir models` lo
+reemplaza explícitamente. `--compare` entrena además con el otro modo (mismo modelo,
+mismos datos) en un proceso nuevo y reporta el RSS pico de cada uno.
+
+Uso (desde la raíz del proyecto):
+    python scripts/train_external_memory.py
+    python scripts/train_external_memory.py --chunk-rows 500000 --compare
+    python scripts/train_external_memory.py --params-from models/best_classifier.pkl
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from core_scheduler import available_cores
+from model_evaluation import TOP_K_PERCENT, EvaluationReport
+from model_search import EARLY_STOPPING_MAX_ESTIMATORS, EARLY_STOPPING_ROUNDS, XGB_GRID_CENTER
+from processed_io import (DEFAULT_CHUNK_ROWS, NON_FEATURE_COLS, PROCESSED_DIR, iter_split_chunks,
+                          load_split, split_columns)
+from scoring import PIPELINE_PATH
+
+MODES = ['external', 'in_memory']
+
+MAX_BIN = 256
+RANDOM_SEED = 42
+
+# Separado de models/: sin búsqueda de hiperparámetros no reemplaza el modelo de producción
+OUTPUT_DIR = 'models/external_memory'
+MODEL_NAME = 'XGBoost'
+
+
+def _peak_rss_mb():
+    """
+    RSS pico del proceso en MB. En Linux se lee VmHWM de /proc/self/status:
+    `ru_maxrss` conserva tras exec el pico del proceso padre (fork), lo que
+    falsea la medición del modo ejecutado en un proceso aparte.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss está en KB en Linux (en bytes en macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# =============================================================================
+# DATOS POR LOTES
+# =============================================================================
+
+def feature_columns(base_dir=PROCESSED_DIR):
+    """Columnas de features del split de entrenamiento (solo el esquema)."""
+    return [col for col in split_columns('train', base_dir) if col not in NON_FEATURE_COLS]
+
+
+def label_counts(name, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """(positivos, negativos) de un split leyendo solo la columna objetivo."""
+    positives = total = 0
+    for chunk in iter_split_chunks(name, base_dir, chunk_rows, columns=['high_growth']):
+        positives += int(chunk['high_growth'].sum())
+        total += len(chunk)
+    return positives, total - positives
+
+
+class SplitIterator(xgb.DataIter):
+    """
+    Entrega un split a XGBoost lote por lote.
+
+    Parameters:
+    -----------
+    name : str
+        'train', 'val' o 'test'
+    feature_cols : list
+        Columnas de entrada del modelo
+    base_dir : str
+        Directorio de los splits procesados
+    chunk_rows : int
+        Filas por lote
+    cache_prefix : str
+        Prefijo de las páginas en disco de XGBoost
+    """
+
+    def __init__(self, name, feature_cols, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 cache_prefix=None):
+        self.name = name
+        self.feature_cols = feature_cols
+        self.base_dir = base_dir
+        self.chunk_rows = chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_split_chunks(self.name, self.base_dir, self.chunk_rows,
+                                             columns=self.feature_cols + ['high_growth'])
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        input_data(data=chunk[self.feature_cols].to_numpy(dtype=np.float32),
+                   label=chunk['high_growth'].to_numpy(), feature_names=self.feature_cols)
+        return 1
+
+    def reset(self):
+        self._chunks = None
+
+
+def stream_proba(model, name, feature_cols, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Probabilidades y etiquetas de un split calculadas por chunks.
+
+    Returns:
+    --------
+    tuple (y int8, probabilidades float32)
+    """
+    labels, probabilities = [], []
+    for chunk in iter_split_chunks(name, base_dir, chunk_rows, columns=feature_cols + ['high_growth']):
+        labels.append(chunk['high_growth'].to_numpy(dtype=np.int8))
+        probabilities.append(model.predict_proba(chunk[feature_cols])[:, 1].astype(np.float32))
+    return np.concatenate(labels), np.concatenate(probabilities)
+
+
+# =============================================================================
+# ENTRENAMIENTO
+# =============================================================================
+
+def pipeline_threshold(pipeline_path=PIPELINE_PATH):
+    """Umbral de high_growth del FeaturePipeline persistido (también el formato antiguo en diccionario)."""
+    with open(pipeline_path, 'rb') as f:
+        pipeline = pickle.load(f)
+    if isinstance(pipeline, dict):
+        return pipeline['high_growth_threshold']
+    return pipeline.high_growth_threshold
+
+
+def model_params(params_from=None):
+    """Hiperparámetros de árbol: los de un XGBoost entrenado o XGB_GRID_CENTER."""
+    if params_from is None:
+        return dict(XGB_GRID_CENTER)
+    with open(params_from, 'rb') as f:
+        model = pickle.load(f)['model']
+    if not hasattr(model, 'get_booster'):
+        raise ValueError(f"{params_from} no es un modelo XGBoost")
+    params = model.get_params()
+    return {key: params[key] for key in XGB_GRID_CENTER if params.get(key) is not None}
+
+
+def _classifier(params, scale_pos_weight, n_jobs):
+    return xgb.XGBClassifier(**params, n_estimators=EARLY_STOPPING_MAX_ESTIMATORS,
+                             early_stopping_rounds=EARLY_STOPPING_ROUNDS, scale_pos_weight=scale_pos_weight,
+                             tree_method='hist', max_bin=MAX_BIN, eval_metric='auc',
+                             random_state=RANDOM_SEED, n_jobs=n_jobs)
+
+
+def train_external(params, feature_cols, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS,
+                   cache_dir=None, n_jobs=None):
+    """
+    Entrena con ExtMemQuantileDMatrix (train y val nunca completos en memoria).
+
+    Returns:
+    --------
+    tuple (XGBClassifier, dict con tamaños, scale_pos_weight y caché en disco)
+    """
+    n_jobs = n_jobs or available_cores()
+    positives, negatives = label_counts('train', base_dir, chunk_rows)
+    scale_pos_weight = negatives / max(positives, 1)
+    classifier = _classifier(params, scale_pos_weight, n_jobs)
+    booster_params = {**classifier.get_xgb_params(), 'objective': 'binary:logistic', 'seed': RANDOM_SEED}
+
+    temporary = cache_dir is None
+    cache_dir = tempfile.mkdtemp(prefix='xgb_extmem_') if temporary else cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    pages = [os.path.join(cache_dir, 'train'), os.path.join(cache_dir, 'val')]
+    try:
+        dtrain = xgb.ExtMemQuantileDMatrix(
+            SplitIterator('train', feature_cols, base_dir, chunk_rows, pages[0]),
+            max_bin=MAX_BIN, nthread=n_jobs)
+        dval = xgb.ExtMemQuantileDMatrix(
+            SplitIterator('val', feature_cols, base_dir, chunk_rows, pages[1]),
+            ref=dtrain, nthread=n_jobs)
+        cache_files = [path for prefix in pages for path in glob.glob(f'{prefix}*')]
+        cache_mb = sum(os.path.getsize(path) for path in cache_files) / 1024**2
+        booster = xgb.train(booster_params, dtrain, num_boost_round=EARLY_STOPPING_MAX_ESTIMATORS,
+                            evals=[(dval, 'val')], early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                            verbose_eval=False)
+        del dtrain, dval
+    finally:
+        # Solo se borra lo creado por esta corrida (--cache-dir puede ser un directorio compartido)
+        if temporary:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        else:
+            for path in (path for prefix in pages for path in glob.glob(f'{prefix}*')):
+                os.remove(path)
+
+    # Mismo tipo de modelo que train_models.py (predict_proba, best_iteration)
+    classifier.load_model(bytearray(booster.save_raw('json')))
+    info = {'train_rows': positives + negatives, 'scale_pos_weight': float(scale_pos_weight),
+            'cache_mb': round(cache_mb, 1)}
+    return classifier, info
+
+
+def train_in_memory(params, feature_cols, base_dir=PROCESSED_DIR, n_jobs=None):
+    """
+    Mismo modelo con train y val cargados en DataFrames (camino de train_models.py).
+
+    Returns:
+    --------
+    tuple (XGBClassifier, dict, (X_val, y_val), (X_test, y_test))
+    """
+    n_jobs = n_jobs or available_cores()
+    splits = {name: load_split(name, base_dir, columns=feature_cols + ['high_growth'])
+              for name in ('train', 'val', 'test')}
+    X = {name: df[feature_cols] for name, df in splits.items()}
+    y = {name: df['high_growth'] for name, df in splits.items()}
+    scale_pos_weight = (y['train'] == 0).sum() / max((y['train'] == 1).sum(), 1)
+    classifier = _classifier(params, scale_pos_weight, n_jobs)
+    classifier.fit(X['train'], y['train'], eval_set=[(X['val'], y['val'])], verbose=False)
+    info = {'train_rows': len(X['train']), 'scale_pos_weight': float(scale_pos_weight)}
+    return classifier, info, (X['val'], y['val']), (X['test'], y['test'])
+
+
+def run_mode(mode, params, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS, cache_dir=None):
+    """
+    Entrena y evalúa en val/test con un modo.
+
+    Returns:
+    --------
+    tuple (modelo, EvaluationReport, dict de resultados con tiempo y RSS pico)
+    """
+    feature_cols = feature_columns(base_dir)
+    rss_start = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'external':
+        model, info = train_external(params, feature_cols, base_dir, chunk_rows, cache_dir)
+        train_time = time.perf_counter() - start
+        splits = {name: stream_proba(model, name, feature_cols, base_dir, chunk_rows) for name in ('val', 'test')}
+        evaluation = EvaluationReport({name: (None, y) for name, (y, _) in splits.items()}, top_k=TOP_K_PERCENT)
+        for name, (_, proba) in splits.items():
+            evaluation.add_predictions(MODEL_NAME, name, proba)
+    elif mode == 'in_memory':
+        model, info, val, test = train_in_memory(params, feature_cols, base_dir)
+        train_time = time.perf_counter() - start
+        evaluation = EvaluationReport({'val': val, 'test': test}, top_k=TOP_K_PERCENT)
+        evaluation.add_model(MODEL_NAME, model)
+    else:
+        raise ValueError(f"mode debe ser uno de {MODES}, no '{mode}'")
+
+    metrics = evaluation.to_dict(MODEL_NAME)
+    result = {
+        'modo': mode,
+        **info,
+        'best_iteration': int(model.best_iteration),
+        'train_time_s': round(train_time, 2),
+        'total_time_s': round(time.perf_counter() - start, 2),
+        # RSS pico del proceso: al inicio (intérprete + librerías) y al terminar
+        'rss_inicio_mb': round(rss_start, 1) if rss_start is not None else None,
+        'rss_pico_mb': round(_peak_rss_mb(), 1) if rss_start is not None else None,
+        'auc_val': metrics['val']['auc_roc'],
+        'auc_test': metrics['test']['auc_roc'],
+    }
+    return model, evaluation, result
+
+
+def _isolated_worker(mode, params, base_dir, chunk_rows, cache_dir, queue):
+    _, _, result = run_mode(mode, params, base_dir, chunk_rows, cache_dir)
+    queue.put(result)
+
+
+def run_isolated(mode, params, base_dir=PROCESSED_DIR, chunk_rows=DEFAULT_CHUNK_ROWS, cache_dir=None):
+    """
+    `run_mode` en un proceso nuevo (spawn: el RSS pico no se hereda del
+    padre). Devuelve solo el diccionario de resultados.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_isolated_worker, args=(mode, params, base_dir, chunk_rows, cache_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+# =============================================================================
+# ARTEFACTOS
+# =============================================================================
+
+def save_outputs(model, evaluation, result, params, threshold, output_dir=OUTPUT_DIR, comparison=None):
+    """
+    Guarda modelo, `classification_report.json` y `feature_importance.csv`
+    con el formato de train_models.py.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    feature_cols = list(model.get_booster().feature_names)
+    with open(os.path.join(output_dir, 'best_classifier.pkl'), 'wb') as f:
+        pickle.dump({'model': model, 'feature_cols': feature_cols, 'model_name': MODEL_NAME,
+                     'threshold': threshold, 'training_mode': result['modo']}, f)
+
+    importance_df = pd.DataFrame({'feature': feature_cols, 'importance': model.feature_importances_}) \
+        .sort_values('importance', ascending=False)
+    importance_df.to_csv(os.path.join(output_dir, 'feature_importance.csv'), index=False)
+
+    metrics = evaluation.to_dict(MODEL_NAME)
+    report = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'mejor_modelo': MODEL_NAME,
+        'modo_entrenamiento': result['modo'],
+        'high_growth_threshold': threshold,
+        'top_k_percent': TOP_K_PERCENT,
+        'mejores_params': {**params, 'n_estimators': result['best_iteration'] + 1},
+        'metricas_validacion': metrics['val'],
+        'metricas_test': metrics['test'],
+        'ranking_test': {MODEL_NAME: evaluation.ranking(MODEL_NAME, 'test')},
+        'objetivos_cumplidos': {
+            'auc_roc_070': bool(metrics['test']['auc_roc'] > 0.70),
+            'f1_050': bool(metrics['test']['f1'] > 0.50),
+            'precision_at_20_050': bool(metrics['test']['precision_at_20'] > 0.50)
+        },
+        'dataset_sizes': {'train': result['train_rows'],
+                          'validation': len(evaluation.y_true('val')),
+                          'test': len(evaluation.y_true('test'))},
+        'feature_count': len(feature_cols),
+        'entrenamiento': result,
+        'top_10_features': importance_df.head(10)['feature'].tolist()
+    }
+    if comparison is not None:
+        report['comparacion_memoria'] = comparison
+    with open(os.path.join(output_dir, 'classification_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=PROCESSED_DIR, help='Directorio de los splits procesados')
+    parser.add_argument('--mode', choices=MODES, default='external',
+                        help='external (por lotes, por defecto) o in_memory (DataFrames completos)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Filas por lote')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Directorio de las páginas de XGBoost (por defecto uno temporal)')
+    parser.add_argument('--params-from', default=None,
+                        help='Pickle de un XGBoost entrenado del que tomar los hiperparámetros')
+    parser.add_argument('--pipeline', default=PIPELINE_PATH,
+                        help='FeaturePipeline que generó los splits (umbral de high_growth)')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help='Destino de modelo y reportes (--output-dir models reemplaza el de producción)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Entrena también con el otro modo y compara RSS pico y tiempos')
+    args = parser.parse_args()
+
+    print("="*80)
+    print(f"ENTRENAMIENTO XGBOOST ({'EXTERNAL MEMORY' if args.mode == 'external' else 'EN MEMORIA'})")
+    print("="*80)
+    params = model_params(args.params_from)
+    threshold = pipeline_threshold(args.pipeline)
+    print(f"📋 Parámetros: {params} | early stopping {EARLY_STOPPING_ROUNDS} rondas | lotes de {args.chunk_rows:,} filas")
+
+    model, evaluation, result = run_mode(args.mode, params, args.data, args.chunk_rows, args.cache_dir)
+    test_metrics = evaluation.metrics(MODEL_NAME, 'test')
+    print(f"\n✓ {result['train_rows']:,} filas de train | {result['best_iteration'] + 1} árboles | "
+          f"entrenamiento {result['train_time_s']:.1f}s"
+          + (f" | RSS pico {result['rss_pico_mb']:.0f} MB" if result['rss_pico_mb'] is not None else ''))
+    print(f"   AUC-ROC val {result['auc_val']:.4f} | test {result['auc_test']:.4f} | "
+          f"Precision@20% test {test_metrics['precision_at_20']:.4f}")
+
+    comparison = None
+    if args.compare:
+        # Este proceso solo entrenó el modo elegido: su RSS pico es comparable con el del otro modo
+        other = next(mode for mode in MODES if mode != args.mode)
+        print(f"\n🔬 Entrenando en modo {other} en un proceso aparte...")
+        comparison = {args.mode: result, other: run_isolated(other, params, args.data, args.chunk_rows,
+                                                             args.cache_dir)}
+        print(f"\n{'Modo':<12} {'RSS inicio':>11} {'RSS pico':>10} {'Entrena (s)':>12} {'Total (s)':>10} "
+              f"{'Árboles':>8} {'AUC val':>8} {'AUC test':>9}")
+        print("-"*86)
+        for mode in MODES:
+            res = comparison[mode]
+            print(f"{mode:<12} {res['rss_inicio_mb']:>9.0f}MB {res['rss_pico_mb']:>8.0f}MB "
+                  f"{res['train_time_s']:>12.1f} {res['total_time_s']:>10.1f} {res['best_iteration'] + 1:>8} "
+                  f"{res['auc_val']:>8.4f} {res['auc_test']:>9.4f}")
+
+    save_outputs(model, evaluation, result, params, threshold, args.output_dir, comparison)
+    print(f"\n💾 Modelo, classification_report.json y feature_importance.csv guardados en {args.output_dir}/")
+
+
+if __name__ == '__main__':
+    main()
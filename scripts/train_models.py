@@ -15,6 +15,13 @@ Cambios respecto a versión anterior:
 - Métricas alineadas con caso de uso de negocio
 - Comentarios en español con narrativa de negocio
 - Resumen ejecutivo con recomendaciones
+- Búsqueda de hiperparámetros configurable (model_search.py):
+
+    python scripts/train_models.py                          # GridSearchCV exhaustivo
+    python scripts/train_models.py --search halving         # successive halving
+    python scripts/train_models.py --search early_stopping grid halving
+                                       # compara tiempo/AUC; el modelo final usa la primera
+    python scripts/train_models.py --cores 32               # presupuesto de núcleos (core_scheduler.py)
 
 Autor: Proyecto Final - MINE-4101
 Fecha: Noviembre 2025
@@ -29,20 +36,29 @@ import numpy as np
 import pickle
 import json
 import os
+import argparse
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
 # Machine Learning
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import (
-    roc_auc_score, f1_score, precision_score, recall_score, accuracy_score,
-    classification_report, confusion_matrix, roc_curve, precision_recall_curve,
-    average_precision_score
-)
 import xgboost as xgb
 
+# Splits procesados (Parquet con tipos compactos, CSV como respaldo)
+from processed_io import load_splits
+
+# Métricas, curvas y matriz de confusión desde una sola pasada de predict_proba
+from model_evaluation import EvaluationReport
+
+# Estrategias de búsqueda de hiperparámetros (grid, halving, early_stopping)
+from model_search import SEARCH_STRATEGIES, run_search
+
+# Reparto de núcleos entre fits de CV e hilos por estimador (sin sobre-suscripción)
+from core_scheduler import CpuMeter, available_cores, limited_threads, plan_parallelism
+from threadpoolctl import threadpool_limits
+
 # Visualización
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -60,6 +76,24 @@ TOP_K_PERCENT = 0.20
 # Semilla para reproducibilidad
 RANDOM_SEED = 42
 
+# Argumentos de línea de comandos
+parser = argparse.ArgumentParser(description='Entrenamiento de modelos de clasificación')
+parser.add_argument('--search', nargs='+', choices=SEARCH_STRATEGIES, default=['grid'],
+                    help='Estrategia(s) de búsqueda de hiperparámetros. La primera define el modelo '
+                         'final; las demás se ejecutan para comparar tiempo y AUC')
+parser.add_argument('--cores', type=int, default=None,
+                    help='Presupuesto de núcleos a repartir entre fits de CV e hilos por '
+                         'estimador (por defecto, todos los disponibles)')
+args = parser.parse_args()
+SEARCH = list(dict.fromkeys(args.search))
+
+AVAILABLE_CORES = available_cores()
+CORES = min(args.cores or AVAILABLE_CORES, AVAILABLE_CORES)
+if args.cores and args.cores > AVAILABLE_CORES:
+    print(f"⚠️ --cores {args.cores} supera los {AVAILABLE_CORES} núcleos disponibles: se usan {CORES}")
+# BLAS/OpenMP del proceso principal (evaluación, gráficos) dentro del presupuesto
+threadpool_limits(limits=CORES)
+
 print("="*80)
 print("ENTRENAMIENTO DE MODELOS DE CLASIFICACIÓN - VERSIÓN MEJORADA")
 print("="*80)
@@ -68,6 +102,8 @@ print(f"\n📌 CONFIGURACIÓN:")
 print(f"   - HIGH_GROWTH_THRESHOLD = {HIGH_GROWTH_THRESHOLD}")
 print(f"   - TOP_K_PERCENT = {TOP_K_PERCENT*100:.0f}%")
 print(f"   - Modelos: Random Forest, XGBoost")
+print(f"   - Búsqueda: {', '.join(SEARCH)}" + (f" (modelo final: {SEARCH[0]})" if len(SEARCH) > 1 else ""))
+print(f"   - Núcleos: {CORES} de {AVAILABLE_CORES} disponibles")
 print("="*80)
 
 # ============================================================================
@@ -77,9 +113,7 @@ print("\n" + "="*80)
 print("1. CARGANDO DATOS")
 print("="*80)
 
-train_df = pd.read_csv('data/processed/train.csv')
-val_df = pd.read_csv('data/processed/val.csv')
-test_df = pd.read_csv('data/processed/test.csv')
+train_df, val_df, test_df = load_splits('data/processed')
 
 print(f"✅ Train: {train_df.shape[0]:,} × {train_df.shape[1]}")
 print(f"✅ Validation: {val_df.shape[0]:,} × {val_df.shape[1]}")
@@ -108,46 +142,74 @@ scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
 print(f"\n⚖️ Scale pos weight (para desbalance): {scale_pos_weight:.2f}")
 
 # ============================================================================
-# 2. FUNCIONES DE EVALUACIÓN
+# 2. EVALUACIÓN (REPORTE CON CACHÉ DE PREDICCIONES)
 # ============================================================================
 
-def precision_at_k(y_true, y_proba, k=TOP_K_PERCENT):
-    """
-    Calcula Precision@k: Si seleccionamos el top k% de usuarios según
-    la probabilidad predicha, ¿qué porcentaje son realmente high-growth?
-
-    Esta métrica es clave para el negocio porque responde:
-    "Si el equipo de Engagement contacta al top 20% de usuarios recomendados,
-    ¿qué tasa de acierto tendrá?"
-    """
-    n_top = int(len(y_true) * k)
-    top_indices = np.argsort(y_proba)[-n_top:]
-    return y_true.iloc[top_indices].mean() if hasattr(y_true, 'iloc') else y_true[top_indices].mean()
+# Predicciones cacheadas por (modelo, split): cada modelo scorea cada split una sola vez
+evaluation = EvaluationReport({
+    'train': (X_train, y_train),
+    'val': (X_val, y_val),
+    'test': (X_test, y_test),
+}, top_k=TOP_K_PERCENT)
 
 
-def evaluate_model(model, X, y, name="Model"):
+def search_model(name, base_model, param_grid):
     """
-    Evalúa un modelo y retorna todas las métricas relevantes.
+    Ejecuta las estrategias de búsqueda de --search sobre un modelo base.
 
-    Métricas calculadas:
-    - AUC-ROC: Capacidad de ordenamiento (métrica principal)
-    - F1-Score: Balance precisión-recall
-    - Precision@20%: Precisión en top usuarios (caso de uso de negocio)
-    """
-    y_pred = model.predict(X)
-    y_proba = model.predict_proba(X)[:, 1]
+    La primera estrategia define el estimador que sigue en el pipeline; las
+    demás solo se registran para comparar tiempo de pared y AUC. Cada
+    búsqueda reparte CORES entre fits paralelos e hilos por estimador.
 
-    metrics = {
-        'auc_roc': roc_auc_score(y, y_proba),
-        'f1': f1_score(y, y_pred),
-        'precision': precision_score(y, y_pred),
-        'recall': recall_score(y, y_pred),
-        'accuracy': accuracy_score(y, y_pred),
-        'avg_precision': average_precision_score(y, y_proba),
-        'precision_at_20': precision_at_k(y, y_proba, k=TOP_K_PERCENT)
-    }
+    Returns:
+    --------
+    tuple (resultado de la estrategia principal, resumen por estrategia)
+    """
+    summary = {}
+    primary = None
+    n_candidates = int(np.prod([len(v) for v in param_grid.values()]))
+    for strategy in SEARCH:
+        # early_stopping ajusta las combinaciones en secuencia: todos los núcleos al estimador
+        n_tasks = n_candidates * 5 if strategy in ('grid', 'halving') else 1
+        plan = plan_parallelism(CORES, n_tasks)
+        estimator = clone(base_model).set_params(n_jobs=plan['estimator_jobs'])
+
+        print(f"\n⏳ Entrenando {name} con búsqueda '{strategy}'...")
+        print(f"   ⚙️ Paralelismo: {plan['cv_jobs']} fits en paralelo × {plan['estimator_jobs']} "
+              f"hilo(s) por estimador (presupuesto: {CORES} núcleos)")
+        with limited_threads(plan['estimator_jobs']), CpuMeter(CORES) as meter:
+            result = run_search(strategy, estimator, param_grid, X_train, y_train, X_val, y_val,
+                                cv=5, n_jobs=plan['cv_jobs'], verbose=1, random_state=RANDOM_SEED)
+        # Evaluación y gráficos corren en el proceso principal: el estimador usa todo el presupuesto
+        result['estimator'].set_params(n_jobs=CORES)
+        print(f"   📈 Utilización efectiva: {meter.effective_cores:.1f} de {CORES} núcleos "
+              f"({meter.utilization:.0%})")
+        # AUC de validación: comparable entre estrategias (best_auc mezcla CV y holdout).
+        # El estimador de la estrategia principal reutiliza estas predicciones más adelante
+        evaluation.add_model(f'{name} [{strategy}]', result['estimator'])
+        val_auc = evaluation.metrics(f'{name} [{strategy}]', 'val')['auc_roc']
+        summary[strategy] = {
+            'wall_time_s': round(result['wall_time_s'], 2),
+            'best_auc': result['best_auc'],
+            'auc_source': result['auc_source'],
+            'val_auc': float(val_auc),
+            'n_fits': result['n_fits'],
+            'params': result['params'],
+            'parallelism': plan,
+            'cpu': meter.summary(),
+        }
+        print(f"   ✓ {strategy}: {result['wall_time_s']:.1f} s | {result['n_fits']} ajustes | "
+              f"mejor AUC ({result['auc_source']}): {result['best_auc']:.4f} | AUC val: {val_auc:.4f}")
+        if primary is None:
+            primary = result
 
-    return metrics, y_pred, y_proba
+    if len(summary) > 1:
+        print(f"\n📊 Comparación de estrategias - {name}:")
+        print(f"   {'Estrategia':<16} {'Tiempo (s)':>11} {'Ajustes':>8} {'AUC val':>9} {'Utilización':>12}")
+        for strategy, row in summary.items():
+            print(f"   {strategy:<16} {row['wall_time_s']:>11.1f} {row['n_fits']:>8} {row['val_auc']:>9.4f} "
+                  f"{row['cpu']['utilization']:>12.0%}")
+    return primary, summary
 
 
 def print_metrics_table(metrics, title="Métricas"):
@@ -166,7 +228,7 @@ def print_metrics_table(metrics, title="Métricas"):
 
 
 # ============================================================================
-# 3. ENTRENAR MODELOS CON GRIDSEARCH
+# 3. ENTRENAR MODELOS (GRIDSEARCH / HALVING / EARLY STOPPING)
 # ============================================================================
 
 models = {}
@@ -199,36 +261,26 @@ rf_base = RandomForestClassifier(
     max_features='sqrt',
     class_weight='balanced',
     random_state=RANDOM_SEED,
-    n_jobs=-1
-)
-
-# GridSearchCV optimizando AUC-ROC
-rf_grid = GridSearchCV(
-    rf_base,
-    param_grid=param_grid_rf,
-    cv=5,
-    scoring='roc_auc',
-    n_jobs=-1,
-    verbose=1
+    n_jobs=1  # hilos asignados por core_scheduler en search_model
 )
 
-print("\n⏳ Entrenando Random Forest con GridSearchCV...")
-start_time = datetime.now()
-rf_grid.fit(X_train, y_train)
-rf_time = (datetime.now() - start_time).total_seconds()
+# Búsqueda optimizando AUC-ROC
+rf_search, rf_search_summary = search_model('Random Forest', rf_base, param_grid_rf)
+rf_time = rf_search['wall_time_s']
 
-print(f"\n✅ Random Forest entrenado en {rf_time:.1f} segundos")
+print(f"\n✅ Random Forest entrenado en {rf_time:.1f} segundos ({SEARCH[0]})")
 print(f"\n🏆 Mejores hiperparámetros:")
-for param, value in rf_grid.best_params_.items():
+for param, value in rf_search['params'].items():
     print(f"   - {param}: {value}")
-print(f"\n📊 Mejor AUC-ROC (5-fold CV): {rf_grid.best_score_:.4f}")
+print(f"\n📊 Mejor AUC-ROC ({rf_search['auc_source']}): {rf_search['best_auc']:.4f}")
 
-best_rf = rf_grid.best_estimator_
+best_rf = rf_search['estimator']
 
 # Evaluar
-rf_metrics_train, _, _ = evaluate_model(best_rf, X_train, y_train, "RF")
-rf_metrics_val, _, _ = evaluate_model(best_rf, X_val, y_val, "RF")
-rf_metrics_test, rf_pred, rf_proba = evaluate_model(best_rf, X_test, y_test, "RF")
+evaluation.add_model('RandomForest', best_rf)
+rf_metrics_train = evaluation.metrics('RandomForest', 'train')
+rf_metrics_val = evaluation.metrics('RandomForest', 'val')
+rf_metrics_test = evaluation.metrics('RandomForest', 'test')
 
 print_metrics_table(rf_metrics_val, "Random Forest - Validation")
 
@@ -241,8 +293,9 @@ results['RandomForest'] = {
     'val': rf_metrics_val,
     'test': rf_metrics_test,
     'train_time': rf_time,
-    'params': rf_grid.best_params_,
-    'stability': stability_rf
+    'params': rf_search['params'],
+    'stability': stability_rf,
+    'search': rf_search_summary
 }
 
 # --------------------------------------------------------------------------
@@ -270,40 +323,31 @@ print(f"\n🔢 Combinaciones a probar: {total_combinations_xgb}")
 # Modelo base con scale_pos_weight para desbalance
 xgb_base = xgb.XGBClassifier(
     colsample_bytree=0.8,
+    tree_method='hist',  # histogramas; ver benchmark_categorical_layout.py para categóricas nativas
     scale_pos_weight=scale_pos_weight,
     random_state=RANDOM_SEED,
-    n_jobs=-1,
+    n_jobs=1,  # hilos asignados por core_scheduler en search_model
     eval_metric='auc',
     use_label_encoder=False
 )
 
-# GridSearchCV
-xgb_grid = GridSearchCV(
-    xgb_base,
-    param_grid=param_grid_xgb,
-    cv=5,
-    scoring='roc_auc',
-    n_jobs=-1,
-    verbose=1
-)
-
-print("\n⏳ Entrenando XGBoost con GridSearchCV...")
-start_time = datetime.now()
-xgb_grid.fit(X_train, y_train)
-xgb_time = (datetime.now() - start_time).total_seconds()
+# Búsqueda optimizando AUC-ROC
+xgb_search, xgb_search_summary = search_model('XGBoost', xgb_base, param_grid_xgb)
+xgb_time = xgb_search['wall_time_s']
 
-print(f"\n✅ XGBoost entrenado en {xgb_time:.1f} segundos")
+print(f"\n✅ XGBoost entrenado en {xgb_time:.1f} segundos ({SEARCH[0]})")
 print(f"\n🏆 Mejores hiperparámetros:")
-for param, value in xgb_grid.best_params_.items():
+for param, value in xgb_search['params'].items():
     print(f"   - {param}: {value}")
-print(f"\n📊 Mejor AUC-ROC (5-fold CV): {xgb_grid.best_score_:.4f}")
+print(f"\n📊 Mejor AUC-ROC ({xgb_search['auc_source']}): {xgb_search['best_auc']:.4f}")
 
-best_xgb = xgb_grid.best_estimator_
+best_xgb = xgb_search['estimator']
 
 # Evaluar
-xgb_metrics_train, _, _ = evaluate_model(best_xgb, X_train, y_train, "XGB")
-xgb_metrics_val, _, _ = evaluate_model(best_xgb, X_val, y_val, "XGB")
-xgb_metrics_test, xgb_pred, xgb_proba = evaluate_model(best_xgb, X_test, y_test, "XGB")
+evaluation.add_model('XGBoost', best_xgb)
+xgb_metrics_train = evaluation.metrics('XGBoost', 'train')
+xgb_metrics_val = evaluation.metrics('XGBoost', 'val')
+xgb_metrics_test = evaluation.metrics('XGBoost', 'test')
 
 print_metrics_table(xgb_metrics_val, "XGBoost - Validation")
 
@@ -316,8 +360,9 @@ results['XGBoost'] = {
     'val': xgb_metrics_val,
     'test': xgb_metrics_test,
     'train_time': xgb_time,
-    'params': xgb_grid.best_params_,
-    'stability': stability_xgb
+    'params': xgb_search['params'],
+    'stability': stability_xgb,
+    'search': xgb_search_summary
 }
 
 # ============================================================================
@@ -366,10 +411,8 @@ print("5. EVALUACIÓN FINAL EN TEST SET")
 print("="*80)
 print("⚠️ IMPORTANTE: Esta evaluación se realiza UNA SOLA VEZ en datos nunca vistos.\n")
 
-y_test_pred = best_model.predict(X_test)
-y_test_proba = best_model.predict_proba(X_test)[:, 1]
-
-test_metrics = best_metrics['test']
+# Métricas y etiquetas desde la caché: el test ya se scoreó una vez en la sección 3
+test_metrics = evaluation.metrics(best_model_name, 'test')
 
 print(f"{'Métrica':<20} {'Valor':>10} {'Objetivo':>12} {'Status':>8}")
 print("-"*55)
@@ -381,12 +424,24 @@ print(f"{'Recall':<20} {test_metrics['recall']:>10.4f} {'-':>12} {'-':>8}")
 print(f"{'Accuracy':<20} {test_metrics['accuracy']:>10.4f} {'-':>12} {'-':>8}")
 
 # Matriz de confusión
-cm = confusion_matrix(y_test, y_test_pred)
+cm = evaluation.confusion_matrix(best_model_name, 'test')
 print(f"\n📊 Matriz de Confusión (Test):")
 print(f"              Pred: 0    Pred: 1")
 print(f"   Real: 0    {cm[0,0]:>6}     {cm[0,1]:>6}")
 print(f"   Real: 1    {cm[1,0]:>6}     {cm[1,1]:>6}")
 
+# Ranking: Precision/Recall/Lift@k y niveles de prioridad (una sola partición de los scores)
+ranking = evaluation.ranking(best_model_name, 'test')
+print(f"\n📈 Ranking (Test) - tasa base {ranking['tasa_base']:.1%}:")
+print(f"   {'Top k':>6} {'Usuarios':>10} {'Precision':>10} {'Recall':>8} {'Lift':>6}")
+for row in ranking['por_k']:
+    if row['k'] in (0.01, 0.05, 0.10, 0.20, 0.30, 0.50):
+        print(f"   {row['k']:>6.0%} {row['usuarios']:>10,} {row['precision']:>10.4f} {row['recall']:>8.1%} {row['lift']:>5.2f}x")
+print(f"\n🎯 Niveles de prioridad (Test):")
+for tier in ranking['niveles_prioridad']:
+    print(f"   {tier['nivel']:<6} {tier['usuarios']:>10,} usuarios  precision {tier['precision']:.4f}  "
+          f"captura {tier['capturados']:.1%} de high-growth  lift {tier['lift']:.2f}x")
+
 # ============================================================================
 # 6. FEATURE IMPORTANCE
 # ============================================================================
@@ -452,10 +507,9 @@ fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
 # ROC Curve - Ambos modelos
 ax1 = axes[0]
-for name, model in models.items():
-    y_proba_temp = model.predict_proba(X_test)[:, 1]
-    fpr, tpr, _ = roc_curve(y_test, y_proba_temp)
-    auc = roc_auc_score(y_test, y_proba_temp)
+for name in models:
+    fpr, tpr = evaluation.roc_curve(name, 'test')
+    auc = evaluation.metrics(name, 'test')['auc_roc']
     ax1.plot(fpr, tpr, label=f'{name} (AUC={auc:.3f})', linewidth=2)
 
 ax1.plot([0, 1], [0, 1], 'k--', label='Random (AUC=0.50)', linewidth=1)
@@ -467,10 +521,9 @@ ax1.grid(True, alpha=0.3)
 
 # PR Curve - Ambos modelos
 ax2 = axes[1]
-for name, model in models.items():
-    y_proba_temp = model.predict_proba(X_test)[:, 1]
-    precision_c, recall_c, _ = precision_recall_curve(y_test, y_proba_temp)
-    ap = average_precision_score(y_test, y_proba_temp)
+for name in models:
+    precision_c, recall_c = evaluation.pr_curve(name, 'test')
+    ap = evaluation.metrics(name, 'test')['avg_precision']
     ax2.plot(recall_c, precision_c, label=f'{name} (AP={ap:.3f})', linewidth=2)
 
 baseline = y_test.mean()
@@ -512,9 +565,9 @@ x = np.arange(2)
 width = 0.25
 
 modelo_names = ['RandomForest', 'XGBoost']
-auc_vals = [results[m]['test']['auc_roc'] for m in modelo_names]
-f1_vals = [results[m]['test']['f1'] for m in modelo_names]
-p20_vals = [results[m]['test']['precision_at_20'] for m in modelo_names]
+auc_vals = [evaluation.metrics(m, 'test')['auc_roc'] for m in modelo_names]
+f1_vals = [evaluation.metrics(m, 'test')['f1'] for m in modelo_names]
+p20_vals = [evaluation.metrics(m, 'test')['precision_at_20'] for m in modelo_names]
 
 bars1 = ax.bar(x - width, auc_vals, width, label='AUC-ROC', color='steelblue')
 bars2 = ax.bar(x, f1_vals, width, label='F1-Score', color='coral')
@@ -561,25 +614,31 @@ with open(model_path, 'wb') as f:
     pickle.dump(model_data, f)
 print(f"✅ Modelo guardado: {model_path}")
 
-# Guardar reporte JSON
+# Guardar reporte JSON (métricas desde el reporte de evaluación)
+best_evaluation = evaluation.to_dict(best_model_name)
 report = {
     'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
     'mejor_modelo': best_model_name,
     'high_growth_threshold': HIGH_GROWTH_THRESHOLD,
     'top_k_percent': TOP_K_PERCENT,
     'mejores_params': best_metrics['params'],
-    'metricas_validacion': {k: float(v) for k, v in best_metrics['val'].items()},
-    'metricas_test': {k: float(v) for k, v in best_metrics['test'].items()},
+    'estrategia_busqueda': SEARCH[0],
+    'recursos': {'cores': CORES, 'available_cores': AVAILABLE_CORES},
+    # Tiempo de pared y mejor AUC de cada estrategia ejecutada (--search)
+    'busqueda_hiperparametros': {name: res['search'] for name, res in results.items()},
+    'metricas_validacion': best_evaluation['val'],
+    'metricas_test': best_evaluation['test'],
     'comparacion': {
         name: {
-            'val': {k: float(v) for k, v in res['val'].items()},
-            'test': {k: float(v) for k, v in res['test'].items()},
+            **evaluation.to_dict(name),
             'train_time': res['train_time'],
             'params': res['params'],
             'stability': float(res['stability'])
         }
         for name, res in results.items()
     },
+    # Precision/Recall/Lift@k (1%..50%), curva de presupuesto y niveles de prioridad en test
+    'ranking_test': {name: evaluation.ranking(name, 'test') for name in results},
     'objetivos_cumplidos': {
         'auc_roc_070': bool(test_metrics['auc_roc'] > 0.70),
         'f1_050': bool(test_metrics['f1'] > 0.50),
@@ -591,6 +650,8 @@ report = {
         'test': len(X_test)
     },
     'feature_count': len(feature_cols),
+    # Llamadas a predict_proba de todo el script (una por modelo y split)
+    'predict_proba_calls': evaluation.n_predict_calls,
     'top_10_features': importance_df.head(10)['feature'].tolist() if importance_df is not None else []
 }
 
@@ -651,7 +712,8 @@ print(f"""
 
    1. PRIORIZACIÓN DE RECURSOS:
       - El modelo identifica el top 20% de usuarios con mayor potencial
-      - Precision@20% de {test_metrics['precision_at_20']:.1%} = lift de {test_metrics['precision_at_20']/0.20:.1f}x sobre aleatorio
+      - Precision@20% de {test_metrics['precision_at_20']:.1%} = lift de {test_metrics['precision_at_20']/ranking['tasa_base']:.1f}x sobre aleatorio (tasa base {ranking['tasa_base']:.1%})
+      - Nivel alta captura {ranking['niveles_prioridad'][0]['capturados']:.0%} de los high-growth del test
 
    2. PERFIL DEL USUARIO HIGH-GROWTH:
       - Adopción RÁPIDA: Llegaron a su 4ta orden en pocos días
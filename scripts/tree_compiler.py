@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Compilación de ensambles de árboles a arreglos planos de NumPy
+==============================================================
+
+`predict_proba` de XGBoost y de RandomForestClassifier tiene un costo fijo
+por llamada (validación de la entrada, DMatrix, reparto en hilos) que domina
+la latencia con lotes de pocos usuarios (dashboard, servicio HTTP).
+
+`CompiledTreeEnsemble` aplana todos los árboles del modelo entrenado en
+`train_models.py` (ramas XGBoost y RandomForest) en arreglos contiguos de
+nodos y los evalúa de forma vectorizada:
+
+- `feature`, `threshold`, `left`, `right`, `default_left`: un elemento por
+  nodo, con los índices de los hijos globales al ensamble; las hojas apuntan
+  a sí mismas, así que todas las filas avanzan `max_depth` pasos sin ramas
+- `value`: margen de la hoja (XGBoost) o probabilidad de la clase positiva
+  de la hoja (RandomForest)
+- `roots`: nodo raíz de cada árbol
+
+La evaluación mantiene una matriz (usuarios × árboles) de nodos actuales y
+en cada nivel hace un gather de la feature del nodo y una comparación; el
+resultado coincide con el predictor nativo (mismas comparaciones en float32,
+mismo manejo de valores faltantes).
+
+Uso (desde la raíz del proyecto):
+    python scripts/tree_compiler.py --model models/best_classifier.pkl
+
+    compiled = CompiledTreeEnsemble.load('models/best_classifier_compiled.npz')
+    proba = compiled.predict_proba(X)           # mismo layout que feature_cols
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = 'models/best_classifier.pkl'
+
+KIND_XGBOOST = 'xgboost'
+KIND_RANDOM_FOREST = 'random_forest'
+
+# Filas por bloque de evaluación
+ROW_BLOCK = 256
+
+# Arreglos persistidos en el .npz (además de los metadatos)
+_NODE_ARRAYS = ['feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots']
+
+
+def compiled_path(model_path):
+    """Ruta del ensamble compilado junto al pickle del modelo."""
+    return os.path.splitext(model_path)[0] + '_compiled.npz'
+
+
+def _concat_trees(trees):
+    """
+    Concatena árboles [(feature, threshold, left, right, default_left, value)]
+    con índices locales en arreglos planos con índices globales.
+    """
+    sizes = np.array([len(tree[0]) for tree in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+    columns = list(zip(*trees))
+    feature, threshold, left, right, default_left, value = (np.concatenate(col) for col in columns)
+
+    offsets = np.repeat(roots, sizes)
+    is_leaf = left < 0
+    node = np.arange(len(left), dtype=np.intp)
+    # Hojas: apuntan a sí mismas (el recorrido se queda quieto al llegar)
+    left = np.where(is_leaf, node, left + offsets).astype(np.intp)
+    right = np.where(is_leaf, node, right + offsets).astype(np.intp)
+    feature = np.where(is_leaf, 0, feature).astype(np.intp)
+    return feature, threshold, left, right, default_left.astype(bool), value, roots
+
+
+def _tree_depth(left, right, root):
+    """Profundidad máxima de un árbol con hojas auto-referenciadas."""
+    depth, frontier = 0, np.array([root])
+    while True:
+        children = np.concatenate([left[frontier], right[frontier]])
+        children = children[children != np.concatenate([frontier, frontier])]
+        if not len(children):
+            return depth
+        depth += 1
+        frontier = children
+
+
+class CompiledTreeEnsemble:
+    """
+    Ensamble de árboles aplanado y evaluador vectorizado.
+
+    Construir con `from_model` (XGBClassifier o RandomForestClassifier
+    entrenados) o `load`.
+
+    Parameters:
+    -----------
+    kind : str
+        'xgboost' (suma de márgenes + sigmoide) o 'random_forest' (promedio de
+        probabilidades de hoja)
+    feature, threshold, left, right, default_left, value, roots : np.ndarray
+        Arreglos planos de nodos (ver docstring del módulo)
+    max_depth : int
+        Pasos de recorrido necesarios para que todas las filas lleguen a hoja
+    base_margin : float
+        Margen inicial (logit de base_score) para XGBoost
+    feature_names : list
+        Columnas de entrada en el orden de entrenamiento
+    """
+
+    def __init__(self, kind, feature, threshold, left, right, default_left, value, roots,
+                 max_depth, base_margin=0.0, feature_names=None):
+        if kind not in (KIND_XGBOOST, KIND_RANDOM_FOREST):
+            raise ValueError(f"Tipo de ensamble no soportado: {kind}")
+        self.kind = kind
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        # XGBoost compara en float32; sklearn compara X float32 contra umbrales float64
+        threshold_dtype = np.float32 if kind == KIND_XGBOOST else np.float64
+        self.threshold = np.ascontiguousarray(threshold, dtype=threshold_dtype)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        value_dtype = np.float32 if kind == KIND_XGBOOST else np.float64
+        self.value = np.ascontiguousarray(value, dtype=value_dtype)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        # Hijos intercalados (izquierdo, derecho): el siguiente nodo es un solo gather
+        self._children = np.column_stack([self.left, self.right]).ravel()
+
+    def __repr__(self):
+        return (f'CompiledTreeEnsemble({self.kind}, {self.n_trees} árboles, '
+                f'{self.n_nodes:,} nodos, profundidad {self.max_depth})')
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_model(cls, model, feature_names=None):
+        """
+        Aplana un XGBClassifier o RandomForestClassifier binario entrenado.
+
+        Parameters:
+        -----------
+        model : XGBClassifier | RandomForestClassifier
+        feature_names : list, optional
+            Columnas de entrada; por defecto las registradas en el modelo
+
+        Returns:
+        --------
+        CompiledTreeEnsemble
+        """
+        if hasattr(model, 'get_booster'):
+            return cls._from_xgboost(model, feature_names)
+        if hasattr(model, 'estimators_'):
+            return cls._from_random_forest(model, feature_names)
+        raise ValueError(f"Modelo no soportado para compilación: {type(model).__name__}")
+
+    @classmethod
+    def _from_xgboost(cls, model, feature_names=None):
+        booster = model.get_booster()
+        learner = json.loads(booster.save_raw('json'))['learner']
+        objective = learner['objective']['name']
+        if objective != 'binary:logistic':
+            raise ValueError(f"Objetivo XGBoost no soportado: {objective}")
+
+        gbtree = learner['gradient_booster']
+        if gbtree['name'] != 'gbtree':
+            raise ValueError(f"Booster no soportado: {gbtree['name']}")
+        trees = gbtree['model']['trees']
+        # Con early stopping, predict_proba usa solo las iteraciones hasta best_iteration
+        best_iteration = getattr(model, 'best_iteration', None)
+        if best_iteration is not None:
+            indptr = gbtree['model']['iteration_indptr']
+            trees = trees[:indptr[best_iteration + 1]]
+
+        flat = []
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError("Splits categóricos no soportados por el compilador")
+            left = np.array(tree['left_children'], dtype=np.int64)
+            is_leaf = left < 0
+            conditions = np.array(tree['split_conditions'], dtype=np.float32)
+            flat.append((np.array(tree['split_indices'], dtype=np.int64),
+                         np.where(is_leaf, np.float32(0), conditions),
+                         left,
+                         np.array(tree['right_children'], dtype=np.int64),
+                         np.array(tree['default_left'], dtype=bool),
+                         # En las hojas split_conditions guarda el valor (ya con learning_rate)
+                         np.where(is_leaf, conditions, np.float32(0))))
+
+        # base_score se guarda como probabilidad, p.ej. '[2.4329324E-1]'
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        base_margin = np.log(base_score / (1 - base_score))
+
+        feature, threshold, left, right, default_left, value, roots = _concat_trees(flat)
+        max_depth = max(_tree_depth(left, right, root) for root in roots)
+        if feature_names is None:
+            feature_names = booster.feature_names
+        return cls(KIND_XGBOOST, feature, threshold, left, right, default_left, value, roots,
+                   max_depth, base_margin, feature_names)
+
+    @classmethod
+    def _from_random_forest(cls, model, feature_names=None):
+        if len(model.classes_) != 2:
+            raise ValueError("Solo se soportan clasificadores binarios")
+
+        flat = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int64)
+            is_leaf = left < 0
+            # Probabilidad de la hoja normalizada como DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            total = counts.sum(axis=1)
+            total[total == 0] = 1
+            proba = counts[:, 1] / total
+            missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count))
+            flat.append((tree.feature.astype(np.int64),
+                         tree.threshold,
+                         left,
+                         tree.children_right.astype(np.int64),
+                         missing_left.astype(bool),
+                         np.where(is_leaf, proba, 0.0)))
+
+        feature, threshold, left, right, default_left, value, roots = _concat_trees(flat)
+        max_depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+        if feature_names is None and hasattr(model, 'feature_names_in_'):
+            feature_names = model.feature_names_in_
+        return cls(KIND_RANDOM_FOREST, feature, threshold, left, right, default_left, value, roots,
+                   max_depth, 0.0, feature_names)
+
+    # ------------------------------------------------------------------
+    # Evaluación
+    # ------------------------------------------------------------------
+
+    def _as_matrix(self, X):
+        """Entrada → matriz float32 en el orden de `feature_names`."""
+        if isinstance(X, pd.DataFrame) and self.feature_names is not None:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        return X
+
+    def apply(self, X):
+        """
+        Hoja alcanzada por cada usuario en cada árbol.
+
+        Returns:
+        --------
+        np.ndarray (n_usuarios, n_árboles) con índices globales de nodo
+        """
+        X = self._as_matrix(X)
+        # Bloques de filas: las matrices temporales (filas × árboles) caben en caché
+        blocks = [self._apply_block(X[start:start + ROW_BLOCK])
+                  for start in range(0, len(X), ROW_BLOCK)]
+        return np.vstack(blocks) if blocks else np.zeros((0, self.n_trees), dtype=np.intp)
+
+    def _apply_block(self, X):
+        n_rows, n_features = X.shape
+        # Matriz de nodos actuales; X se recorre como arreglo plano (fila * n_features + feature)
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        X_flat = np.ascontiguousarray(X).ravel()
+        has_missing = np.isnan(X_flat).any()
+
+        for _ in range(self.max_depth):
+            x = np.take(X_flat, row_offset + np.take(self.feature, node))
+            threshold = np.take(self.threshold, node)
+            # XGBoost: izquierda si x < umbral; sklearn: izquierda si x <= umbral
+            go_right = x >= threshold if self.kind == KIND_XGBOOST else x > threshold
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~np.take(self.default_left, node), go_right)
+            node = np.take(self._children, 2 * node + go_right)
+        return node
+
+    def predict_margin(self, X):
+        """Margen (log-odds) de XGBoost o probabilidad promedio de RandomForest."""
+        leaves = self.value[self.apply(X)]
+        if self.kind == KIND_XGBOOST:
+            # Acumulación secuencial en float32, árbol por árbol, como el predictor
+            # de XGBoost (sum() usa suma por pares y cambia el redondeo)
+            base = np.full((len(leaves), 1), self.base_margin, dtype=np.float32)
+            return np.add.accumulate(np.hstack([base, leaves]), axis=1)[:, -1]
+        return leaves.sum(axis=1) / self.n_trees
+
+    def predict_proba(self, X):
+        """
+        Probabilidades por clase, como `predict_proba` del modelo original.
+
+        Returns:
+        --------
+        np.ndarray (n_usuarios, 2)
+        """
+        margin = self.predict_margin(X)
+        if self.kind == KIND_XGBOOST:
+            # exp en float64 redondeado a float32 reproduce expf de la sigmoide nativa
+            exp = np.exp(-margin.astype(np.float64)).astype(np.float32)
+            positive = np.float32(1) / (exp + np.float32(1))
+        else:
+            positive = margin
+        return np.column_stack([1 - positive, positive])
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Guarda los arreglos y metadatos en un .npz."""
+        np.savez(path, kind=self.kind, max_depth=self.max_depth, base_margin=self.base_margin,
+                 feature_names=np.array(self.feature_names or [], dtype=str),
+                 **{name: getattr(self, name) for name in _NODE_ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        """Carga un ensamble guardado con `save`."""
+        with np.load(path) as data:
+            feature_names = data['feature_names'].tolist() or None
+            return cls(str(data['kind']), *(data[name] for name in _NODE_ARRAYS),
+                       max_depth=int(data['max_depth']), base_margin=float(data['base_margin']),
+                       feature_names=feature_names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=MODEL_PATH, help='Pickle del modelo (train_models.py)')
+    parser.add_argument('--output', default=None, help='Ruta del .npz (por defecto <modelo>_compiled.npz)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("COMPILACIÓN DEL ENSAMBLE DE ÁRBOLES")
+    print("="*80)
+    with open(args.model, 'rb') as f:
+        model_data = pickle.load(f)
+    compiled = CompiledTreeEnsemble.from_model(model_data['model'], model_data['feature_cols'])
+    output = args.output or compiled_path(args.model)
+    compiled.save(output)
+
+    print(f"✓ {model_data.get('model_name', type(model_data['model']).__name__)}: {compiled}")
+    print(f"💾 Guardado en {output}")
+
+
+if __name__ == '__main__':
+    main()
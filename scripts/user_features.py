@@ -0,0 +1,229 @@
+"""
+Features "estrella" por usuario a partir de las columnas crudas
+===============================================================
+
+Define en un solo lugar la selección de features del modelo y el cálculo de
+los features derivados, para que el pipeline en memoria y el modo streaming
+(`streaming_preparation.py`) produzcan exactamente las mismas columnas:
+
+- `derive_user_features`: parsea las columnas diccionario de un lote de
+  usuarios y calcula los features normalizados, de diversidad, de
+  concentración, binarios, temporales y de afinidad.
+- `one_hot_encode`: one-hot con vocabulario fijo (mismo orden y nombres que
+  `pd.get_dummies(drop_first=True)`), de modo que todos los lotes producen
+  las mismas columnas aunque a un lote le falte alguna categoría.
+- `categorical_frame` / `onehot_to_categorical`: layout alternativo con una
+  columna `category` por variable (mismo vocabulario fijo), para XGBoost con
+  `enable_categorical=True`.
+
+Autor: Proyecto Final - MINE-4101
+"""
+
+import numpy as np
+import pandas as pd
+
+from dict_parser import parse_dict_column_flat
+from feature_engine import DICT_COLUMNS, compute_dict_features
+
+# =============================================================================
+# SELECCIÓN DE FEATURES "ESTRELLA"
+# =============================================================================
+
+# Features NUMÉRICOS (se escalan con StandardScaler)
+NUMERIC_FEATURES = [
+    # VELOCIDAD (predictor #1 según EDA)
+    'efo_to_four',              # Días hasta 4ta orden (CLAVE)
+
+    # ANTIGÜEDAD
+    'days_since_first_order',   # Antigüedad del usuario
+
+    # DIVERSIDAD (normalizados - NO conteos crudos)
+    'categories_per_order',     # Categorías por orden
+    'shops_per_order',          # Tiendas por orden
+    'category_diversity',       # Índice Shannon categorías
+    'shop_diversity',           # Índice Shannon tiendas
+
+    # CONCENTRACIÓN Y LEALTAD
+    'dominant_category_ratio',  # % órdenes en categoría favorita
+    'brand001_ratio',           # Afinidad con marca líder
+]
+
+# Features BINARIOS
+BINARY_FEATURES = [
+    'is_multi_category',        # ¿Compra en 3+ categorías?
+    'is_multi_shop',            # ¿Compra en 5+ tiendas?
+]
+
+# Features CATEGÓRICOS (one-hot, drop_first)
+CATEGORICAL_FEATURES = [
+    'categoria_recencia',       # CLAVE: 7x impacto
+    'r_segment',                # Segmentación negocio
+    'city_token',               # Diferencias geográficas
+    'dominant_category',        # Preferencia para personalización
+]
+
+# Categóricos que vienen tal cual en el CSV crudo (dominant_category es derivado)
+RAW_CATEGORICAL_FEATURES = ['categoria_recencia', 'r_segment', 'city_token']
+
+# Columnas del CSV crudo necesarias para calcular los features de un usuario
+RAW_INPUT_COLUMNS = (DICT_COLUMNS + ['total_orders', 'first_order_date', 'efo_to_four']
+                     + RAW_CATEGORICAL_FEATURES)
+
+# Resumen liviano por usuario que escribe la preparación junto a los splits
+# (features sin escalar, categóricas sin one-hot, sin texto de diccionarios):
+# lo leen el dashboard y sus agregados en lugar del CSV crudo
+USER_SUMMARY_COLUMNS = (['uid', 'split', 'high_growth', 'delta_orders', 'total_orders']
+                        + NUMERIC_FEATURES + BINARY_FEATURES + CATEGORICAL_FEATURES)
+
+
+def derive_user_features(df, reference_date, multi_category_threshold=3, multi_shop_threshold=5):
+    """
+    Calcula los features derivados de un lote de usuarios crudos.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Filas del CSV crudo (columnas diccionario como texto, total_orders,
+        first_order_date)
+    reference_date : pd.Timestamp
+        Fecha de referencia para la antigüedad (máximo global de first_order_date)
+    multi_category_threshold : int
+        is_multi_category = 1 si el usuario usa >= este número de categorías
+    multi_shop_threshold : int
+        is_multi_shop = 1 si el usuario usa >= este número de tiendas
+
+    Returns:
+    --------
+    pd.DataFrame con el mismo índice que `df`: conteos internos (_num_*),
+    features numéricos derivados, binarios y categóricos de afinidad.
+    """
+    exploded = {col: parse_dict_column_flat(df[col]) for col in DICT_COLUMNS}
+    features = compute_dict_features(exploded, df['total_orders'].to_numpy())
+    features.index = df.index
+    del exploded
+
+    # Normalizados por orden: intensidad de exploración independiente del volumen
+    features['categories_per_order'] = features['_num_categories'] / df['total_orders']
+    features['shops_per_order'] = features['_num_shops'] / df['total_orders']
+
+    # Binarios de negocio
+    features['is_multi_category'] = (features['_num_categories'] >= multi_category_threshold).astype(int)
+    features['is_multi_shop'] = (features['_num_shops'] >= multi_shop_threshold).astype(int)
+
+    # Temporales
+    first_order_date = pd.to_datetime(df['first_order_date'])
+    features['days_since_first_order'] = (reference_date - first_order_date).dt.days
+
+    return features
+
+
+def dummy_columns(vocabularies, categorical_features=CATEGORICAL_FEATURES, drop_first=True):
+    """Nombres de las columnas one-hot, en el orden en que las emite `one_hot_encode`."""
+    columns = []
+    for col in categorical_features:
+        categories = vocabularies[col][1:] if drop_first else vocabularies[col]
+        columns.extend(f'{col}_{category}' for category in categories)
+    return columns
+
+
+def one_hot_matrix(df, vocabularies, categorical_features=CATEGORICAL_FEATURES,
+                   drop_first=True, dtype=np.int8):
+    """
+    One-hot con vocabulario fijo como matriz NumPy (columnas en el orden de
+    `dummy_columns`). Ver `one_hot_encode`.
+    """
+    blocks = []
+    for col in categorical_features:
+        categories = vocabularies[col][1:] if drop_first else vocabularies[col]
+        codes = pd.Categorical(df[col], categories=categories).codes
+        onehot = np.zeros((len(df), len(categories)), dtype=dtype)
+        rows = np.flatnonzero(codes >= 0)
+        onehot[rows, codes[rows]] = 1
+        blocks.append(onehot)
+    return np.hstack(blocks) if blocks else np.zeros((len(df), 0), dtype=dtype)
+
+
+def one_hot_encode(df, vocabularies, categorical_features=CATEGORICAL_FEATURES,
+                   drop_first=True, dtype=np.int8):
+    """
+    One-hot encoding con vocabulario fijo.
+
+    Con `vocabularies[col] = sorted(categorías)` reproduce las columnas de
+    `pd.get_dummies(drop_first=True)` sobre el dataset completo. Valores
+    nulos, la categoría de referencia y categorías fuera del vocabulario
+    quedan con todas las dummies en 0.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Lote con las columnas categóricas
+    vocabularies : dict
+        {columna: lista ordenada de categorías}
+    categorical_features : list
+        Columnas a codificar (en este orden)
+    drop_first : bool
+        Omitir la primera categoría de cada vocabulario (referencia)
+    dtype : numpy dtype
+        Tipo de las dummies
+
+    Returns:
+    --------
+    pd.DataFrame con las dummies (mismo índice que `df`)
+    """
+    values = one_hot_matrix(df, vocabularies, categorical_features, drop_first, dtype)
+    return pd.DataFrame(values, index=df.index,
+                        columns=dummy_columns(vocabularies, categorical_features, drop_first))
+
+
+def categorical_frame(df, vocabularies, categorical_features=CATEGORICAL_FEATURES):
+    """
+    Columnas categóricas como `pd.Categorical` con vocabulario fijo (todas las
+    particiones y lotes comparten categorías y códigos). Valores nulos o fuera
+    del vocabulario toman la categoría de referencia (primera del
+    vocabulario), igual que en el one-hot y en `onehot_to_categorical`.
+
+    Returns:
+    --------
+    pd.DataFrame con una columna `category` por variable (mismo índice que `df`)
+    """
+    columns = {}
+    for col in categorical_features:
+        codes = pd.Categorical(df[col], categories=vocabularies[col]).codes.copy()
+        codes[codes < 0] = 0
+        columns[col] = pd.Categorical.from_codes(codes, categories=vocabularies[col])
+    return pd.DataFrame(columns, index=df.index)
+
+
+def onehot_to_categorical(X, vocabularies, categorical_features=CATEGORICAL_FEATURES):
+    """
+    Colapsa los bloques one-hot (drop_first) de una matriz procesada a una
+    columna categórica por variable: todas las dummies en 0 → categoría de
+    referencia (primera del vocabulario), como en `pd.get_dummies`.
+
+    Parameters:
+    -----------
+    X : pd.DataFrame
+        Features en el layout one-hot (`dummy_columns`)
+    vocabularies : dict
+        {columna: lista ordenada de categorías} del FeaturePipeline
+
+    Returns:
+    --------
+    pd.DataFrame con las columnas no one-hot de `X` seguidas de las categóricas
+    """
+    dummies = set()
+    columns = {}
+    for col in categorical_features:
+        block = dummy_columns(vocabularies, [col])
+        dummies.update(block)
+        present = [name for name in block if name in X.columns]
+        codes = np.zeros(len(X), dtype=np.int16)
+        if present:
+            values = X[present].to_numpy()
+            hot = values.any(axis=1)
+            # +1: el código 0 es la categoría de referencia (sin dummy)
+            positions = np.array([block.index(name) for name in present]) + 1
+            codes[hot] = positions[values[hot].argmax(axis=1)]
+        columns[col] = pd.Categorical.from_codes(codes, categories=vocabularies[col])
+    kept = X[[name for name in X.columns if name not in dummies]]
+    return pd.concat([kept, pd.DataFrame(columns, index=X.index)], axis=1)